@@ -0,0 +1,208 @@
+"""
+Performance benchmarks for MuscleTone Fitness
+Builds synthetic member databases of several sizes and times the app's hot paths.
+
+    python benchmark.py                          # 1k, 10k, 100k and 1M members
+    python benchmark.py --sizes 1000 10000 -o run.json
+    python benchmark.py --sizes 10000 --compare baseline.json
+    python benchmark.py --startup                # launch maingym.py and time its cold start
+    python benchmark.py --startup dist/maingym/maingym.exe --repeat 5
+"""
+
+import argparse
+import json
+import os
+import platform
+import shlex
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from gym_core import ConnectionManager, MemberRepository
+from gym_core.synthetic import load_members
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+SEARCH_TERMS = ["sharma", "98765", "Gold", "ab"]
+VISIBLE_ROWS = 40
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maingym.py")
+STARTUP_TARGET_S = 1.0
+STARTUP_TIMEOUT_S = 120
+
+SAMPLE_MEMBER = {
+    "name": "Bench Member", "phone": "555-0199", "email": "bench@example.com",
+    "start_date": "2024-01-01", "end_date": "2024-02-01",
+    "membership_type": "Gold (3-Month)", "payment_status": "Paid",
+    "trainer": "Trainer Mike", "amount": "6000", "notes": "",
+}
+
+
+def time_op(fn, repeat):
+    """Run ``fn`` ``repeat`` times; return per-call timings in milliseconds."""
+    samples = []
+    rows = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, rows
+
+
+def summarize(size, op, samples, rows=None):
+    ordered = sorted(samples)
+    return {
+        "size": size,
+        "op": op,
+        "samples": len(samples),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "rows": rows if isinstance(rows, int) else None,
+    }
+
+
+def run_size(size, seed, repeat, workdir):
+    path = os.path.join(workdir, f"members_{size}.db")
+    manager = ConnectionManager(path)
+    repo = MemberRepository(manager)
+    repo.init()
+
+    results = []
+    start = time.perf_counter()
+    load_members(manager.connection, size, seed)
+    results.append(summarize(size, "build_db", [(time.perf_counter() - start) * 1000], size))
+    manager.connection.execute("ANALYZE")
+
+    def first_screen(term=""):
+        pager = repo.pager(term)
+        return len(pager.rows(manager.connection, 0, VISIBLE_ROWS))
+
+    results.append(summarize(size, "list_first_screen", *time_op(first_screen, repeat)))
+    for term in SEARCH_TERMS:
+        results.append(summarize(size, f"search[{term}]", *time_op(lambda: first_screen(term), repeat)))
+    results.append(summarize(size, "statistics", *time_op(repo.stats, repeat)))
+
+    created = []
+    results.append(summarize(size, "insert", *time_op(
+        lambda: created.append(repo.create(SAMPLE_MEMBER).member_id), repeat)))
+    results.append(summarize(size, "update", *time_op(
+        lambda: repo.update(created[-1], SAMPLE_MEMBER), repeat)))
+    results.append(summarize(size, "delete", *time_op(
+        lambda: repo.delete(created.pop()), repeat)))
+
+    export_path = os.path.join(workdir, "export.csv")
+    results.append(summarize(size, "export_csv", *time_op(lambda: repo.export_csv(export_path), 1)))
+
+    backup_path = os.path.join(workdir, "backup.db")
+    results.append(summarize(size, "backup", *time_op(lambda: repo.backup(backup_path), 1)))
+
+    manager.close()
+    for leftover in (export_path, backup_path):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    return results
+
+
+def run_startup(command, repeat):
+    """Launch the app ``repeat`` times with GYM_STARTUP_REPORT set.
+
+    Each phase is timed from the moment the process was launched, so a
+    packaged build's own unpacking and loading counts; ``startup[launch]``
+    is that part alone (up to the first line of maingym.py).
+    """
+    samples = {}
+    with tempfile.TemporaryDirectory(prefix="gym_startup_") as workdir:
+        for run in range(repeat):
+            path = os.path.join(workdir, f"startup_{run}.json")
+            launched = time.time()
+            subprocess.run(command, env=dict(os.environ, GYM_STARTUP_REPORT=path), timeout=STARTUP_TIMEOUT_S)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                raise SystemExit(f"{shlex.join(command)} exited without writing a startup report") from None
+            samples.setdefault("launch", []).append((report["started"] - launched) * 1000)
+            for phase, at in sorted(report["wall"].items(), key=lambda item: item[1]):
+                samples.setdefault(phase, []).append((at - launched) * 1000)
+    return [summarize(None, f"startup[{phase}]", values) for phase, values in samples.items()]
+
+
+def compare(results, baseline_path, threshold):
+    """Print median changes against a previous run; return the regressions."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["size"], r["op"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        before = baseline.get((result["size"], result["op"]))
+        if not before or not before["median_ms"]:
+            continue
+        ratio = result["median_ms"] / before["median_ms"]
+        flag = "  <-- REGRESSION" if ratio > threshold else ""
+        print(f"{result['size'] or '':>9} {result['op']:<22} {before['median_ms']:>10.3f} -> "
+              f"{result['median_ms']:>10.3f} ms  x{ratio:.2f}{flag}", file=sys.stderr)
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MuscleTone Fitness data operations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="member counts to test")
+    parser.add_argument("--seed", type=int, default=42, help="synthetic data seed")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per operation")
+    parser.add_argument("-o", "--output", help="write JSON results here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare medians against an earlier JSON run")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="median slowdown ratio counted as a regression (default 1.25)")
+    parser.add_argument("--startup", nargs="?", const="", metavar="COMMAND",
+                        help="time the app's startup instead: launch COMMAND (default: this Python on maingym.py) "
+                             "--repeat times")
+    parser.add_argument("--startup-target", type=float, default=STARTUP_TARGET_S, metavar="SECONDS",
+                        help=f"fail if the median time to first paint is above this (default {STARTUP_TARGET_S})")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    if args.startup is not None:
+        command = shlex.split(args.startup) or [sys.executable, APP_SCRIPT]
+        print(f"Timing {args.repeat} launches of {shlex.join(command)}...", file=sys.stderr)
+        report["meta"]["command"] = command
+        report["results"].extend(run_startup(command, args.repeat))
+    else:
+        with tempfile.TemporaryDirectory(prefix="gym_bench_") as workdir:
+            for size in args.sizes:
+                print(f"Benchmarking {size} members...", file=sys.stderr)
+                report["results"].extend(run_size(size, args.seed, args.repeat, workdir))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    failed = False
+    if args.startup is not None:
+        painted = next(r for r in report["results"] if r["op"] == "startup[first_paint]")
+        failed = painted["median_ms"] > args.startup_target * 1000
+        print(f"First paint: median {painted['median_ms']:.0f} ms, target {args.startup_target * 1000:.0f} ms"
+              + ("  <-- TOO SLOW" if failed else ""), file=sys.stderr)
+    if args.compare:
+        failed = bool(compare(report["results"], args.compare, args.threshold)) or failed
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
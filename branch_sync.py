@@ -0,0 +1,75 @@
+"""
+Branch sync for MuscleTone Fitness
+Each branch keeps its own database. Export what changed since the last
+sync to a small delta file for each other branch, carry the files over,
+and merge them there; conflicting edits resolve the same way everywhere:
+
+    python branch_sync.py status
+    python branch_sync.py name north
+    python branch_sync.py export south            # writes north-to-south-<time>.delta.gz
+    python branch_sync.py merge south-to-north-20250101-2300.delta.gz
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from gym_core import ConnectionManager, MemberRepository, SyncError, ValidationError
+from gym_core.sync import DELTA_SUFFIX
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync members between branch databases")
+    parser.add_argument("--db", help="database file (default: the app's database)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="show this branch's name and its peers")
+    name = commands.add_parser("name", help="rename this branch (do it before the first sync)")
+    name.add_argument("branch")
+    export = commands.add_parser("export", help="write the changes since the last export to a branch")
+    export.add_argument("peer", help="the receiving branch's name")
+    export.add_argument("-o", "--out", help="delta file to write (default: <branch>-to-<peer>-<time>.delta.gz)")
+    export.add_argument("--full", action="store_true", help="include every member, not just the changes")
+    merge = commands.add_parser("merge", help="apply delta files from other branches")
+    merge.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    repo = MemberRepository(ConnectionManager(args.db)) if args.db else MemberRepository()
+    try:
+        repo.init()
+        if args.command == "status":
+            print(f"🏢 Branch: {repo.branch()}")
+            for peer in repo.sync_status():
+                print(f"   {peer.peer}: sent through change {peer.sent_seq:,}, last merged {peer.received_at or 'never'}")
+        elif args.command == "name":
+            repo.rename_branch(args.branch)
+            print(f"✅ This branch is now {repo.branch()}")
+        elif args.command == "export":
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = args.out or f"{repo.branch()}-to-{args.peer}-{stamp}{DELTA_SUFFIX}"
+            start = time.perf_counter()
+            rows = repo.export_delta(path, args.peer, args.full)
+            print(f"✅ {rows:,} members -> {path} ({os.path.getsize(path) / 1024:,.1f} KB) "
+                  f"in {time.perf_counter() - start:.1f}s")
+        else:
+            for path in args.files:
+                start = time.perf_counter()
+                result = repo.merge_delta(path)
+                print(f"✅ {os.path.basename(path)} from {result.branch}: {result.inserted:,} added, "
+                      f"{result.updated:,} updated, {result.deleted:,} deleted, "
+                      f"{result.skipped:,} already newer here ({time.perf_counter() - start:.1f}s)")
+    except (SyncError, ValidationError) as e:
+        print(f"❌ {e}")
+        return 1
+    except (OSError, sqlite3.Error) as e:
+        print(f"❌ Sync failed: {e}")
+        return 1
+    finally:
+        repo.db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Data layer for MuscleTone Fitness.
+
+Importing this package has no side effects beyond loading modules: no
+database file, folder or window is created until something asks for it.
+The HTTP client and server (which pull in asyncio and http.client) load
+on first use of their names, so a desk that works on the local file
+doesn't pay for them at startup.
+"""
+
+import importlib
+
+from gym_core.analytics import AnalyticsUnavailable
+from gym_core.attendance import AttendanceWriter, CheckIn
+from gym_core.backup import BackupError, BackupScheduler
+from gym_core.changes import Change, ChangeLogGap
+from gym_core.db import DB_FOLDER, DB_NAME, ConnectionManager, db
+from gym_core.export import ExportCancelled
+from gym_core.importer import ImportResult
+from gym_core.reminders import FileTransport, ReminderEngine, SmtpTransport
+from gym_core.service import MemberChange, MemberRepository
+from gym_core.sync import MergeResult, SyncError
+from gym_core.validation import (
+    MEMBERSHIP_TYPES,
+    PAYMENT_STATUSES,
+    ValidationError,
+    validate_date,
+    validate_email,
+    validate_phone,
+)
+
+__all__ = [
+    "AnalyticsUnavailable",
+    "AttendanceWriter",
+    "BackupError",
+    "BackupScheduler",
+    "Change",
+    "ChangeLogGap",
+    "CheckIn",
+    "DB_FOLDER",
+    "DB_NAME",
+    "MEMBERSHIP_TYPES",
+    "PAYMENT_STATUSES",
+    "ConnectionManager",
+    "ExportCancelled",
+    "FileTransport",
+    "ImportResult",
+    "MemberChange",
+    "MemberRepository",
+    "MemberServer",
+    "MergeResult",
+    "ReminderEngine",
+    "RemoteError",
+    "RemoteRepository",
+    "SmtpTransport",
+    "SyncError",
+    "ValidationError",
+    "db",
+    "validate_date",
+    "validate_email",
+    "validate_phone",
+]
+
+_LAZY = {
+    "MemberServer": "gym_core.server",
+    "RemoteError": "gym_core.remote",
+    "RemoteRepository": "gym_core.remote",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'gym_core' has no attribute {name!r}")
@@ -0,0 +1,226 @@
+"""Member analytics with pandas: cohorts, revenue, trainer load, unpaid balances.
+
+Data is read with ``pandas.read_sql_query`` in chunks and every report is
+computed column-wise; no report loops over members in Python. pandas is
+optional: without it the rest of the app works and ``build_reports``
+raises ``AnalyticsUnavailable``. It is imported on the first report, not
+with the package: importing pandas takes longer than the app's whole
+cold start.
+"""
+
+import importlib.util
+import threading
+from datetime import date
+
+from gym_core.migrations import day_number_sql
+from gym_core.stats import EXPIRING_WINDOW_DAYS, OUTSTANDING_STATUSES
+
+READ_CHUNK_SIZE = 50000
+RETENTION_PERIOD_DAYS = 30
+RETENTION_PERIODS = 12
+NO_TRAINER = "(none)"
+REPORT_NAMES = ("cohorts", "revenue", "trainers", "unpaid")
+
+
+np = pd = None  # set by _import_pandas
+
+
+class AnalyticsUnavailable(Exception):
+    """pandas isn't installed; the message is user-facing."""
+
+
+def analytics_available() -> bool:
+    return pd is not None or importlib.util.find_spec("pandas") is not None
+
+
+def _import_pandas():
+    """Bind ``np``/``pd``; called by every function that uses them."""
+    global np, pd
+    if pd is None:
+        try:
+            import numpy
+            import pandas
+        except ImportError:  # pragma: no cover - depends on the environment
+            raise AnalyticsUnavailable("Reports need pandas. Install it with: pip install pandas") from None
+        np, pd = numpy, pandas
+
+
+def _has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+
+def _read(conn, sql, chunk_size=READ_CHUNK_SIZE):
+    _import_pandas()
+    frames = list(pd.read_sql_query(sql, conn, chunksize=chunk_size))
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    for name in ("membership_type", "payment_status", "trainer"):
+        if name in frame:
+            values = frame[name].fillna("")
+            if name == "trainer":
+                values = values.replace("", NO_TRAINER)
+            frame[name] = values.astype("category")
+    return frame
+
+
+def load_members(conn, chunk_size=READ_CHUNK_SIZE):
+    """The customers columns the reports use, one row per member."""
+    return _read(conn, """
+        SELECT id, start_day, end_day, membership_type, payment_status, trainer,
+               coalesce(amount, 0) AS amount
+        FROM customers
+    """, chunk_size)
+
+
+def load_plans(conn, chunk_size=READ_CHUNK_SIZE):
+    """Plans still in force in plan_history (reversed entries and their
+    reversals left out), or None on a database without the ledger."""
+    if not _has_table(conn, "plan_history"):
+        return None
+    entries = _read(conn, f"""
+        SELECT id, member_id, reverses, {day_number_sql("start_date")} AS start_day,
+               {day_number_sql("end_date")} AS end_day, membership_type, trainer, coalesce(amount, 0) AS amount
+        FROM plan_history
+    """, chunk_size)
+    if entries.empty:
+        return entries
+    live = entries["reverses"].isna() & ~entries["id"].isin(entries["reverses"].dropna())
+    return entries.loc[live].drop(columns=["id", "reverses"]).reset_index(drop=True)
+
+
+def _day_number(today):
+    return (today - date(1970, 1, 1)).days
+
+
+def cohort_report(members, plans=None, today=None):
+    """Retention by start month.
+
+    A member's span runs from their first plan's start to their last plan's
+    end (from the ledger when there is one, so deleted members still count
+    in their cohort). ``Pn`` is the share of the cohort still covered
+    ``n`` periods of RETENTION_PERIOD_DAYS after joining, over the members
+    for whom that point has already been reached.
+    """
+    _import_pandas()
+    today = _day_number(today or date.today())
+    if plans is not None and len(plans):
+        source, key = plans, "member_id"
+    else:
+        source, key = members, "id"
+    spans = (source.dropna(subset=["start_day", "end_day"])
+             .groupby(key)
+             .agg(start_day=("start_day", "min"), end_day=("end_day", "max")))
+    start = spans["start_day"].to_numpy(dtype="int64")
+    covered = spans["end_day"].to_numpy(dtype="int64") - start
+    offsets = np.arange(RETENTION_PERIODS + 1) * RETENTION_PERIOD_DAYS
+    retained = (covered[:, None] >= offsets).astype("float64")
+    retained[start[:, None] + offsets > today] = np.nan
+    columns = [f"P{n}" for n in range(RETENTION_PERIODS + 1)]
+    matrix = pd.DataFrame(retained, columns=columns)
+    matrix["cohort"] = start.astype("datetime64[D]").astype("datetime64[M]")
+    matrix["members"] = 1
+    matrix["active"] = spans["end_day"].to_numpy() >= today
+    grouped = matrix.groupby("cohort")
+    report = grouped[["members", "active"]].sum()
+    report["churn_pct"] = (1 - report["active"] / report["members"]) * 100
+    report = report.join(grouped[columns].mean() * 100)
+    report.index = report.index.strftime("%Y-%m")
+    return report.round(1).reset_index()
+
+
+def revenue_report(conn, members, chunk_size=READ_CHUNK_SIZE):
+    """Revenue by membership type and trainer.
+
+    Read from the ``revenue_monthly`` rollup when the ledger exists (all
+    plans ever sold), otherwise from members' current plans.
+    """
+    if _has_table(conn, "revenue_monthly"):
+        frame = _read(conn, """
+            SELECT membership_type, trainer, entries AS plans, amount, paid FROM revenue_monthly
+        """, chunk_size)
+    else:
+        frame = members.assign(
+            plans=1, paid=members["amount"].where(members["payment_status"] == "Paid", 0))
+    report = (frame.groupby(["membership_type", "trainer"], observed=True)[["plans", "amount", "paid"]]
+              .sum())
+    report = report[(report["plans"] != 0) | (report["amount"] != 0)]
+    report["paid_pct"] = (report["paid"] / report["amount"].where(report["amount"] != 0) * 100).fillna(0)
+    return report.sort_values("amount", ascending=False).round(1).reset_index()
+
+
+def trainer_report(members, today=None):
+    """Active and expiring members per trainer and the value of their plans."""
+    today = _day_number(today or date.today())
+    days_left = members["end_day"] - today
+    active = days_left >= 0
+    frame = members.assign(
+        active=active,
+        expiring=active & (days_left <= EXPIRING_WINDOW_DAYS),
+        active_amount=members["amount"].where(active, 0),
+    )
+    report = frame.groupby("trainer", observed=True).agg(
+        members=("id", "size"), active=("active", "sum"), expiring=("expiring", "sum"),
+        active_amount=("active_amount", "sum"))
+    report["load_pct"] = report["active"] / max(int(active.sum()), 1) * 100
+    return report.sort_values("active", ascending=False).round(1).reset_index()
+
+
+def unpaid_report(members, today=None):
+    """Outstanding balances by payment status and membership type."""
+    today = _day_number(today or date.today())
+    owing = members[members["payment_status"].isin(OUTSTANDING_STATUSES)]
+    frame = owing.assign(
+        owed_by_expired=owing["amount"].where(owing["end_day"] < today, 0),
+        expired=owing["end_day"] < today,
+    )
+    report = frame.groupby(["payment_status", "membership_type"], observed=True).agg(
+        members=("id", "size"), owed=("amount", "sum"),
+        expired=("expired", "sum"), owed_by_expired=("owed_by_expired", "sum"))
+    return report.sort_values("owed", ascending=False).round(1).reset_index()
+
+
+def data_version(conn):
+    """Changes whenever a report input may have: member count and amount
+    (from member_summary) plus the newest ledger entry."""
+    ledger = "(SELECT coalesce(max(id), 0) FROM plan_history)" if _has_table(conn, "plan_history") else "0"
+    return conn.execute(f"""
+        SELECT coalesce(SUM(members), 0), coalesce(SUM(amount), 0), {ledger}
+        FROM member_summary WHERE dimension = 'all'
+    """).fetchone()
+
+
+def build_reports(conn, today=None, chunk_size=READ_CHUNK_SIZE):
+    """Every report, as a dict of DataFrames keyed by REPORT_NAMES."""
+    _import_pandas()
+    members = load_members(conn, chunk_size)
+    plans = load_plans(conn, chunk_size)
+    return {
+        "cohorts": cohort_report(members, plans, today),
+        "revenue": revenue_report(conn, members, chunk_size),
+        "trainers": trainer_report(members, today),
+        "unpaid": unpaid_report(members, today),
+    }
+
+
+class ReportCache:
+    """The last reports built, reused while ``data_version`` and the date
+    stay the same. Safe to share between threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._reports = None
+
+    def get(self, conn, today=None):
+        today = today or date.today()
+        key = (tuple(data_version(conn)), today)
+        with self._lock:
+            if key == self._key:
+                return self._reports
+        reports = build_reports(conn, today)
+        with self._lock:
+            self._key, self._reports = key, reports
+        return reports
+
+    def clear(self):
+        with self._lock:
+            self._key = self._reports = None
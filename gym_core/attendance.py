@@ -0,0 +1,274 @@
+"""Check-ins: validated at the door, appended by one group-committing writer.
+
+``AttendanceWriter`` owns a queue and a single thread with its own writer
+connection. Every check-in waiting when the thread wakes is validated
+against the member's plan and written in one transaction, so a burst of
+scans costs one commit rather than one each. Each check-in also updates
+the ``attendance_members`` and ``attendance_hourly`` rollups, which is
+where visit counts and the heatmap are read from; the raw ``attendance``
+log is never scanned for them.
+"""
+
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+
+from gym_core.validation import ValidationError, validate_date
+
+CHECKIN_BATCH_SIZE = 200
+CHECKIN_TIMEOUT = 10             # seconds a caller waits for its commit
+HEATMAP_DAYS = 28
+BLOCKED_PAYMENT_STATUSES = ("Unpaid",)
+ATTENDANCE_TABLES = ("attendance", "attendance_members", "attendance_hourly")
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+# A committed check-in; ``visits`` is the member's visit count including it.
+CheckIn = namedtuple("CheckIn", "member_id name checked_in_at visits")
+
+_STOP = object()
+
+
+def check_in_time(at=None) -> str:
+    """``at`` (a datetime or ISO string, default now) as 'YYYY-MM-DD HH:MM:SS'."""
+    if at is None:
+        at = datetime.now()
+    elif isinstance(at, str):
+        try:
+            at = datetime.fromisoformat(at.strip())
+        except ValueError:
+            raise ValidationError("Check-in time must be YYYY-MM-DD HH:MM:SS.") from None
+    return at.isoformat(sep=" ", timespec="seconds")
+
+
+def check_in_error(member, day):
+    """Why this member can't check in on ``day`` (ISO date), or None.
+
+    ``member`` is (name, start_date, end_date, payment_status).
+    """
+    name, start_date, end_date, payment_status = member
+    if end_date < day:
+        return f"{name}'s membership expired on {end_date}."
+    if start_date > day:
+        return f"{name}'s membership starts on {start_date}."
+    if payment_status in BLOCKED_PAYMENT_STATUSES:
+        return f"{name} has an unpaid plan. Please see the front desk."
+    return None
+
+
+def roll_up_attendance(conn, after_id=0):
+    """Add attendance rows with id > ``after_id`` to the rollups."""
+    conn.execute("""
+        INSERT INTO attendance_members (member_id, visits, first_visit, last_visit)
+        SELECT member_id, COUNT(*), min(checked_in_at), max(checked_in_at)
+        FROM attendance NOT INDEXED WHERE id > ? GROUP BY member_id
+        ON CONFLICT (member_id) DO UPDATE SET
+            visits = visits + excluded.visits,
+            first_visit = min(first_visit, excluded.first_visit),
+            last_visit = max(last_visit, excluded.last_visit)
+    """, (after_id,))
+    conn.execute("""
+        INSERT INTO attendance_hourly (day, hour, visits)
+        SELECT substr(checked_in_at, 1, 10), CAST(substr(checked_in_at, 12, 2) AS INTEGER), COUNT(*)
+        FROM attendance NOT INDEXED WHERE id > ? GROUP BY 1, 2
+        ON CONFLICT (day, hour) DO UPDATE SET visits = visits + excluded.visits
+    """, (after_id,))
+
+
+def record_check_ins(conn, entries):
+    """Validate and append ``(member_id, checked_in_at)`` entries.
+
+    Returns one result per entry, in order: a CheckIn, or the exception
+    that entry should raise (KeyError for an unknown member,
+    ValidationError for one who may not enter). Must run inside the
+    caller's transaction.
+    """
+    ids = sorted({member_id for member_id, _ in entries})
+    members = {row[0]: row[1:] for row in conn.execute(f"""
+        SELECT id, name, start_date, end_date, payment_status FROM customers
+        WHERE id IN ({", ".join("?" * len(ids))})
+    """, ids)}
+    results, accepted = [], []
+    for member_id, at in entries:
+        member = members.get(member_id)
+        error = None if member is None else check_in_error(member, at[:10])
+        if member is None:
+            results.append(KeyError(member_id))
+        elif error:
+            results.append(ValidationError(error))
+        else:
+            results.append(None)
+            accepted.append((member_id, at))
+    if not accepted:
+        return results
+    mark = conn.execute("SELECT coalesce(max(id), 0) FROM attendance").fetchone()[0]
+    conn.executemany("INSERT INTO attendance (member_id, checked_in_at) VALUES (?, ?)", accepted)
+    roll_up_attendance(conn, mark)
+    # Number each member's check-ins in this batch up to their new total
+    totals = dict(conn.execute(f"""
+        SELECT member_id, visits FROM attendance_members
+        WHERE member_id IN ({", ".join("?" * len(ids))})
+    """, ids))
+    later = {}
+    for member_id, _ in accepted:
+        later[member_id] = later.get(member_id, 0) + 1
+    for i, (member_id, at) in enumerate(entries):
+        if results[i] is None:
+            later[member_id] -= 1
+            results[i] = CheckIn(member_id, members[member_id][0], at, totals[member_id] - later[member_id])
+    return results
+
+
+def member_visits(conn, member_id):
+    """(visits, first_visit, last_visit) for a member, from the rollup."""
+    row = conn.execute("SELECT visits, first_visit, last_visit FROM attendance_members WHERE member_id = ?",
+                       (member_id,)).fetchone()
+    return row or (0, None, None)
+
+
+def frequent_visitors(conn, limit=10):
+    """(member_id, name, visits, last_visit) for the most frequent visitors."""
+    return conn.execute("""
+        SELECT a.member_id, coalesce(c.name, ''), a.visits, a.last_visit
+        FROM attendance_members a LEFT JOIN customers c ON c.id = a.member_id
+        ORDER BY a.visits DESC LIMIT ?
+    """, (limit,)).fetchall()
+
+
+def visit_heatmap(conn, date_from=None, date_to=None):
+    """Check-ins by weekday (Monday first) and hour: 7 lists of 24 counts.
+
+    Covers ``date_from``..``date_to`` (inclusive; default the last
+    HEATMAP_DAYS days), summed from ``attendance_hourly`` so the cost is
+    at most 24 rows per day.
+    """
+    for value, label in ((date_from, "From"), (date_to, "To")):
+        if value and not validate_date(value):
+            raise ValidationError(f"{label} date must be YYYY-MM-DD.")
+    date_to = (date_to or date.today().isoformat())[:10]
+    date_from = (date_from or (date.fromisoformat(date_to) - timedelta(days=HEATMAP_DAYS - 1)).isoformat())[:10]
+    grid = [[0] * 24 for _ in WEEKDAYS]
+    for weekday, hour, visits in conn.execute("""
+        SELECT (CAST(strftime('%w', day) AS INTEGER) + 6) % 7, hour, SUM(visits)
+        FROM attendance_hourly WHERE day BETWEEN ? AND ? GROUP BY 1, 2
+    """, (date_from, date_to)):
+        grid[weekday][hour] = visits
+    return grid
+
+
+class AttendanceWriter:
+    """Single writer thread that group-commits queued check-ins.
+
+    ``submit`` returns a Future right away; it resolves to a CheckIn once
+    the batch holding it has committed, or raises the check-in's error.
+    ``stop`` writes whatever is still queued before the thread exits. If
+    the thread can't open its connection it fails everything queued, and
+    the next ``submit`` tries again.
+    """
+
+    def __init__(self, manager, batch_size=CHECKIN_BATCH_SIZE, on_error=None):
+        self.manager = manager
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=None):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, member_id, at=None) -> Future:
+        try:
+            member_id = int(member_id)
+        except (TypeError, ValueError):
+            raise ValidationError("Member ID must be a whole number.") from None
+        future = Future()
+        # Queue before starting: a writer that fails to start resets
+        # itself and fails what is queued, so nothing waits forever.
+        self._queue.put((member_id, check_in_time(at), future))
+        self.start()
+        return future
+
+    def check_in(self, member_id, at=None, timeout=CHECKIN_TIMEOUT) -> CheckIn:
+        """Check a member in and wait for the commit."""
+        return self.submit(member_id, at).result(timeout)
+
+    def _next_batch(self):
+        """Block for one check-in, then take whatever else is already queued."""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, conn, batch):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            results = record_check_ins(conn, [(member_id, at) for member_id, at, _ in batch])
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        return results
+
+    def _fail_queued(self, error):
+        """Let the next submit start a new thread, and fail everything queued."""
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP:
+                item[2].set_exception(error)
+
+    def _run(self):
+        try:
+            conn = self.manager.writer()
+        except Exception as e:
+            self._fail_queued(e)
+            if self.on_error:
+                self.on_error(e)
+            return
+        try:
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if not batch:
+                    continue
+                try:
+                    results = self._write(conn, batch)
+                except Exception as e:
+                    for _, _, future in batch:
+                        future.set_exception(e)
+                    if self.on_error:
+                        self.on_error(e)
+                    continue
+                for (_, _, future), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+        finally:
+            conn.close()
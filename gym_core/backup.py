@@ -0,0 +1,203 @@
+"""Online backups, rotated snapshots and restore through the SQLite backup API."""
+
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from gym_core.changes import compact_change_log
+from gym_core.migrations import migrate
+
+BACKUP_PAGES = 1024             # pages copied per backup step
+SNAPSHOT_FOLDER = "backups"     # next to the database file
+SNAPSHOT_KEEP = 7
+SNAPSHOT_INTERVAL_HOURS = 24
+SNAPSHOT_PREFIX = "gym_data-"
+SNAPSHOT_SUFFIX = ".db.gz"
+
+
+class BackupError(Exception):
+    """A backup file can't be used; the message is user-facing."""
+
+
+def _copy(source, path, progress=None, pages=BACKUP_PAGES):
+    """Back up ``source`` into a new database at ``path``, via a temp file."""
+    partial = path + ".part"
+    if os.path.exists(partial):
+        os.remove(partial)
+    dest = sqlite3.connect(partial)
+    try:
+        # Pin one read snapshot so steps never mix pages from different commits
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        try:
+            source.backup(dest, pages=pages, sleep=0,
+                          progress=(lambda status, remaining, total: progress(total - remaining, total))
+                          if progress else None)
+        finally:
+            source.rollback()
+        dest.execute("PRAGMA journal_mode=DELETE")
+        dest.close()
+        os.replace(partial, path)
+    except BaseException:
+        dest.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+def backup_to(manager, path, progress=None):
+    """Write a consistent copy of the database to ``path`` while it stays in use.
+
+    Reads through a private read-only connection, so writers are never
+    blocked. ``progress(done, total)`` is called in pages after each step.
+    """
+    source = manager.reader()
+    try:
+        _copy(source, path, progress)
+    finally:
+        source.close()
+
+
+def snapshot_folder(manager):
+    return os.path.join(os.path.dirname(os.path.abspath(manager.path)), SNAPSHOT_FOLDER)
+
+
+def list_snapshots(manager):
+    """Snapshot paths, newest first."""
+    pattern = os.path.join(snapshot_folder(manager), f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}")
+    return sorted(glob.glob(pattern), reverse=True)
+
+
+def take_snapshot(manager, keep=SNAPSHOT_KEEP, progress=None):
+    """Save a gzip-compressed, timestamped backup and prune all but ``keep``."""
+    folder = snapshot_folder(manager)
+    os.makedirs(folder, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(folder, f"{SNAPSHOT_PREFIX}{stamp}{SNAPSHOT_SUFFIX}")
+    fd, raw = tempfile.mkstemp(suffix=".db", dir=folder)
+    os.close(fd)
+    try:
+        backup_to(manager, raw, progress)
+        with open(raw, "rb") as src, gzip.open(path + ".part", "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(path + ".part", path)
+    finally:
+        for leftover in (raw, path + ".part"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    for old in list_snapshots(manager)[keep:]:
+        os.remove(old)
+    return path
+
+
+def _open_readonly(path):
+    return sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+
+
+def _check(path):
+    """Raise BackupError unless ``path`` is an intact member database."""
+    try:
+        conn = _open_readonly(path)
+    except sqlite3.Error as e:
+        raise BackupError(f"Not a database file: {e}") from None
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != "ok":
+            raise BackupError(f"Backup failed its integrity check: {result}")
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='customers'").fetchone():
+            raise BackupError("This file is not a MuscleTone Fitness backup.")
+    except sqlite3.DatabaseError as e:
+        raise BackupError(f"Not a database file: {e}") from None
+    finally:
+        conn.close()
+
+
+def restore_from(manager, path, progress=None):
+    """Replace the live database's contents with the backup at ``path``.
+
+    Accepts plain ``.db`` files and compressed snapshots. The backup is
+    integrity-checked first and then copied in through the backup API on a
+    separate writer connection, so open connections stay valid and simply
+    see the restored data. Returns the schema version after upgrading.
+    """
+    temp = None
+    try:
+        if path.endswith(".gz"):
+            fd, temp = tempfile.mkstemp(suffix=".db")
+            with os.fdopen(fd, "wb") as dst, gzip.open(path, "rb") as src:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            path = temp
+        _check(path)
+        source = _open_readonly(path)
+        dest = manager.writer()
+        try:
+            source.backup(dest, pages=BACKUP_PAGES, sleep=0,
+                          progress=(lambda status, remaining, total: progress(total - remaining, total))
+                          if progress else None)
+            return migrate(dest)
+        finally:
+            source.close()
+            dest.close()
+    except (OSError, EOFError) as e:
+        raise BackupError(f"Could not read backup: {e}") from None
+    finally:
+        if temp and os.path.exists(temp):
+            os.remove(temp)
+
+
+class BackupScheduler:
+    """Takes a snapshot every ``interval_hours`` on a background thread.
+
+    On start it snapshots straight away if the newest snapshot is already
+    older than the interval, so an app that is only open briefly each day
+    still gets daily backups. The change log is compacted just before
+    each snapshot.
+    """
+
+    def __init__(self, manager, interval_hours=SNAPSHOT_INTERVAL_HOURS, keep=SNAPSHOT_KEEP, on_error=None):
+        self.manager = manager
+        self.interval = interval_hours * 3600
+        self.keep = keep
+        self.on_error = on_error
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _due_in(self):
+        snapshots = list_snapshots(self.manager)
+        if not snapshots:
+            return 0
+        return max(0, os.path.getmtime(snapshots[0]) + self.interval - time.time())
+
+    def _compact(self):
+        conn = self.manager.writer()
+        try:
+            compact_change_log(conn)
+        finally:
+            conn.close()
+
+    def _run(self):
+        while not self._stop.wait(self._due_in()):
+            try:
+                self._compact()
+                take_snapshot(self.manager, self.keep)
+            except (OSError, sqlite3.Error) as e:
+                if self.on_error:
+                    self.on_error(e)
+                # Don't spin on a persistent failure such as a full disk
+                if self._stop.wait(self.interval):
+                    break
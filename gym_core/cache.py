@@ -0,0 +1,73 @@
+"""Bounded LRU cache of Member records, keyed by id."""
+
+import threading
+from collections import OrderedDict
+
+MEMBER_CACHE_SIZE = 4096
+
+
+class MemberCache:
+    """The most recently read or written members.
+
+    List queries fill it and the repository's write paths update or evict
+    entries, so a member already on screen can be opened without a query.
+    Safe to share between the UI thread and the list worker. ``days_left``
+    is as of when the row was read.
+    """
+
+    def __init__(self, capacity=MEMBER_CACHE_SIZE):
+        self.capacity = capacity
+        self._members = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every write-path change, so rows a reader fetched before
+        # a write can be recognised as possibly stale.
+        self.epoch = 0
+
+    def __len__(self):
+        return len(self._members)
+
+    def get(self, member_id):
+        with self._lock:
+            member = self._members.get(member_id)
+            if member is not None:
+                self._members.move_to_end(member_id)
+            return member
+
+    def put(self, member):
+        """Store a member just written (or read) through the shared connection."""
+        with self._lock:
+            self.epoch += 1
+            self._store(member)
+            self._trim()
+
+    def put_many(self, members, epoch=None):
+        """Store members from a list query.
+
+        Pass the ``epoch`` seen before the query ran; if a write has
+        happened since, the members are skipped rather than risk caching a
+        version older than the one written.
+        """
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            for member in members:
+                self._store(member)
+            self._trim()
+
+    def discard(self, member_id):
+        with self._lock:
+            self.epoch += 1
+            self._members.pop(member_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self._members.clear()
+
+    def _store(self, member):
+        self._members[member.id] = member
+        self._members.move_to_end(member.id)
+
+    def _trim(self):
+        while len(self._members) > self.capacity:
+            self._members.popitem(last=False)
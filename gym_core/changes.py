@@ -0,0 +1,103 @@
+"""The customers change log: what changed since sequence N, and compaction.
+
+Triggers on ``customers`` (migration 9) append one ``change_log`` record
+per insert, real update and delete, numbered by a sequence that only
+grows. An update keeps the names and old values of the columns it
+changed, and a delete keeps the whole row, so a deleted member is never
+lost from the audit trail.
+
+Readers keep the last sequence they have seen and ask ``changes_since``
+for the records after it, instead of re-reading the table. Compaction
+drops records that are old and superseded (a later record exists for the
+same member), keeping each member's newest record forever. A cursor from
+before the compacted range can't be replayed; ``changes_since`` raises
+``ChangeLogGap`` and the reader starts over from a full read.
+"""
+
+import json
+from collections import namedtuple
+
+CHANGE_FEED_LIMIT = 1000
+CHANGE_LOG_COMPACT_DAYS = 30
+
+# A change feed record; ``changed`` (update only) is a tuple of column names
+# and ``old`` a dict of their previous values (every column for a delete).
+Change = namedtuple("Change", "seq op member_id changed old at")
+
+
+class ChangeLogGap(Exception):
+    """The change log no longer covers the requested cursor; re-read everything."""
+
+
+def _change(row):
+    seq, op, member_id, changed, old, at = row
+    return Change(seq, op, member_id, tuple(changed.split(",")) if changed else (),
+                  json.loads(old) if old else None, at)
+
+
+def latest_seq(conn) -> int:
+    """The newest sequence number handed out (0 on an empty log)."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
+
+
+def changes_since(conn, seq, limit=CHANGE_FEED_LIMIT):
+    """Up to ``limit`` records after sequence ``seq``, oldest first.
+
+    Raises ChangeLogGap when records after ``seq`` may have been compacted
+    away, or when ``seq`` is ahead of the log (say, after a restore).
+    """
+    horizon = conn.execute("SELECT seq FROM change_log_horizon").fetchone()[0]
+    if seq < horizon or seq > latest_seq(conn):
+        raise ChangeLogGap(f"The change log no longer covers sequence {seq}.")
+    return [_change(row) for row in conn.execute("""
+        SELECT seq, op, member_id, changed, old, at FROM change_log
+        WHERE seq > ? ORDER BY seq LIMIT ?
+    """, (seq, limit))]
+
+
+def member_changes(conn, member_id):
+    """Every record kept for one member, newest first (its audit trail)."""
+    return [_change(row) for row in conn.execute("""
+        SELECT seq, op, member_id, changed, old, at FROM change_log
+        WHERE member_id = ? ORDER BY seq DESC
+    """, (member_id,))]
+
+
+def deleted_members(conn, limit=100):
+    """Delete records of members that are still gone, newest first."""
+    return [_change(row) for row in conn.execute("""
+        SELECT seq, op, member_id, changed, old, at FROM change_log l
+        WHERE op = 'delete' AND NOT EXISTS (SELECT 1 FROM customers c WHERE c.id = l.member_id)
+        ORDER BY seq DESC LIMIT ?
+    """, (limit,))]
+
+
+def compact_change_log(conn, days=CHANGE_LOG_COMPACT_DAYS) -> int:
+    """Drop records older than ``days`` that a later record for the same
+    member supersedes; returns how many were removed.
+
+    Moves the horizon (see ``changes_since``) up to the highest sequence
+    removed. Must not be called inside an open transaction.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS compacted (seq INTEGER PRIMARY KEY)
+        """)
+        conn.execute("DELETE FROM temp.compacted")
+        conn.execute("""
+            INSERT INTO temp.compacted (seq)
+            SELECT seq FROM change_log l
+            WHERE at < datetime('now', ?) AND EXISTS (
+                SELECT 1 FROM change_log n WHERE n.member_id = l.member_id AND n.seq > l.seq)
+        """, (f"-{int(days)} days",))
+        removed = conn.execute("DELETE FROM change_log WHERE seq IN (SELECT seq FROM temp.compacted)").rowcount
+        conn.execute("""
+            UPDATE change_log_horizon SET seq = max(seq, (SELECT coalesce(max(seq), 0) FROM temp.compacted))
+        """)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return removed
@@ -0,0 +1,98 @@
+"""Shared SQLite connection management."""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from gym_core.profiling import ProfiledConnection
+
+DB_FOLDER = os.path.join(os.path.expanduser("~"), "MuscleToneFitness")
+DB_NAME = os.path.join(DB_FOLDER, "gym_data.db")
+
+# Connection tuning
+CACHE_SIZE_KB = 16 * 1024          # page cache per connection
+MMAP_SIZE = 256 * 1024 * 1024      # memory-mapped I/O window
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256         # prepared statements kept per connection
+
+
+def _apply_pragmas(conn, readonly=False):
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    if not readonly:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+
+class ConnectionManager:
+    """Owns one long-lived read/write connection and hands out read-only ones.
+
+    The main connection is opened lazily and reused for the life of the
+    process, so prepared statements stay in its statement cache. Writes are
+    serialized through ``transaction()``; background workers should use
+    ``reader()`` so they never contend with the writer for the same handle.
+    Every connection reports its statements to ``profiling.profiler``.
+    """
+
+    def __init__(self, path=DB_NAME):
+        self.path = path
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _connect(self, readonly=False):
+        if readonly:
+            uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE, factory=ProfiledConnection)
+        else:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE, factory=ProfiledConnection)
+        _apply_pragmas(conn, readonly)
+        return conn
+
+    @property
+    def connection(self):
+        """The shared read/write connection, opened on first use."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            return self._conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes on the shared connection and commit it."""
+        with self._lock:
+            conn = self.connection
+            with conn:
+                yield conn
+
+    def reader(self):
+        """Open a new read-only connection for use on a worker thread."""
+        # Make sure the database (and its WAL files) exist before a reader
+        # tries to open it in read-only mode.
+        self.connection
+        return self._connect(readonly=True)
+
+    def writer(self):
+        """Open a separate read/write connection for a long background job.
+
+        SQLite still allows one writer at a time; a job that commits in
+        small batches lets ``transaction()`` callers in between.
+        """
+        return self._connect()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+db = ConnectionManager()
@@ -0,0 +1,81 @@
+"""Streaming CSV export of the member table."""
+
+import csv
+import os
+
+from gym_core.migrations import day_number_sql
+from gym_core.search import _where, search_filter, status_filter
+from gym_core.validation import MEMBER_FIELDS, ValidationError, validate_date
+
+# Raw stored columns, written with their column names as the header so an
+# export can be read back in unchanged.
+EXPORT_COLUMNS = ("id",) + MEMBER_FIELDS + ("created_at",)
+EXPORT_CHUNK_SIZE = 5000
+
+
+class ExportCancelled(Exception):
+    """The export was cancelled before it finished; no file was written."""
+
+
+def export_filter(conn, term="", status=None, date_from=None, date_to=None):
+    """WHERE clause and parameters for an export.
+
+    ``date_from``/``date_to`` (YYYY-MM-DD, either may be blank) keep the
+    members whose membership overlaps that range.
+    """
+    conditions = [status_filter(status)]
+    search_sql, params = search_filter(conn, term or "")
+    conditions.append(search_sql)
+    for name, value, condition in (("date_from", date_from, "end_day >= {day}"),
+                                   ("date_to", date_to, "start_day <= {day}")):
+        value = (value or "").strip()
+        if not value:
+            continue
+        if not validate_date(value):
+            raise ValidationError("Dates must be in YYYY-MM-DD format.")
+        conditions.append(condition.format(day=day_number_sql(f":{name}")))
+        params[name] = value
+    return _where(*conditions), params
+
+
+def count_export(conn, term="", status=None, date_from=None, date_to=None) -> int:
+    where, params = export_filter(conn, term, status, date_from, date_to)
+    return conn.execute(f"SELECT COUNT(*) FROM customers {where}", params).fetchone()[0]
+
+
+def export_members(conn, path, term="", status=None, date_from=None, date_to=None,
+                   progress=None, cancel=None, chunk_size=EXPORT_CHUNK_SIZE) -> int:
+    """Stream matching members to a CSV file at ``path``; returns the row count.
+
+    Rows are fetched ``chunk_size`` at a time in id order, so memory stays
+    flat however large the table is. ``progress(written, total)`` is called
+    after each chunk. If the ``cancel`` event is set, the partial file is
+    removed and ``ExportCancelled`` is raised. The file only appears at
+    ``path`` once it is complete.
+    """
+    where, params = export_filter(conn, term, status, date_from, date_to)
+    total = count_export(conn, term, status, date_from, date_to) if progress else 0
+    partial = path + ".part"
+    written = 0
+    try:
+        with open(partial, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            cur = conn.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM customers {where} ORDER BY id", params)
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                written += len(rows)
+                if progress:
+                    progress(written, total)
+            cur.close()
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return written
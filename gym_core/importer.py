@@ -0,0 +1,233 @@
+"""Bulk CSV import with upserts on normalized phone and email."""
+
+import csv
+import os
+from collections import namedtuple
+
+from gym_core.migrations import (
+    EMAIL_KEY_SQL,
+    PHONE_KEY_SQL,
+    apply_summary_delta,
+    derived_triggers,
+    index_search_rows,
+    normalize_email,
+    normalize_phone,
+    record_plans,
+)
+from gym_core.search import has_search_index
+from gym_core.validation import MEMBER_FIELDS, ValidationError, clean_member
+
+IMPORT_BATCH_SIZE = 5000
+# Keys per lookup statement, well under SQLite's bound-parameter limit
+LOOKUP_CHUNK = 500
+
+# Header spellings accepted besides the column names themselves, so both
+# exports and the old "Start Date"/"Payment" style sheets can be read. The
+# old sheets' "Status" column ("Active (12d left)", "Expired") was computed
+# from the dates and is ignored, not read as the payment status.
+HEADER_ALIASES = {
+    "start": "start_date",
+    "end": "end_date",
+    "type": "membership_type",
+    "membership": "membership_type",
+    "payment": "payment_status",
+    "fee": "amount",
+}
+# Old sheets wrote amounts as shown in the member list ("Rs2500.00")
+CURRENCY_PREFIX = "Rs"
+REQUIRED_COLUMNS = ("name", "start_date", "end_date")
+
+ImportResult = namedtuple("ImportResult", "inserted updated rejected cancelled")
+
+
+def map_header(header):
+    """Member field for each CSV column, or None for columns to ignore."""
+    fields = []
+    for title in header:
+        key = title.strip().lower().replace(" ", "_")
+        key = HEADER_ALIASES.get(key, key)
+        fields.append(key if key in MEMBER_FIELDS else None)
+    missing = [name for name in REQUIRED_COLUMNS if name not in fields]
+    if missing:
+        raise ValidationError(f"CSV is missing required column(s): {', '.join(missing)}.")
+    return fields
+
+
+def _row_fields(fields, values):
+    member = {name: value for name, value in zip(fields, values) if name}
+    amount = member.get("amount")
+    if amount:
+        member["amount"] = amount.replace(CURRENCY_PREFIX, "")
+    return member
+
+
+def _lookup(conn, key_sql, keys):
+    """Existing member id for each normalized key (the newest one on ties)."""
+    found = {}
+    keys = [k for k in keys if k]
+    for i in range(0, len(keys), LOOKUP_CHUNK):
+        chunk = keys[i:i + LOOKUP_CHUNK]
+        cur = conn.execute(f"""SELECT {key_sql}, id FROM customers
+            WHERE {key_sql} IN ({", ".join("?" * len(chunk))}) ORDER BY id""", chunk)
+        found.update(cur)
+    return found
+
+
+def upsert_batch(conn, members, columns):
+    """Insert or update a batch of cleaned members; returns (inserted, updated).
+
+    A member matching an existing row on normalized phone, or else email,
+    updates that row's ``columns``. Rows repeating a key earlier in the same
+    batch replace that earlier row, so the last one in the file wins. Changed
+    plans are appended to plan_history. Must run inside the caller's write
+    transaction.
+    """
+    phone_ids = _lookup(conn, PHONE_KEY_SQL, {normalize_phone(m["phone"]) for m in members})
+    email_ids = _lookup(conn, EMAIL_KEY_SQL, {normalize_email(m["email"]) for m in members})
+
+    updates = {}
+    inserts = []
+    pending_phone, pending_email = {}, {}
+    replaced = 0
+    for member in members:
+        phone, email = normalize_phone(member["phone"]), normalize_email(member["email"])
+        member_id = phone_ids.get(phone) if phone else None
+        if member_id is None and email:
+            member_id = email_ids.get(email)
+        if member_id is not None:
+            replaced += member_id in updates
+            updates[member_id] = member
+            continue
+        slot = pending_phone.get(phone) if phone else None
+        if slot is None and email:
+            slot = pending_email.get(email)
+        if slot is None:
+            slot = len(inserts)
+            inserts.append(member)
+        else:
+            inserts[slot] = member
+            replaced += 1
+        if phone:
+            pending_phone[phone] = slot
+        if email:
+            pending_email[email] = slot
+
+    # Row-level triggers would re-tokenize and re-aggregate one row at a
+    # time; drop them for this transaction and update the search index and
+    # member_summary once for the whole batch instead.
+    triggers = derived_triggers(conn)
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    search = has_search_index(conn) and any(name.startswith("customers_fts_") for name, _ in triggers)
+    summary = any(name.startswith("member_summary_") for name, _ in triggers)
+
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS import_ids (id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.import_ids")
+    conn.executemany("INSERT INTO temp.import_ids (id) VALUES (?)", ((member_id,) for member_id in updates))
+    touched = "id IN (SELECT id FROM temp.import_ids)"
+    if updates:
+        if search:
+            index_search_rows(conn, touched, remove=True)
+        if summary:
+            apply_summary_delta(conn, touched, "-")
+        conn.executemany(
+            f"UPDATE customers SET {', '.join(f'{name}=?' for name in columns)} WHERE id=?",
+            ([m[name] for name in columns] + [member_id] for member_id, m in updates.items()))
+    last_id = conn.execute("SELECT coalesce(max(id), 0) FROM customers").fetchone()[0]
+    if inserts:
+        conn.executemany(
+            f"INSERT INTO customers ({', '.join(MEMBER_FIELDS)}) VALUES ({', '.join('?' * len(MEMBER_FIELDS))})",
+            ([m[name] for name in MEMBER_FIELDS] for m in inserts))
+    written = f"(id > {int(last_id)} OR {touched})"
+    if search:
+        index_search_rows(conn, written)
+    if summary:
+        apply_summary_delta(conn, written)
+    record_plans(conn, written)
+
+    for _, sql in triggers:
+        conn.execute(sql)
+    return len(inserts), len(updates) + replaced
+
+
+def _write_batch(conn, members, columns):
+    # One IMMEDIATE transaction per batch, so the trigger swap in
+    # upsert_batch is never visible to other connections.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        counts = upsert_batch(conn, members, columns)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return counts
+
+
+def rejects_path(path):
+    root, _ = os.path.splitext(path)
+    return root + ".rejects.csv"
+
+
+def _counting_lines(f, counter):
+    for line in f:
+        counter[0] += len(line)
+        yield line
+
+
+def import_members(conn, path, rejects=None, progress=None, cancel=None, batch_size=IMPORT_BATCH_SIZE):
+    """Stream members from the CSV at ``path`` into the database.
+
+    Rows are validated with the same rules as the member form; invalid ones
+    are written with a reason to ``rejects`` (default ``<name>.rejects.csv``,
+    only created when needed). Each batch commits on its own, so a cancelled
+    import (``cancel`` event set) keeps the batches already written.
+    ``progress(done, total)`` reports characters read against the file size.
+    """
+    rejects = rejects or rejects_path(path)
+    total = os.path.getsize(path)
+    read = [0]
+    inserted = updated = rejected = 0
+    reject_file = reject_writer = None
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(_counting_lines(f, read))
+            header = next(reader, None)
+            if header is None:
+                raise ValidationError("CSV file is empty.")
+            fields = map_header(header)
+            columns = [name for name in MEMBER_FIELDS if name in fields]
+
+            batch = []
+            for row, values in enumerate(reader, start=2):
+                if not any(v.strip() for v in values):
+                    continue
+                try:
+                    member = clean_member(_row_fields(fields, values))
+                except ValidationError as e:
+                    if reject_writer is None:
+                        reject_file = open(rejects, "w", newline="", encoding="utf-8")
+                        reject_writer = csv.writer(reject_file)
+                        reject_writer.writerow(["row"] + header + ["reason"])
+                    reject_writer.writerow([row] + values + [str(e)])
+                    rejected += 1
+                    continue
+                batch.append(member)
+                if len(batch) >= batch_size:
+                    if cancel is not None and cancel.is_set():
+                        return ImportResult(inserted, updated, rejected, True)
+                    added, changed = _write_batch(conn, batch, columns)
+                    inserted, updated = inserted + added, updated + changed
+                    batch = []
+                    if progress:
+                        progress(read[0], total)
+            if batch:
+                if cancel is not None and cancel.is_set():
+                    return ImportResult(inserted, updated, rejected, True)
+                added, changed = _write_batch(conn, batch, columns)
+                inserted, updated = inserted + added, updated + changed
+            if progress:
+                progress(total, total)
+    finally:
+        if reject_file is not None:
+            reject_file.close()
+    return ImportResult(inserted, updated, rejected, False)
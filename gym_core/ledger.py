@@ -0,0 +1,48 @@
+"""Plan history and revenue reports, read from the ledger and its rollups."""
+
+from gym_core.migrations import PLAN_HISTORY_FIELDS
+from gym_core.validation import ValidationError, validate_date
+
+# period -> (rollup table, length of its bucket key)
+REVENUE_PERIODS = {"day": ("revenue_daily", 10), "month": ("revenue_monthly", 7)}
+REVENUE_DIMENSIONS = ("membership_type", "trainer")
+
+HISTORY_COLUMNS = ("id", "event", "reverses", "paid_on") + PLAN_HISTORY_FIELDS + ("recorded_at",)
+
+
+def member_history(conn, member_id):
+    """A member's plan_history entries, newest first."""
+    return conn.execute(f"""
+        SELECT {", ".join(HISTORY_COLUMNS)} FROM plan_history
+        WHERE member_id = ? ORDER BY id DESC
+    """, (member_id,)).fetchall()
+
+
+def revenue(conn, period="month", date_from=None, date_to=None, by=()):
+    """Revenue per ``period`` bucket, optionally split by REVENUE_DIMENSIONS.
+
+    Returns ``(bucket, *by, entries, amount, paid)`` rows in bucket order,
+    read from the rollup table alone, so the cost depends on the number of
+    buckets rather than on the number of plans ever sold. ``date_from`` and
+    ``date_to`` (YYYY-MM-DD, inclusive) select the buckets they fall in.
+    """
+    if period not in REVENUE_PERIODS:
+        raise ValidationError(f"Unknown revenue period: {period}.")
+    unknown = [name for name in by if name not in REVENUE_DIMENSIONS]
+    if unknown:
+        raise ValidationError(f"Can't split revenue by: {', '.join(unknown)}.")
+    table, width = REVENUE_PERIODS[period]
+    conditions, params = [], []
+    for value, op, label in ((date_from, ">=", "From"), (date_to, "<=", "To")):
+        if value:
+            if not validate_date(value):
+                raise ValidationError(f"{label} date must be YYYY-MM-DD.")
+            conditions.append(f"bucket {op} ?")
+            params.append(value[:width])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    group = ", ".join(("bucket",) + tuple(by))
+    return conn.execute(f"""
+        SELECT {group}, SUM(entries), SUM(amount), SUM(paid) FROM {table}
+        {where} GROUP BY {group} HAVING SUM(entries) != 0 OR SUM(amount) != 0
+        ORDER BY {group}
+    """, params).fetchall()
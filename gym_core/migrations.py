@@ -0,0 +1,510 @@
+"""Versioned schema migrations keyed on ``PRAGMA user_version``.
+
+Each step runs once, inside its own transaction, and bumps
+``user_version`` before committing. Append new steps to ``MIGRATIONS``;
+never edit a step that has already shipped.
+"""
+
+import sqlite3
+
+# Normalized lookup keys for phone and email. Queries that want to use the
+# expression indexes below must spell the expression exactly the same way.
+PHONE_KEY_SQL = "replace(replace(replace(replace(phone, '-', ''), ' ', ''), '(', ''), ')', '')"
+EMAIL_KEY_SQL = "lower(trim(email))"
+
+
+def normalize_phone(phone: str) -> str:
+    return phone.replace("-", "").replace(" ", "").replace("(", "").replace(")", "") if phone else ""
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower() if email else ""
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _create_customers(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT,
+            email TEXT,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            membership_type TEXT,
+            payment_status TEXT,
+            trainer TEXT,
+            amount REAL DEFAULT 0,
+            notes TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Databases created before the amount column existed
+    if "amount" not in _columns(conn, "customers"):
+        conn.execute("ALTER TABLE customers ADD COLUMN amount REAL DEFAULT 0")
+
+
+def _add_filter_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_end_date ON customers(end_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_payment_status ON customers(payment_status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_trainer ON customers(trainer)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_membership_type ON customers(membership_type)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_customers_phone_key ON customers({PHONE_KEY_SQL})")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_customers_email_key ON customers({EMAIL_KEY_SQL})")
+
+
+# Triggers keeping customers_fts and member_summary in step with customers.
+# Bulk writers may drop them for a batch and maintain both tables set-wise.
+DERIVED_TRIGGER_PREFIXES = ("customers_fts_", "member_summary_")
+
+
+def derived_triggers(conn):
+    """(name, sql) of the DERIVED_TRIGGER_PREFIXES triggers that exist."""
+    return [(name, sql) for name, sql in conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type='trigger' AND tbl_name='customers'")
+        if name.startswith(DERIVED_TRIGGER_PREFIXES)]
+
+
+SEARCH_FIELDS = ("name", "phone", "email", "membership_type", "payment_status", "trainer", "notes")
+
+
+def _create_search_index(conn):
+    cols = ", ".join(SEARCH_FIELDS)
+    new_cols = ", ".join(f"new.{c}" for c in SEARCH_FIELDS)
+    old_cols = ", ".join(f"old.{c}" for c in SEARCH_FIELDS)
+    try:
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE customers_fts USING fts5(
+                {cols}, content='customers', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5 or older than 3.34 (no trigram
+        # tokenizer); search falls back to LIKE scans.
+        return
+    conn.execute(f"""
+        CREATE TRIGGER customers_fts_ai AFTER INSERT ON customers BEGIN
+            INSERT INTO customers_fts(rowid, {cols}) VALUES (new.id, {new_cols});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER customers_fts_ad AFTER DELETE ON customers BEGIN
+            INSERT INTO customers_fts(customers_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER customers_fts_au AFTER UPDATE OF {cols} ON customers BEGIN
+            INSERT INTO customers_fts(customers_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO customers_fts(rowid, {cols}) VALUES (new.id, {new_cols});
+        END
+    """)
+    conn.execute("INSERT INTO customers_fts(customers_fts) VALUES ('rebuild')")
+
+
+def index_search_rows(conn, where, remove=False):
+    """Add the customers rows matching ``where`` to customers_fts, or remove them."""
+    cols = ", ".join(SEARCH_FIELDS)
+    if remove:
+        conn.execute(f"""INSERT INTO customers_fts(customers_fts, rowid, {cols})
+            SELECT 'delete', id, {cols} FROM customers WHERE {where}""")
+    else:
+        conn.execute(f"INSERT INTO customers_fts(rowid, {cols}) SELECT id, {cols} FROM customers WHERE {where}")
+
+
+# (dimension, column) pairs rolled up into member_summary; the "all"
+# dimension has a single row holding the overall count and amount.
+SUMMARY_DIMENSIONS = (("all", None), ("payment_status", "payment_status"), ("membership_type", "membership_type"))
+
+
+def _summary_upserts(row, sign):
+    statements = []
+    for dimension, column in SUMMARY_DIMENSIONS:
+        value = f"coalesce({row}.{column}, '')" if column else "''"
+        statements.append(f"""
+            INSERT INTO member_summary (dimension, value, members, amount)
+            VALUES ('{dimension}', {value}, {sign}1, {sign}coalesce({row}.amount, 0))
+            ON CONFLICT (dimension, value) DO UPDATE SET
+                members = members + excluded.members, amount = amount + excluded.amount;""")
+    return "".join(statements)
+
+
+def apply_summary_delta(conn, where="1", sign=""):
+    """Add (sign "") or subtract (sign "-") the customers matching ``where``."""
+    for dimension, column in SUMMARY_DIMENSIONS:
+        value = f"coalesce({column}, '')" if column else "''"
+        conn.execute(f"""
+            INSERT INTO member_summary (dimension, value, members, amount)
+            SELECT '{dimension}', {value}, {sign}COUNT(*), {sign}coalesce(SUM(amount), 0)
+            FROM customers WHERE {where} GROUP BY 2
+            ON CONFLICT (dimension, value) DO UPDATE SET
+                members = members + excluded.members, amount = amount + excluded.amount
+        """)
+
+
+def rebuild_member_summary(conn):
+    """Recompute member_summary from scratch, e.g. after a bulk load."""
+    conn.execute("DELETE FROM member_summary")
+    apply_summary_delta(conn)
+
+
+def _create_member_summary(conn):
+    conn.execute("""
+        CREATE TABLE member_summary (
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            members INTEGER NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value)
+        ) WITHOUT ROWID
+    """)
+    rebuild_member_summary(conn)
+    conn.execute(f"""
+        CREATE TRIGGER member_summary_ai AFTER INSERT ON customers BEGIN
+            {_summary_upserts("new", "")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER member_summary_ad AFTER DELETE ON customers BEGIN
+            {_summary_upserts("old", "-")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER member_summary_au AFTER UPDATE OF payment_status, membership_type, amount ON customers BEGIN
+            {_summary_upserts("old", "-")}
+            {_summary_upserts("new", "")}
+        END
+    """)
+
+
+def day_number_sql(column):
+    """Days since 1970-01-01 for an ISO date column; NULL if it won't parse."""
+    return f"CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+
+def _add_day_columns(conn):
+    conn.execute(f"""ALTER TABLE customers ADD COLUMN start_day INTEGER
+        GENERATED ALWAYS AS ({day_number_sql("start_date")}) VIRTUAL""")
+    conn.execute(f"""ALTER TABLE customers ADD COLUMN end_day INTEGER
+        GENERATED ALWAYS AS ({day_number_sql("end_date")}) VIRTUAL""")
+    conn.execute("CREATE INDEX idx_customers_end_day ON customers(end_day)")
+
+
+def _create_reminder_outbox(conn):
+    # One row per member, reminder kind and membership end date, so a
+    # renewal (new end date) earns fresh reminders but a rescan never
+    # queues the same one twice.
+    conn.execute("""
+        CREATE TABLE reminder_outbox (
+            id INTEGER PRIMARY KEY,
+            member_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            queued_on TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            sent_at TEXT,
+            UNIQUE (member_id, kind, end_date)
+        )
+    """)
+    conn.execute("CREATE INDEX idx_reminder_outbox_pending ON reminder_outbox(id) WHERE status = 'pending'")
+    conn.execute("CREATE TABLE reminder_scans (day TEXT PRIMARY KEY, queued INTEGER NOT NULL)")
+
+
+# Plan fields copied into plan_history; an entry is written whenever a
+# member's current values stop matching their latest entry.
+PLAN_HISTORY_FIELDS = ("start_date", "end_date", "membership_type", "payment_status", "trainer", "amount")
+# (rollup table, bucket expression over plan_history.paid_on)
+REVENUE_ROLLUPS = (("revenue_daily", "paid_on"), ("revenue_monthly", "substr(paid_on, 1, 7)"))
+
+
+def roll_up_revenue(conn, after_id=0):
+    """Add plan_history entries with id > ``after_id`` to the revenue rollups."""
+    # NOT INDEXED keeps this a rowid range read; otherwise the planner may
+    # walk the whole paid_on index to save sorting the GROUP BY.
+    for table, bucket in REVENUE_ROLLUPS:
+        conn.execute(f"""
+            INSERT INTO {table} (bucket, membership_type, trainer, entries, amount, paid)
+            SELECT {bucket}, coalesce(membership_type, ''), coalesce(trainer, ''),
+                SUM(CASE WHEN reverses IS NULL THEN 1 ELSE -1 END),
+                coalesce(SUM(amount), 0),
+                coalesce(SUM(CASE WHEN payment_status = 'Paid' THEN amount END), 0)
+            FROM plan_history NOT INDEXED WHERE id > ? GROUP BY 1, 2, 3
+            ON CONFLICT (bucket, membership_type, trainer) DO UPDATE SET
+                entries = entries + excluded.entries, amount = amount + excluded.amount,
+                paid = paid + excluded.paid
+        """, (after_id,))
+
+
+def record_plans(conn, where="1", renewal=False) -> int:
+    """Append plan_history entries for the customers matching ``where``.
+
+    Members whose plan matches their latest entry are skipped. A member's
+    first entry is a "join"; a plan starting on or after the latest entry's
+    end date (or any plan, with ``renewal``) is a "renewal" that adds to
+    it; anything else is a "change", written as a reversal of the latest
+    entry followed by the new one. Entries count as revenue on ``paid_on``,
+    the plan's start date, and are rolled up here. Returns the number of
+    new plan entries; must run inside the caller's transaction.
+    """
+    mark = conn.execute("SELECT coalesce(max(id), 0) FROM plan_history").fetchone()[0]
+    fields = ", ".join(PLAN_HISTORY_FIELDS)
+    same_plan = " AND ".join(f"h.{name} IS c.{name}" for name in PLAN_HISTORY_FIELDS)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS plan_changes "
+                 "(member_id INTEGER PRIMARY KEY, latest INTEGER, event TEXT NOT NULL)")
+    conn.execute("DELETE FROM temp.plan_changes")
+    conn.execute(f"""
+        INSERT INTO temp.plan_changes (member_id, latest, event)
+        SELECT c.id, h.id, CASE WHEN h.id IS NULL THEN 'join'
+                                WHEN :renewal OR c.start_date >= h.end_date THEN 'renewal'
+                                ELSE 'change' END
+        FROM (SELECT id AS member_id,
+                     (SELECT max(id) FROM plan_history WHERE member_id = customers.id) AS latest
+              FROM customers WHERE {where}) s
+        JOIN customers c ON c.id = s.member_id
+        LEFT JOIN plan_history h ON h.id = s.latest
+        WHERE h.id IS NULL OR NOT ({same_plan})
+    """, {"renewal": bool(renewal)})
+    conn.execute(f"""
+        INSERT INTO plan_history (member_id, event, reverses, paid_on, {fields})
+        SELECT h.member_id, 'reversal', h.id, h.paid_on, {", ".join(f"h.{name}" for name in PLAN_HISTORY_FIELDS[:-1])}, -h.amount
+        FROM temp.plan_changes p JOIN plan_history h ON h.id = p.latest
+        WHERE p.event = 'change'
+    """)
+    cur = conn.execute(f"""
+        INSERT INTO plan_history (member_id, event, paid_on, {fields})
+        SELECT c.id, p.event, c.start_date, {", ".join(f"c.{name}" for name in PLAN_HISTORY_FIELDS)}
+        FROM temp.plan_changes p JOIN customers c ON c.id = p.member_id
+    """)
+    added = cur.rowcount
+    roll_up_revenue(conn, mark)
+    return added
+
+
+def _create_plan_history(conn):
+    # Append-only: corrections are new rows (a reversal plus the new plan),
+    # so revenue for any past period can always be reproduced.
+    conn.execute("""
+        CREATE TABLE plan_history (
+            id INTEGER PRIMARY KEY,
+            member_id INTEGER NOT NULL,
+            event TEXT NOT NULL,
+            reverses INTEGER,
+            paid_on TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            membership_type TEXT,
+            payment_status TEXT,
+            trainer TEXT,
+            amount REAL,
+            recorded_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX idx_plan_history_member ON plan_history(member_id, id)")
+    conn.execute("CREATE INDEX idx_plan_history_paid_on ON plan_history(paid_on)")
+    conn.execute("""
+        CREATE TRIGGER plan_history_append_only BEFORE UPDATE ON plan_history BEGIN
+            SELECT RAISE(ABORT, 'plan_history is append-only');
+        END
+    """)
+    for table, _ in REVENUE_ROLLUPS:
+        conn.execute(f"""
+            CREATE TABLE {table} (
+                bucket TEXT NOT NULL,
+                membership_type TEXT NOT NULL,
+                trainer TEXT NOT NULL,
+                entries INTEGER NOT NULL DEFAULT 0,
+                amount REAL NOT NULL DEFAULT 0,
+                paid REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket, membership_type, trainer)
+            ) WITHOUT ROWID
+        """)
+    # Every existing member's current plan becomes their joining entry
+    record_plans(conn)
+
+
+def _create_attendance(conn):
+    # The raw check-in log is only appended to; visit counts and the
+    # hour-of-day heatmap are read from the rollup tables beside it.
+    conn.execute("""
+        CREATE TABLE attendance (
+            id INTEGER PRIMARY KEY,
+            member_id INTEGER NOT NULL,
+            checked_in_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX idx_attendance_member ON attendance(member_id, checked_in_at)")
+    conn.execute("CREATE INDEX idx_attendance_checked_in_at ON attendance(checked_in_at)")
+    conn.execute("""
+        CREATE TABLE attendance_members (
+            member_id INTEGER PRIMARY KEY,
+            visits INTEGER NOT NULL DEFAULT 0,
+            first_visit TEXT,
+            last_visit TEXT
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_attendance_members_visits ON attendance_members(visits)")
+    conn.execute("""
+        CREATE TABLE attendance_hourly (
+            day TEXT NOT NULL,
+            hour INTEGER NOT NULL,
+            visits INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, hour)
+        ) WITHOUT ROWID
+    """)
+
+
+# customers columns whose old values the change log keeps
+CHANGE_LOG_FIELDS = ("name", "phone", "email", "start_date", "end_date",
+                     "membership_type", "payment_status", "trainer", "amount", "notes")
+
+
+def _create_change_log(conn):
+    # AUTOINCREMENT so a sequence number is never handed out twice, even
+    # once the records holding the highest ones have been deleted.
+    conn.execute("""
+        CREATE TABLE change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL,
+            member_id INTEGER NOT NULL,
+            changed TEXT,
+            old TEXT,
+            at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX idx_change_log_member ON change_log(member_id, seq)")
+    conn.execute("CREATE INDEX idx_change_log_at ON change_log(at)")
+    # Highest sequence number compaction has removed records up to
+    conn.execute("CREATE TABLE change_log_horizon (seq INTEGER NOT NULL)")
+    conn.execute("INSERT INTO change_log_horizon (seq) VALUES (0)")
+    differs = [f"old.{name} IS NOT new.{name}" for name in CHANGE_LOG_FIELDS]
+    changed = " || ".join(f"CASE WHEN {test} THEN ',{name}' ELSE '' END"
+                          for test, name in zip(differs, CHANGE_LOG_FIELDS))
+    # Old values of the changed columns only: unchanged ones are set under
+    # a scratch key that is removed again.
+    old_values = ", ".join(f"CASE WHEN {test} THEN '$.{name}' ELSE '$._' END, old.{name}"
+                           for test, name in zip(differs, CHANGE_LOG_FIELDS))
+    conn.execute("""
+        CREATE TRIGGER change_log_ai AFTER INSERT ON customers BEGIN
+            INSERT INTO change_log (op, member_id) VALUES ('insert', new.id);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER change_log_au AFTER UPDATE ON customers WHEN {" OR ".join(differs)} BEGIN
+            INSERT INTO change_log (op, member_id, changed, old)
+            VALUES ('update', new.id, substr({changed}, 2), json_remove(json_set('{{}}', {old_values}), '$._'));
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER change_log_ad AFTER DELETE ON customers BEGIN
+            INSERT INTO change_log (op, member_id, old)
+            VALUES ('delete', old.id, json_object({", ".join(f"'{name}', old.{name}" for name in CHANGE_LOG_FIELDS)}));
+        END
+    """)
+
+
+# customers columns carried between branches by gym_core.sync
+SYNC_FIELDS = CHANGE_LOG_FIELDS
+
+
+def _create_sync_state(conn):
+    # This database's branch name and Lamport clock. ``applying`` is set
+    # while a merge writes customers, so the triggers below leave the
+    # incoming versions alone.
+    conn.execute("""
+        CREATE TABLE sync_branch (
+            branch TEXT NOT NULL,
+            clock INTEGER NOT NULL DEFAULT 0,
+            applying INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT INTO sync_branch (branch, clock) VALUES (lower(hex(randomblob(4))), 1)")
+    # One row per member ever known here, keyed by a uid that is the same
+    # in every branch; deleted members stay as tombstones.
+    conn.execute("""
+        CREATE TABLE sync_rows (
+            uid TEXT PRIMARY KEY,
+            member_id INTEGER,
+            version INTEGER NOT NULL,
+            origin TEXT NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_sync_rows_member ON sync_rows(member_id)")
+    conn.execute("""
+        CREATE TABLE sync_peers (
+            peer TEXT PRIMARY KEY,
+            sent_seq INTEGER NOT NULL DEFAULT 0,
+            received_at TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO sync_rows (uid, member_id, version, origin)
+        SELECT b.branch || '-' || lower(hex(randomblob(8))), c.id, b.clock, b.branch
+        FROM customers c, sync_branch b
+    """)
+    differs = " OR ".join(f"old.{name} IS NOT new.{name}" for name in SYNC_FIELDS)
+    applying = "(SELECT applying FROM sync_branch) = 0"
+    stamp = "version = (SELECT clock FROM sync_branch), origin = (SELECT branch FROM sync_branch)"
+    conn.execute(f"""
+        CREATE TRIGGER sync_rows_ai AFTER INSERT ON customers WHEN {applying} BEGIN
+            UPDATE sync_branch SET clock = clock + 1;
+            INSERT INTO sync_rows (uid, member_id, version, origin)
+            SELECT branch || '-' || lower(hex(randomblob(8))), new.id, clock, branch FROM sync_branch;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER sync_rows_au AFTER UPDATE ON customers WHEN {applying} AND ({differs}) BEGIN
+            UPDATE sync_branch SET clock = clock + 1;
+            UPDATE sync_rows SET {stamp} WHERE member_id = new.id AND NOT deleted;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER sync_rows_ad AFTER DELETE ON customers WHEN {applying} BEGIN
+            UPDATE sync_branch SET clock = clock + 1;
+            UPDATE sync_rows SET {stamp}, deleted = 1 WHERE member_id = old.id AND NOT deleted;
+        END
+    """)
+
+
+MIGRATIONS = [
+    (1, _create_customers),
+    (2, _add_filter_indexes),
+    (3, _create_search_index),
+    (4, _create_member_summary),
+    (5, _add_day_columns),
+    (6, _create_reminder_outbox),
+    (7, _create_plan_history),
+    (8, _create_attendance),
+    (9, _create_change_log),
+    (10, _create_sync_state),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=SCHEMA_VERSION):
+    """Apply every pending migration up to ``target``; return the new version."""
+    version = start = get_version(conn)
+    for step_version, step in MIGRATIONS:
+        if step_version <= version or step_version > target:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version={step_version}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        version = step_version
+    if version != start:
+        conn.execute("PRAGMA optimize")
+    return version
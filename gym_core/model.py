@@ -0,0 +1,150 @@
+"""Typed member records and a compact column store for lists of them."""
+
+import math
+import sys
+from array import array
+
+from gym_core.search import MEMBER_COLUMNS
+from gym_core.stats import EXPIRING_WINDOW_DAYS
+
+# Field order of a ``search.member_select`` row
+RECORD_FIELDS = MEMBER_COLUMNS + ("days_left", "notes")
+TEXT_FIELDS = tuple(f for f in RECORD_FIELDS if f not in ("id", "amount", "days_left"))
+_ID, _AMOUNT, _DAYS_LEFT = (RECORD_FIELDS.index(f) for f in ("id", "amount", "days_left"))
+_TEXT_POSITIONS = tuple(RECORD_FIELDS.index(f) for f in TEXT_FIELDS)
+# Few distinct values across many members: share one string per value
+SHARED_FIELDS = ("start_date", "end_date", "membership_type", "payment_status", "trainer")
+_SHARED = tuple(f in SHARED_FIELDS for f in TEXT_FIELDS)
+
+# days_left for an end date SQLite couldn't parse (NULL in SQL)
+NO_DAYS = -(2 ** 63)
+
+
+class Member:
+    """One member as listed: the stored fields plus ``days_left``."""
+
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, id, name, phone, email, start_date, end_date, membership_type,
+                 payment_status, trainer, amount, days_left=None, notes=""):
+        self.id = id
+        self.name = name
+        self.phone = phone
+        self.email = email
+        self.start_date = start_date
+        self.end_date = end_date
+        self.membership_type = membership_type
+        self.payment_status = payment_status
+        self.trainer = trainer
+        self.amount = amount
+        self.days_left = days_left
+        self.notes = notes
+
+    @property
+    def status(self):
+        """The member's STATUS_FILTERS key ("active", "expiring", "expired"), or None."""
+        if self.days_left is None:
+            return None
+        if self.days_left < 0:
+            return "expired"
+        if self.days_left <= EXPIRING_WINDOW_DAYS:
+            return "expiring"
+        return "active"
+
+    def as_tuple(self):
+        return tuple(getattr(self, name) for name in RECORD_FIELDS)
+
+    def as_dict(self):
+        return dict(zip(RECORD_FIELDS, self.as_tuple()))
+
+    def __eq__(self, other):
+        if not isinstance(other, Member):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Member(id={self.id!r}, name={self.name!r}, end_date={self.end_date!r})"
+
+
+def member_factory(cursor, row):
+    """``row_factory`` for cursors over ``member_select``."""
+    return Member(*row)
+
+
+def _float(value):
+    try:
+        return math.nan if value is None else float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class MemberTable:
+    """Member rows stored column by column.
+
+    Ids, amounts and days_left live in typed ``array``s and the text fields
+    in one list per column, so a large result holds no per-row tuple or
+    boxed number, and repeated dates, plans and statuses share one string.
+    Indexing builds a ``Member`` on demand.
+    """
+
+    __slots__ = ("ids", "amounts", "days_left", "_text")
+
+    def __init__(self, rows=()):
+        self.ids = array("q")
+        self.amounts = array("d")
+        self.days_left = array("q")
+        self._text = tuple([] for _ in TEXT_FIELDS)
+        self.extend(rows)
+
+    @classmethod
+    def from_cursor(cls, cur, chunk_size=1000):
+        """Fill a table from a cursor over plain ``member_select`` tuples."""
+        table = cls()
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return table
+            table.extend(rows)
+
+    def extend(self, rows):
+        """Append ``member_select`` tuples or Members."""
+        for row in rows:
+            if isinstance(row, Member):
+                row = row.as_tuple()
+            self.ids.append(row[_ID])
+            self.amounts.append(_float(row[_AMOUNT]))
+            self.days_left.append(NO_DAYS if row[_DAYS_LEFT] is None else row[_DAYS_LEFT])
+            for column, position, shared in zip(self._text, _TEXT_POSITIONS, _SHARED):
+                value = row[position]
+                column.append(sys.intern(value) if shared and type(value) is str else value)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        amount = self.amounts[index]
+        days_left = self.days_left[index]
+        text = {name: column[index] for name, column in zip(TEXT_FIELDS, self._text)}
+        return Member(id=self.ids[index], amount=None if math.isnan(amount) else amount,
+                      days_left=None if days_left == NO_DAYS else days_left, **text)
+
+    def __setitem__(self, index, member):
+        self.ids[index] = member.id
+        self.amounts[index] = _float(member.amount)
+        self.days_left[index] = NO_DAYS if member.days_left is None else member.days_left
+        for name, column in zip(TEXT_FIELDS, self._text):
+            column[index] = getattr(member, name)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def index(self, member_id):
+        """Position of ``member_id`` (ValueError if absent)."""
+        return self.ids.index(member_id)
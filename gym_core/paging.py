@@ -0,0 +1,195 @@
+"""Keyset pagination over the member list."""
+
+from array import array
+from collections import OrderedDict
+
+from gym_core.model import MemberTable
+from gym_core.search import matches_search, member_select, search_ids, status_filter
+
+PAGE_SIZE = 100
+MAX_CACHED_PAGES = 8
+
+
+def count_customers(conn, status=None) -> int:
+    condition = status_filter(status)
+    where = f"WHERE {condition}" if condition else ""
+    return conn.execute(f"SELECT COUNT(*) FROM customers {where}").fetchone()[0]
+
+
+class MemberPager:
+    """Random access to the (optionally filtered) member list, a page at a time.
+
+    The unfiltered list is walked with keyset pagination on ``id DESC``:
+    every page fetched records the last id it returned, so the next page is
+    a ``WHERE id < ?`` seek on the primary key. Jumping past the furthest
+    page seen so far seeks forward from the nearest known anchor. A search
+    resolves its matching ids once, in rank order, and pages are then read
+    by id. Only a handful of recently used pages are kept in memory, each
+    as a MemberTable; ``rows`` hands out Member records.
+
+    Every read takes the connection to use, so a pager built on a worker
+    thread can keep serving pages on the UI thread. Fetched rows are also
+    offered to ``cache`` (a MemberCache), if given.
+    """
+
+    def __init__(self, conn, term="", status=None, page_size=PAGE_SIZE, cache=None):
+        self.term = term.strip()
+        self.cache = cache
+        self.status = status
+        self.page_size = page_size
+        self._pages = OrderedDict()
+        self._anchors = {0: None}
+        # Extra keyset condition for a status filter (served by the end_day index)
+        condition = status_filter(status)
+        self._and_status = f"AND {condition}" if condition else ""
+        if self.term:
+            self._ids = array("q", search_ids(conn, self.term, status))
+            self.total = len(self._ids)
+        else:
+            self._ids = None
+            self.total = count_customers(conn, status)
+
+    def rows(self, conn, start, stop):
+        """Members at positions ``start`` (inclusive) to ``stop`` (exclusive)."""
+        start = max(start, 0)
+        stop = min(stop, self.total)
+        result = []
+        if start >= stop:
+            return result
+        first_page = start // self.page_size
+        last_page = (stop - 1) // self.page_size
+        for index in range(first_page, last_page + 1):
+            page = self._page(conn, index)
+            base = index * self.page_size
+            result.extend(page[max(start - base, 0):stop - base])
+        return result
+
+    def iter_rows(self, conn):
+        """Yield every member in order without filling the page cache."""
+        index = 0
+        while index * self.page_size < self.total:
+            page = self._pages.get(index)
+            if page is None:
+                page = self._query(conn, index)
+            if not page:
+                return
+            yield from page
+            index += 1
+
+    def apply_change(self, conn, op, member_id, row=None):
+        """Patch one inserted, updated or deleted member into the list.
+
+        ``op`` is "insert", "update" or "delete"; ``row`` is the member's
+        current Member record for inserts and updates. Only cached pages at or after
+        the member's position are dropped.
+        """
+        listed_now = op != "delete" and matches_search(conn, member_id, self.term, self.status)
+        if self._ids is not None:
+            listed_before = member_id in self._ids
+            if listed_before and not listed_now:
+                position = self._ids.index(member_id)
+                del self._ids[position]
+                self.total -= 1
+                self._forget_from(position)
+            elif listed_now and not listed_before:
+                # New matches go to the top, where the user will see them
+                self._ids.insert(0, member_id)
+                self.total += 1
+                self._forget_from(0)
+            elif listed_now:
+                self._replace(row)
+        elif self.status:
+            # Whether the member passed the status filter before the write
+            # isn't known here, so recount (an index range count).
+            self._forget_after(member_id)
+            self.total = count_customers(conn, self.status)
+        elif op == "insert":
+            self.total += 1
+            self._forget_after(member_id)
+        elif op == "delete":
+            self.total -= 1
+            self._forget_after(member_id)
+        else:
+            self._replace(row)
+
+    def _replace(self, member):
+        for page in self._pages.values():
+            if member.id in page.ids:
+                page[page.index(member.id)] = member
+                return
+
+    def _forget_from(self, position):
+        """Drop cached pages that hold ``position`` or anything after it."""
+        for index in [i for i in self._pages if (i + 1) * self.page_size > position]:
+            del self._pages[index]
+
+    def _forget_after(self, member_id):
+        """Drop cached pages and anchors whose position shifts when
+        ``member_id`` is added to or removed from the unfiltered list."""
+        for index in [i for i, page in self._pages.items()
+                      if len(page) < self.page_size or page.ids[-1] <= member_id]:
+            del self._pages[index]
+        self._anchors = {i: a for i, a in self._anchors.items() if a is None or a > member_id}
+
+    def _page(self, conn, index):
+        page = self._pages.get(index)
+        if page is not None:
+            self._pages.move_to_end(index)
+            return page
+        page = self._fetch(conn, index)
+        self._pages[index] = page
+        if len(self._pages) > MAX_CACHED_PAGES:
+            self._pages.popitem(last=False)
+        return page
+
+    def _fetch(self, conn, index):
+        if self.cache is None:
+            return self._query(conn, index)
+        epoch = self.cache.epoch
+        page = self._query(conn, index)
+        self.cache.put_many(page, epoch)
+        return page
+
+    def _query(self, conn, index):
+        select = member_select()
+        if self._ids is not None:
+            ids = self._ids[index * self.page_size:(index + 1) * self.page_size]
+            if not ids:
+                return MemberTable()
+            placeholders = ",".join("?" * len(ids))
+            by_id = {row[0]: row for row in conn.execute(
+                f"SELECT {select} FROM customers WHERE id IN ({placeholders})", tuple(ids))}
+            # Members deleted since the search ran are simply skipped
+            return MemberTable(by_id[i] for i in ids if i in by_id)
+
+        anchor = self._anchor(conn, index)
+        if anchor is None and index > 0:
+            return MemberTable()
+        if anchor is None:
+            cur = conn.execute(f"SELECT {select} FROM customers WHERE 1 {self._and_status} "
+                               f"ORDER BY id DESC LIMIT ?", (self.page_size,))
+        else:
+            cur = conn.execute(f"SELECT {select} FROM customers WHERE id < ? {self._and_status} "
+                               f"ORDER BY id DESC LIMIT ?", (anchor, self.page_size))
+        page = MemberTable(cur)
+        if len(page) == self.page_size:
+            self._anchors[index + 1] = page.ids[-1]
+        return page
+
+    def _anchor(self, conn, index):
+        """Exclusive upper id bound of page ``index`` (None for the first page)."""
+        if index in self._anchors:
+            return self._anchors[index]
+        known = max(i for i in self._anchors if i < index)
+        skip = (index - known) * self.page_size - 1
+        bound = self._anchors[known]
+        if bound is None:
+            row = conn.execute(f"SELECT id FROM customers WHERE 1 {self._and_status} "
+                               f"ORDER BY id DESC LIMIT 1 OFFSET ?", (skip,)).fetchone()
+        else:
+            row = conn.execute(f"SELECT id FROM customers WHERE id < ? {self._and_status} "
+                               f"ORDER BY id DESC LIMIT 1 OFFSET ?", (bound, skip)).fetchone()
+        if row is None:
+            return None
+        self._anchors[index] = row[0]
+        return row[0]
@@ -0,0 +1,363 @@
+"""Opt-in timing of database statements and UI work.
+
+``profiler`` (one per process, like ``db``) stays off unless the
+GYM_PROFILE environment variable is set or ``enable()`` is called. While
+it is off, ``span`` hands back a shared no-op context and connections go
+straight to sqlite3, so the hooks cost one attribute check per call.
+
+While it is on, every statement run on a ConnectionManager connection is
+timed from ``execute`` until its last row is fetched, and every named
+span (``profiler.span(name)`` or the ``timed`` decorator) adds to a
+latency histogram per name. Statements slower than ``slow_ms`` also go
+into a ring buffer together with their row count and ``EXPLAIN QUERY
+PLAN``. ``snapshot`` returns all of it as plain data for the Diagnostics
+tab and the API server; ``dump`` writes it to a JSON file.
+"""
+
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import deque, namedtuple
+from datetime import datetime
+from time import perf_counter
+
+PROFILE_ENV = "GYM_PROFILE"
+SLOW_QUERY_MS = 50
+SLOW_QUERY_LOG_SIZE = 200
+# Upper bounds of the histogram buckets; a last bucket takes anything slower
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+MAX_STATEMENT_NAMES = 2000
+
+# One histogram row; percentiles are bucket upper bounds (max_ms for the last)
+Timing = namedtuple("Timing", "kind name count total_ms mean_ms p50_ms p95_ms max_ms rows")
+SlowQuery = namedtuple("SlowQuery", "at sql ms rows plan thread")
+
+_PLACEHOLDER_RUN = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def statement_name(sql) -> str:
+    """``sql`` on one line, with runs of placeholders (``IN (?, ?, ?)``)
+    collapsed so that statements differing only in list length share a row."""
+    return _PLACEHOLDER_RUN.sub("?, ...", " ".join(sql.split()))
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "total", "max", "rows")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+    def add(self, ms, rows):
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS_MS) and ms > LATENCY_BUCKETS_MS[bucket]:
+            bucket += 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        if rows is not None and rows > 0:
+            self.rows += rows
+
+    def percentile(self, fraction):
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted and count:
+                return min(LATENCY_BUCKETS_MS[bucket], self.max) if bucket < len(LATENCY_BUCKETS_MS) else self.max
+        return self.max
+
+
+class _Span:
+    """Times one block; set ``rows`` inside it to record a row count."""
+
+    __slots__ = ("profiler", "kind", "name", "rows", "start")
+
+    def __init__(self, profiler, kind, name):
+        self.profiler = profiler
+        self.kind = kind
+        self.name = name
+        self.rows = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.kind, self.name, (perf_counter() - self.start) * 1000, self.rows)
+        return False
+
+
+class _IdleSpan:
+    """What ``span`` returns while profiling is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass  # ``span.rows = n`` is fine to write either way
+
+
+_IDLE = _IdleSpan()
+
+
+class Profiler:
+    """Latency histograms per statement and span, and a slow-statement log."""
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, log_size=SLOW_QUERY_LOG_SIZE):
+        self.enabled = False
+        self.slow_ms = slow_ms
+        self.started = None
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._slow = deque(maxlen=log_size)
+        self._plans = {}
+        self._names = {}
+
+    def enable(self):
+        if self.started is None:
+            self.started = datetime.now().isoformat(sep=" ", timespec="seconds")
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._histograms.clear()
+            self._slow.clear()
+            self._plans.clear()
+        self.started = datetime.now().isoformat(sep=" ", timespec="seconds") if self.enabled else None
+
+    def span(self, name, kind="ui"):
+        """``with profiler.span("render"):`` times the block while profiling is on."""
+        if not self.enabled:
+            return _IDLE
+        return _Span(self, kind, name)
+
+    def timed(self, name=None, kind="ui"):
+        """Decorator form of ``span``, named after the function by default."""
+        def decorate(func):
+            label = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, kind, label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record(self, kind, name, ms, rows=None):
+        with self._lock:
+            histogram = self._histograms.get((kind, name))
+            if histogram is None:
+                histogram = self._histograms[(kind, name)] = _Histogram()
+            histogram.add(ms, rows)
+
+    def statement(self, conn, sql, parameters, seconds, rows):
+        """Record one finished statement; explain it if it was slow.
+
+        ``parameters`` is None when the statement can't or mustn't be
+        explained again (``executemany``, or a cursor being collected).
+        """
+        with self._lock:
+            name = self._names.get(sql)
+            if name is None:
+                if len(self._names) >= MAX_STATEMENT_NAMES:
+                    self._names.clear()
+                name = self._names[sql] = statement_name(sql)
+            plan = self._plans.get(name)
+        ms = seconds * 1000
+        self.record("sql", name, ms, rows)
+        if ms < self.slow_ms:
+            return
+        if plan is None and parameters is not None:
+            # Outside the lock: it runs a statement on ``conn``
+            plan = explain(conn, sql, parameters)
+            with self._lock:
+                self._plans[name] = plan
+        with self._lock:
+            self._slow.append(SlowQuery(datetime.now().isoformat(sep=" ", timespec="milliseconds"), name,
+                                        round(ms, 3), rows, plan or [], threading.current_thread().name))
+
+    def timings(self):
+        """Every histogram as a Timing, most total time first."""
+        with self._lock:
+            timings = [Timing(kind, name, h.count, round(h.total, 3), round(h.total / h.count, 3),
+                              round(h.percentile(0.5), 3), round(h.percentile(0.95), 3), round(h.max, 3), h.rows)
+                       for (kind, name), h in self._histograms.items()]
+        return sorted(timings, key=lambda t: t.total_ms, reverse=True)
+
+    def slow_queries(self):
+        """The slow-statement log, newest first."""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def snapshot(self):
+        """Everything recorded, as JSON-ready data."""
+        with self._lock:
+            histograms = {key: list(h.counts) for key, h in self._histograms.items()}
+        return {
+            "enabled": self.enabled,
+            "since": self.started,
+            "taken": datetime.now().isoformat(sep=" ", timespec="seconds"),
+            "slow_ms": self.slow_ms,
+            "buckets_ms": list(LATENCY_BUCKETS_MS) + [None],
+            "timings": [dict(t._asdict(), histogram=histograms.get((t.kind, t.name), []))
+                        for t in self.timings()],
+            "slow_queries": [q._asdict() for q in self.slow_queries()],
+        }
+
+    def dump(self, path, snapshot=None):
+        """Write ``snapshot`` (default: this profiler's) to ``path`` as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(snapshot or self.snapshot(), f, indent=2)
+        return path
+
+
+def explain(conn, sql, parameters=()):
+    """``EXPLAIN QUERY PLAN`` for ``sql`` as indented lines."""
+    try:
+        rows = conn.cursor(sqlite3.Cursor).execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    except sqlite3.Error as e:
+        return [f"(no plan: {e})"]
+    depth, lines = {}, []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return lines
+
+
+profiler = Profiler()
+if os.environ.get(PROFILE_ENV):
+    profiler.enable()
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Times a statement from ``execute`` until its last row is fetched.
+
+    A statement that returns no rows is reported at once. A query is
+    reported once it runs out of rows, at ``fetchall``, or when the cursor
+    is re-executed, closed or dropped, whichever comes first.
+    """
+
+    _pending = None  # [sql, parameters, seconds, rows] while rows remain
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = perf_counter()
+        super().execute(sql, parameters)
+        self._started(sql, parameters, perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        profiler.statement(self.connection, sql, None, perf_counter() - start, self.rowcount)
+        return self
+
+    def _started(self, sql, parameters, seconds):
+        if self.description is None:
+            rowcount = self.rowcount
+            profiler.statement(self.connection, sql, parameters, seconds, rowcount if rowcount >= 0 else None)
+        else:
+            self._pending = [sql, parameters, seconds, 0]
+
+    def _fetched(self, seconds, rows, done):
+        pending = self._pending
+        if pending is not None:
+            pending[2] += seconds
+            pending[3] += rows
+            if done:
+                self._finish()
+
+    def _finish(self, explain=True):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, parameters, seconds, rows = pending
+            profiler.statement(self.connection, sql, parameters if explain else None, seconds, rows)
+
+    def __next__(self):
+        start = perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(perf_counter() - start, 0, True)
+            raise
+        self._fetched(perf_counter() - start, 1, False)
+        return row
+
+    def fetchone(self):
+        start = perf_counter()
+        row = super().fetchone()
+        self._fetched(perf_counter() - start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(perf_counter() - start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = perf_counter()
+        rows = super().fetchall()
+        self._fetched(perf_counter() - start, len(rows), True)
+        return rows
+
+    def close(self):
+        try:
+            self._finish()
+        finally:
+            super().close()
+
+    def __del__(self):
+        # The collector can run this on any thread, even in the middle of
+        # another statement on the same connection: record, don't explain.
+        try:
+            self._finish(explain=False)
+        except Exception:  # never raise from a finalizer
+            pass
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors report to ``profiler`` while it is on."""
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = ProfiledCursor if profiler.enabled else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        if not profiler.enabled:
+            return super().execute(sql, parameters)
+        return self.cursor(ProfiledCursor).execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not profiler.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        return self.cursor(ProfiledCursor).executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        if not profiler.enabled:
+            return super().commit()
+        start = perf_counter()
+        super().commit()
+        profiler.statement(self, "COMMIT", None, perf_counter() - start, None)
@@ -0,0 +1,233 @@
+"""Membership expiry reminders: a daily scan into an outbox, and a sender.
+
+``queue_reminders`` runs once per day and turns members whose end date
+falls in one of REMINDER_WINDOWS into ``reminder_outbox`` rows with a
+single range query on the end_day index. ``send_reminders`` drains the
+outbox in batches through a transport (anything with ``send(reminder)``),
+rate limited. ``ReminderEngine`` runs both on a background thread.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import date
+
+from gym_core.migrations import day_number_sql
+
+# (kind, first days_left, last days_left), tightest window wins. Ranges
+# rather than exact days, so a scan missed while the app was closed is
+# caught up by the next one.
+REMINDER_WINDOWS = (
+    ("expired", -3, -1),
+    ("expires_1d", 0, 1),
+    ("expires_3d", 2, 3),
+    ("expires_7d", 4, 7),
+)
+SEND_BATCH_SIZE = 100
+SEND_RATE_PER_SECOND = 5
+MAX_ATTEMPTS = 3
+CHECK_INTERVAL_MINUTES = 30
+
+Reminder = namedtuple("Reminder", "id member_id kind name email phone end_date")
+
+REMINDER_SUBJECTS = {
+    "expired": "Your MuscleTone Fitness membership has expired",
+    "expires_1d": "Your MuscleTone Fitness membership expires tomorrow",
+    "expires_3d": "Your MuscleTone Fitness membership expires in 3 days",
+    "expires_7d": "Your MuscleTone Fitness membership expires in a week",
+}
+
+
+def reminder_message(reminder):
+    """(subject, body) for a reminder."""
+    subject = REMINDER_SUBJECTS[reminder.kind]
+    if reminder.kind == "expired":
+        line = f"your membership ended on {reminder.end_date}. Renew at the front desk to keep training."
+    else:
+        line = f"your membership ends on {reminder.end_date}. Renew before then to keep your plan."
+    return subject, f"Hi {reminder.name},\n\n{line}\n\nMuscleTone Fitness"
+
+
+def queue_reminders(conn, today=None) -> int:
+    """Queue today's reminders in one pass; returns how many were added.
+
+    Does nothing if today's scan already ran. Must not be called inside an
+    open transaction.
+    """
+    today = (today or date.today()).isoformat()
+    lowest = min(first for _, first, _ in REMINDER_WINDOWS)
+    highest = max(last for _, _, last in REMINDER_WINDOWS)
+    cases = " ".join(f"WHEN end_day - :today_day BETWEEN {first} AND {last} THEN '{kind}'"
+                     for kind, first, last in REMINDER_WINDOWS)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("SELECT 1 FROM reminder_scans WHERE day = ?", (today,)).fetchone():
+            conn.rollback()
+            return 0
+        cur = conn.execute(f"""
+            INSERT OR IGNORE INTO reminder_outbox (member_id, kind, end_date, queued_on)
+            SELECT id, CASE {cases} END, end_date, :today
+            FROM customers
+            WHERE end_day BETWEEN :today_day + {lowest} AND :today_day + {highest}
+        """, {"today": today, "today_day": _day(conn, today)})
+        queued = cur.rowcount
+        conn.execute("INSERT INTO reminder_scans (day, queued) VALUES (?, ?)", (today, queued))
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return queued
+
+
+def _day(conn, iso_date):
+    return conn.execute(f"SELECT {day_number_sql('?')}", (iso_date,)).fetchone()[0]
+
+
+def pending_reminders(conn, limit=SEND_BATCH_SIZE, after_id=0):
+    """The next pending reminders, joined to the member's current details."""
+    cur = conn.execute("""
+        SELECT o.id, o.member_id, o.kind, c.name, c.email, c.phone, o.end_date, c.end_date
+        FROM reminder_outbox o LEFT JOIN customers c ON c.id = o.member_id
+        WHERE o.status = 'pending' AND o.id > ?
+        ORDER BY o.id LIMIT ?
+    """, (after_id, limit))
+    return cur.fetchall()
+
+
+def send_reminders(conn, transport, rate=SEND_RATE_PER_SECOND, batch_size=SEND_BATCH_SIZE, stop=None) -> int:
+    """Deliver pending reminders through ``transport``; returns how many were sent.
+
+    Reminders for members who were deleted or have renewed since the scan
+    are cancelled instead of sent. A failed send is retried on later runs
+    up to MAX_ATTEMPTS. Outcomes are written back one batch per
+    transaction. ``stop`` (an Event) ends the run between sends.
+    """
+    interval = 1.0 / rate if rate else 0
+    sent = 0
+    last_id = 0
+    next_send = time.monotonic()
+    while stop is None or not stop.is_set():
+        batch = pending_reminders(conn, batch_size, last_id)
+        if not batch:
+            break
+        outcomes = []
+        for outbox_id, member_id, kind, name, email, phone, end_date, current_end in batch:
+            last_id = outbox_id
+            if stop is not None and stop.is_set():
+                break
+            if name is None or current_end != end_date:
+                outcomes.append(("cancelled", None, outbox_id))
+                continue
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_send = max(next_send, time.monotonic()) + interval
+            try:
+                transport.send(Reminder(outbox_id, member_id, kind, name, email, phone, end_date))
+            except Exception as e:  # any transport failure is recorded and retried
+                outcomes.append(("failed", str(e), outbox_id))
+                continue
+            outcomes.append(("sent", None, outbox_id))
+            sent += 1
+        with conn:
+            conn.executemany("""
+                UPDATE reminder_outbox SET
+                    status = CASE WHEN ?1 = 'failed' THEN
+                        CASE WHEN attempts + 1 >= ?4 THEN 'failed' ELSE 'pending' END ELSE ?1 END,
+                    attempts = attempts + (?1 != 'cancelled'),
+                    last_error = ?2,
+                    sent_at = CASE WHEN ?1 = 'sent' THEN CURRENT_TIMESTAMP END
+                WHERE id = ?3
+            """, [(status, error, outbox_id, MAX_ATTEMPTS) for status, error, outbox_id in outcomes])
+    return sent
+
+
+class FileTransport:
+    """Appends each reminder as a JSON line to a file (a stand-in for email/SMS)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, reminder):
+        subject, body = reminder_message(reminder)
+        record = dict(reminder._asdict(), subject=subject, body=body)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+class SmtpTransport:
+    """Emails reminders through an SMTP server."""
+
+    def __init__(self, host, sender, port=587, username=None, password=None, starttls=True):
+        self.host = host
+        self.sender = sender
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+
+    def send(self, reminder):
+        # Imported here: smtplib and email cost the desk app ~0.1s at startup
+        import smtplib
+        from email.message import EmailMessage
+
+        if not reminder.email:
+            raise ValueError("member has no email address")
+        subject, body = reminder_message(reminder)
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = reminder.email
+        message["Subject"] = subject
+        message.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+
+class ReminderEngine:
+    """Queues the day's reminders and sends them, on a background thread.
+
+    Wakes every CHECK_INTERVAL_MINUTES; the scan itself only runs once per
+    day (``reminder_scans`` remembers), and each wake-up retries anything
+    still pending. Uses its own writer connection, never the UI's.
+    """
+
+    def __init__(self, manager, transport, rate=SEND_RATE_PER_SECOND, on_error=None):
+        self.manager = manager
+        self.transport = transport
+        self.rate = rate
+        self.on_error = on_error
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self, today=None):
+        """Scan (if not done today) and send; returns (queued, sent)."""
+        conn = self.manager.writer()
+        try:
+            queued = queue_reminders(conn, today)
+            sent = send_reminders(conn, self.transport, self.rate, stop=self._stop)
+        finally:
+            conn.close()
+        return queued, sent
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except (OSError, sqlite3.Error) as e:
+                if self.on_error:
+                    self.on_error(e)
+            self._stop.wait(CHECK_INTERVAL_MINUTES * 60)
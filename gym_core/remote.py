@@ -0,0 +1,296 @@
+"""Client for ``gym_core.server``: the MemberRepository interface over HTTP.
+
+``RemoteRepository`` answers the calls the Tk app makes (create, update,
+renew, delete, get, list pages, stats, check-ins) by talking to a MemberServer, so
+several desks can share the server's database. Each thread uses its own
+keep-alive connection (``RemoteSession``). GET responses are remembered
+with their ETag and revalidated with If-None-Match. A server started with
+a token only answers requests carrying it in TOKEN_HEADER.
+"""
+
+import http.client
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode, urlsplit
+
+from gym_core.attendance import CHECKIN_TIMEOUT, CheckIn
+from gym_core.changes import CHANGE_FEED_LIMIT, Change, ChangeLogGap
+from gym_core.model import Member
+from gym_core.paging import MAX_CACHED_PAGES, PAGE_SIZE
+from gym_core.service import MemberChange
+from gym_core.validation import ValidationError
+
+REQUEST_TIMEOUT = 10
+ETAG_CACHE_SIZE = 256
+# The shared secret between serve.py and the desks
+TOKEN_ENV = "GYM_TOKEN"
+TOKEN_HEADER = "X-Gym-Token"
+
+
+class RemoteError(sqlite3.Error):
+    """The server failed or couldn't be reached.
+
+    A subclass of ``sqlite3.Error``, so code that handles a failed database
+    call handles a failed server call the same way.
+    """
+
+
+def _member(payload):
+    return Member(**payload) if payload is not None else None
+
+
+def _change(payload):
+    return MemberChange(payload["op"], payload["member_id"], payload["old_end_date"], _member(payload["member"]),
+                        payload.get("seq"))
+
+
+def _changes(payload):
+    return [Change(**dict(record, changed=tuple(record["changed"]))) for record in payload]
+
+
+class RemoteSession:
+    """One keep-alive HTTP connection to the server; use from one thread."""
+
+    def __init__(self, url, timeout=REQUEST_TIMEOUT, token=None):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.token = token
+        self._http = None
+        self._etags = OrderedDict()
+
+    def _connection(self):
+        if self._http is None:
+            self._http = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._http
+
+    def _send(self, method, path, payload, headers, sent):
+        """Send one request and read its response; ``sent[0]`` is set once
+        the request has left, so a failure after it may have been handled."""
+        conn = self._connection()
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        if body is not None:
+            headers = dict(headers, **{"Content-Type": "application/json"})
+        conn.request(method, path, body, headers)
+        sent[0] = True
+        response = conn.getresponse()
+        return response.status, response.getheader("ETag"), response.read()
+
+    def request(self, method, path, payload=None):
+        """Send one request and return its decoded JSON body.
+
+        Raises ValidationError for a rejected input, KeyError for a missing
+        member, ChangeLogGap for a compacted change cursor and RemoteError
+        for anything else.
+        """
+        cached = self._etags.get(path) if method == "GET" else None
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        for attempt in (1, 2):
+            sent = [False]
+            try:
+                status, tag, body = self._send(method, path, payload, headers, sent)
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # Most likely the server closed an idle keep-alive connection;
+                # retry once on a new one. A write that got as far as the
+                # server may have been applied, so only GETs and writes that
+                # never left are sent again.
+                self.close()
+                if sent[0] and method != "GET":
+                    raise RemoteError("The server closed the connection; refresh to check whether "
+                                      "the change was saved.") from None
+                if attempt == 2:
+                    raise RemoteError("The server closed the connection.") from None
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                raise RemoteError(f"Could not reach the server at {self.host}:{self.port}: {e}") from None
+        if status == 304 and cached:
+            self._etags.move_to_end(path)
+            return cached[1]
+        result = json.loads(body) if body else None
+        if status < 300:
+            if method == "GET" and tag:
+                self._etags[path] = (tag, result)
+                if len(self._etags) > ETAG_CACHE_SIZE:
+                    self._etags.popitem(last=False)
+            return result
+        message = (result or {}).get("error", f"HTTP {status}")
+        if status == 400:
+            raise ValidationError(message)
+        if status == 404:
+            raise KeyError(message)
+        if status == 410:
+            raise ChangeLogGap(message)
+        raise RemoteError(message)
+
+    def batch(self, requests):
+        """Run ``(method, path, payload)`` requests in one round trip; returns
+        a list of (status, body)."""
+        result = self.request("POST", "/batch", {"requests": [
+            {"method": method, "path": path, "body": payload} for method, path, payload in requests]})
+        return [(r["status"], r["body"]) for r in result["responses"]]
+
+    def interrupt(self):
+        """Requests can't be cut short; the newer query simply follows."""
+
+    def close(self):
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+
+class RemotePager:
+    """``MemberPager`` over HTTP: pages of the member list fetched on demand.
+
+    Pages missing from a ``rows`` call are fetched together in one batch
+    request. A write drops the cached pages and the total is refreshed from
+    the next response.
+    """
+
+    def __init__(self, conn, term="", status=None, page_size=PAGE_SIZE):
+        self.term = term.strip()
+        self.status = status
+        self.page_size = page_size
+        self._pages = OrderedDict()
+        self.total = 0
+        self._store(0, conn.request("GET", self._path(0)))
+
+    def _path(self, index):
+        query = {"offset": index * self.page_size, "limit": self.page_size}
+        if self.term:
+            query["q"] = self.term
+        if self.status:
+            query["status"] = self.status
+        return "/members?" + urlencode(query)
+
+    def _store(self, index, payload):
+        self.total = payload["total"]
+        self._pages[index] = [_member(m) for m in payload["members"]]
+        if len(self._pages) > MAX_CACHED_PAGES:
+            self._pages.popitem(last=False)
+
+    def rows(self, conn, start, stop):
+        start = max(start, 0)
+        stop = min(stop, self.total)
+        if start >= stop:
+            return []
+        indexes = range(start // self.page_size, (stop - 1) // self.page_size + 1)
+        missing = [i for i in indexes if i not in self._pages]
+        if len(missing) == 1:
+            self._store(missing[0], conn.request("GET", self._path(missing[0])))
+        elif missing:
+            for index, (status, body) in zip(missing, conn.batch([("GET", self._path(i), None) for i in missing])):
+                if status != 200:
+                    raise RemoteError(body.get("error", f"HTTP {status}"))
+                self._store(index, body)
+        result = []
+        for index in indexes:
+            page = self._pages.get(index, [])
+            base = index * self.page_size
+            result.extend(page[max(start - base, 0):stop - base])
+        return result
+
+    def apply_change(self, conn, op, member_id, row=None):
+        self._pages.clear()
+        self._store(0, conn.request("GET", self._path(0)))
+
+
+class RemoteRepository:
+    """MemberRepository stand-in that forwards to a MemberServer at ``url``.
+
+    Operations on the database file itself (import, export, backup,
+    restore, reports) raise RemoteError: run them on the server machine.
+    """
+
+    def __init__(self, url, token=None):
+        self.url = url
+        self.token = token
+        self._local = threading.local()
+        self._sessions = []
+
+    @property
+    def connection(self):
+        """The calling thread's session."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = RemoteSession(self.url, token=self.token)
+            self._sessions.append(session)
+        return session
+
+    def reader(self):
+        return RemoteSession(self.url, token=self.token)
+
+    def close(self):
+        for session in self._sessions:
+            session.close()
+
+    def init(self):
+        return self.connection.request("GET", "/version")["schema"]
+
+    def create(self, fields) -> MemberChange:
+        return _change(self.connection.request("POST", "/members", fields))
+
+    def update(self, member_id, fields) -> MemberChange:
+        return _change(self.connection.request("PUT", f"/members/{int(member_id)}", fields))
+
+    def renew_plan(self, member_id, fields) -> MemberChange:
+        return _change(self.connection.request("POST", f"/members/{int(member_id)}/plan", fields))
+
+    def delete(self, member_id) -> MemberChange:
+        return _change(self.connection.request("DELETE", f"/members/{int(member_id)}"))
+
+    def get(self, member_id):
+        try:
+            return _member(self.connection.request("GET", f"/members/{int(member_id)}"))
+        except KeyError:
+            return None
+
+    def pager(self, term="", status=None, conn=None):
+        return RemotePager(conn or self.connection, term, status)
+
+    def check_in(self, member_id, at=None, timeout=CHECKIN_TIMEOUT):
+        return CheckIn(**self.connection.request("POST", f"/members/{int(member_id)}/checkin", {"at": at}))
+
+    def visits(self, member_id):
+        result = self.connection.request("GET", f"/members/{int(member_id)}/visits")
+        return result["visits"], result["first_visit"], result["last_visit"]
+
+    def frequent_visitors(self, limit=10):
+        return [(r["member_id"], r["name"], r["visits"], r["last_visit"])
+                for r in self.connection.request("GET", f"/attendance/top?limit={int(limit)}")]
+
+    def heatmap(self, date_from=None, date_to=None):
+        query = {name: value for name, value in (("from", date_from), ("to", date_to)) if value}
+        return self.connection.request("GET", "/attendance/heatmap" + ("?" + urlencode(query) if query else ""))
+
+    def latest_change(self, conn=None):
+        return (conn or self.connection).request("GET", "/version")["changes"]
+
+    def changes_since(self, seq, limit=CHANGE_FEED_LIMIT, conn=None):
+        return _changes((conn or self.connection).request("GET", f"/changes?since={int(seq)}&limit={int(limit)}"))
+
+    def audit(self, member_id):
+        return _changes(self.connection.request("GET", f"/members/{int(member_id)}/changes"))
+
+    def deleted_members(self, limit=100):
+        return _changes(self.connection.request("GET", f"/changes/deleted?limit={int(limit)}"))
+
+    def diagnostics(self):
+        """The server's profiler snapshot; its statements run there, not here."""
+        return self.connection.request("GET", "/diagnostics")
+
+    def stats(self, today=None):
+        return self.connection.request("GET", "/stats")
+
+    def dues(self, today=None):
+        return self.connection.request("GET", "/dues")
+
+    def _local_only(self, *args, **kwargs):
+        raise RemoteError("This is only available on the server machine.")
+
+    export_csv = import_csv = backup = restore = reports = _local_only
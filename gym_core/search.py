@@ -0,0 +1,157 @@
+"""Member search backed by the ``customers_fts`` full-text index."""
+
+from gym_core.migrations import SEARCH_FIELDS
+
+MEMBER_COLUMNS = ("id", "name", "phone", "email", "start_date", "end_date",
+                  "membership_type", "payment_status", "trainer", "amount")
+
+# Today's local date as a day number, matching the start_day/end_day columns
+TODAY_DAY_SQL = "CAST(julianday('now', 'localtime') - 2440587.5 AS INTEGER)"
+
+# Membership status filters, answered by range scans on idx_customers_end_day
+STATUS_FILTERS = {
+    "active": "{p}end_day >= {today}",
+    "expiring": "{p}end_day BETWEEN {today} AND {today} + 7",
+    "expired": "{p}end_day < {today}",
+}
+
+# The trigram tokenizer cannot match fragments shorter than this
+MIN_TOKEN_LENGTH = 3
+
+# Fallback for terms the full-text index can't answer; ``:q`` is "%term%".
+# It covers the indexed columns, so a term finds the same fields either way.
+LIKE_FILTER_SQL = "(" + " OR ".join(f"{{p}}{name} LIKE :q" for name in SEARCH_FIELDS) + ")"
+
+
+def member_select(alias="") -> str:
+    """Select list for a member row: MEMBER_COLUMNS, days_left, then notes.
+
+    ``days_left`` is computed by SQLite from the end_day column and is NULL
+    when the stored end date can't be parsed. Notes come last so a listed
+    row is a complete record for the edit form.
+    """
+    p = f"{alias}." if alias else ""
+    columns = [p + col for col in MEMBER_COLUMNS]
+    columns.append(f"{p}end_day - {TODAY_DAY_SQL} AS days_left")
+    columns.append(f"{p}notes")
+    return ", ".join(columns)
+
+
+def status_filter(status, alias="") -> str:
+    """SQL condition for a STATUS_FILTERS key, or "" for no filter."""
+    if not status:
+        return ""
+    p = f"{alias}." if alias else ""
+    return STATUS_FILTERS[status].format(p=p, today=TODAY_DAY_SQL)
+
+
+def has_search_index(conn) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='customers_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def fts_query(term: str):
+    """Turn free text into an FTS5 MATCH expression.
+
+    Every whitespace-separated token must appear somewhere in the member's
+    searchable fields; the trigram tokenizer makes each token a substring
+    match, so "0101" finds "555-0101" and "sha" finds "Sharma". Returns None
+    when a token is too short for the index to answer.
+    """
+    tokens = term.split()
+    if not tokens or any(len(t) < MIN_TOKEN_LENGTH for t in tokens):
+        return None
+    return " ".join('"' + t.replace('"', '""') + '"' for t in tokens)
+
+
+def _where(*conditions):
+    conditions = [c for c in conditions if c]
+    return "WHERE " + " AND ".join(conditions) if conditions else ""
+
+
+def search_filter(conn, term, alias=""):
+    """SQL condition and parameters limiting rows to matches for ``term``.
+
+    Returns ("", {}) for a blank term. Unlike ``search_customers`` this does
+    not rank, so callers can pick their own order (e.g. a streaming export).
+    """
+    term = term.strip()
+    if not term:
+        return "", {}
+    p = f"{alias}." if alias else ""
+    match = fts_query(term) if has_search_index(conn) else None
+    if match is not None:
+        return f"{p}id IN (SELECT rowid FROM customers_fts WHERE customers_fts MATCH :match)", {"match": match}
+    return LIKE_FILTER_SQL.format(p=p), {"q": f"%{term}%"}
+
+
+def search_customers(conn, term, status=None):
+    """Return a cursor over members matching ``term``, best matches first."""
+    match = fts_query(term) if has_search_index(conn) else None
+    status_sql = status_filter(status, "c")
+    if match is not None:
+        return conn.execute(f"""
+            SELECT {member_select("c")} FROM customers_fts f
+            JOIN customers c ON c.id = f.rowid
+            {_where("customers_fts MATCH :match", status_sql)}
+            ORDER BY f.rank, c.id DESC
+        """, {"match": match})
+    return conn.execute(f"""
+        SELECT {member_select("c")} FROM customers c
+        {_where(LIKE_FILTER_SQL.format(p="c."), status_sql)}
+        ORDER BY c.id DESC
+    """, {"q": f"%{term}%"})
+
+
+def search_ids(conn, term, status=None):
+    """Return the ids of members matching ``term`` in result order."""
+    match = fts_query(term) if has_search_index(conn) else None
+    status_sql = status_filter(status, "c")
+    if match is not None:
+        cur = conn.execute(f"""
+            SELECT f.rowid FROM customers_fts f JOIN customers c ON c.id = f.rowid
+            {_where("customers_fts MATCH :match", status_sql)}
+            ORDER BY f.rank, f.rowid DESC
+        """ if status_sql else """
+            SELECT rowid FROM customers_fts WHERE customers_fts MATCH :match
+            ORDER BY rank, rowid DESC
+        """, {"match": match})
+    else:
+        cur = conn.execute(f"""
+            SELECT c.id FROM customers c
+            {_where(LIKE_FILTER_SQL.format(p="c."), status_sql)}
+            ORDER BY c.id DESC
+        """, {"q": f"%{term}%"})
+    return [row[0] for row in cur]
+
+
+def matches_search(conn, member_id, term, status=None) -> bool:
+    """Whether one member would appear in the results for ``term``/``status``."""
+    term = term.strip()
+    status_sql = status_filter(status)
+    if status_sql:
+        row = conn.execute(f"SELECT 1 FROM customers WHERE id = ? AND {status_sql}",
+                           (member_id,)).fetchone()
+        if row is None:
+            return False
+    if not term:
+        return True
+    match = fts_query(term) if has_search_index(conn) else None
+    if match is not None:
+        row = conn.execute("SELECT 1 FROM customers_fts WHERE customers_fts MATCH ? AND rowid = ?",
+                           (match, member_id)).fetchone()
+    else:
+        row = conn.execute(f"SELECT 1 FROM customers WHERE id = :id AND {LIKE_FILTER_SQL.format(p='')}",
+                           {"id": member_id, "q": f"%{term}%"}).fetchone()
+    return row is not None
+
+
+def list_customers(conn, term="", status=None):
+    """Return a cursor over the member list, optionally filtered."""
+    term = term.strip()
+    if term:
+        return search_customers(conn, term, status)
+    return conn.execute(
+        f"SELECT {member_select()} FROM customers {_where(status_filter(status))} ORDER BY id DESC")
@@ -0,0 +1,484 @@
+"""HTTP/JSON API over the member operations, for several desks sharing one database.
+
+One asyncio event loop handles the sockets. Writes run one at a time on
+a single writer thread, through a ``MemberRepository`` on the manager's
+read/write connection. Reads run on a small pool of threads, each with
+its own read-only connection, so they never wait on a write.
+
+Every GET response carries an ETag: the server's data version, which
+moves whenever anything commits to the database (``PRAGMA
+data_version``). A request whose If-None-Match still matches gets a 304.
+Any other GET is served from a response cache while the version holds.
+Check-ins skip the writer thread and go to the repository's
+AttendanceWriter, so check-ins from every desk share its group commits.
+``POST /batch`` runs a list of requests in one round trip. A server given
+a token answers 401 to any request without it in TOKEN_HEADER.
+
+    GET    /version                   {"version", "schema", "changes"}
+    GET    /members?q=&status=&offset=&limit=   {"total", "members"}
+    GET    /members/<id>
+    POST   /members                   create
+    PUT    /members/<id>              update
+    POST   /members/<id>/plan         renew plan
+    DELETE /members/<id>
+    POST   /members/<id>/checkin      {"at"} optional; group-committed check-in
+    GET    /members/<id>/visits       {"visits", "first_visit", "last_visit"}
+    GET    /attendance/heatmap?from=&to=   7 x 24 check-in counts
+    GET    /attendance/top?limit=
+    GET    /changes?since=&limit=     change_log records after ``since`` (410 if compacted)
+    GET    /changes/deleted?limit=
+    GET    /members/<id>/changes      the member's audit trail
+    GET    /stats
+    GET    /dues
+    GET    /diagnostics               the server's profiler snapshot (see gym_core.profiling)
+    POST   /batch                     {"requests": [{"method", "path", "body"}, ...]}
+"""
+
+import asyncio
+import hmac
+import json
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from gym_core.attendance import CHECKIN_TIMEOUT, frequent_visitors, member_visits, visit_heatmap
+from gym_core.changes import (
+    CHANGE_FEED_LIMIT,
+    ChangeLogGap,
+    changes_since,
+    deleted_members,
+    latest_seq,
+    member_changes,
+)
+from gym_core.migrations import get_version
+from gym_core.model import member_factory
+from gym_core.paging import PAGE_SIZE, MemberPager
+from gym_core.profiling import profiler
+from gym_core.remote import TOKEN_HEADER
+from gym_core.search import STATUS_FILTERS, member_select
+from gym_core.service import MemberRepository
+from gym_core.stats import get_month_revenue, get_outstanding, get_statistics
+from gym_core.validation import MEMBER_FIELDS, ValidationError
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+READER_THREADS = 4
+RESPONSE_CACHE_SIZE = 1024
+PAGER_CACHE_SIZE = 32
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_REQUESTS = 200
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADERS = 100
+KEEP_ALIVE_SECONDS = 60
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def change_payload(change):
+    """JSON form of a MemberChange."""
+    return {
+        "op": change.op,
+        "member_id": change.member_id,
+        "old_end_date": change.old_end_date,
+        "member": change.row.as_dict() if change.row is not None else None,
+        "seq": change.seq,
+    }
+
+
+def _int(query, name, default):
+    try:
+        return int(query.get(name, [default])[0])
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} must be a whole number") from None
+
+
+def _fields(body):
+    """``body`` with its member fields checked: strings or null, and a number for amount."""
+    for name in MEMBER_FIELDS:
+        value = body.get(name)
+        if value is None or isinstance(value, str):
+            continue
+        if name == "amount" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            continue
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} must be a string")
+    return body
+
+
+# ---------------- Handlers ----------------
+# Read handlers take (server, conn, match, query); write handlers take
+# (server, match, body) and run on the writer thread; queue handlers take
+# (server, match, body) and return a Future without blocking. Live
+# handlers take (server, match, query), run on the event loop and are
+# never cached: their answer doesn't follow the data version.
+
+def _read_version(server, conn, match, query):
+    return {"version": server._version, "schema": get_version(conn), "changes": latest_seq(conn)}
+
+
+def _read_members(server, conn, match, query):
+    status = query.get("status", [None])[0] or None
+    if status is not None and status not in STATUS_FILTERS:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Unknown status: {status}")
+    offset = max(_int(query, "offset", 0), 0)
+    limit = min(max(_int(query, "limit", PAGE_SIZE), 0), MAX_PAGE_SIZE)
+    term = query.get("q", [""])[0].strip()
+    lock, slot = server.pager_slot(term, status)
+    with lock:
+        if not slot:
+            slot.append(MemberPager(conn, term, status))
+        pager = slot[0]
+        rows = pager.rows(conn, offset, offset + limit) if limit else []
+        return {"total": pager.total, "members": [member.as_dict() for member in rows]}
+
+
+def _read_member(server, conn, match, query):
+    cur = conn.cursor()
+    cur.row_factory = member_factory
+    member = cur.execute(f"SELECT {member_select()} FROM customers WHERE id=?",
+                         (int(match["id"]),)).fetchone()
+    if member is None:
+        raise HttpError(HTTPStatus.NOT_FOUND, "This member no longer exists.")
+    return member.as_dict()
+
+
+def _read_stats(server, conn, match, query):
+    return get_statistics(conn)
+
+
+def _read_dues(server, conn, match, query):
+    return {"outstanding": get_outstanding(conn), "month_revenue": get_month_revenue(conn)}
+
+
+def _read_visits(server, conn, match, query):
+    visits, first_visit, last_visit = member_visits(conn, int(match["id"]))
+    return {"visits": visits, "first_visit": first_visit, "last_visit": last_visit}
+
+
+def _read_heatmap(server, conn, match, query):
+    return visit_heatmap(conn, query.get("from", [None])[0], query.get("to", [None])[0])
+
+
+def _read_top_visitors(server, conn, match, query):
+    limit = min(max(_int(query, "limit", 10), 0), MAX_PAGE_SIZE)
+    return [dict(zip(("member_id", "name", "visits", "last_visit"), row))
+            for row in frequent_visitors(conn, limit)]
+
+
+def _read_changes(server, conn, match, query):
+    since = _int(query, "since", 0)
+    limit = min(max(_int(query, "limit", CHANGE_FEED_LIMIT), 0), MAX_PAGE_SIZE)
+    return [change._asdict() for change in changes_since(conn, since, limit)]
+
+
+def _read_deleted(server, conn, match, query):
+    limit = min(max(_int(query, "limit", 100), 0), MAX_PAGE_SIZE)
+    return [change._asdict() for change in deleted_members(conn, limit)]
+
+
+def _read_member_changes(server, conn, match, query):
+    return [change._asdict() for change in member_changes(conn, int(match["id"]))]
+
+
+def _read_diagnostics(server, match, query):
+    return profiler.snapshot()
+
+
+def _create(server, match, body):
+    return change_payload(server.repo.create(_fields(body)))
+
+
+def _update(server, match, body):
+    return change_payload(server.repo.update(int(match["id"]), _fields(body)))
+
+
+def _renew(server, match, body):
+    return change_payload(server.repo.renew_plan(int(match["id"]), _fields(body)))
+
+
+def _delete(server, match, body):
+    return change_payload(server.repo.delete(int(match["id"])))
+
+
+def _check_in(server, match, body):
+    at = body.get("at")
+    if at is not None and not isinstance(at, str):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "at must be a string")
+    return server.repo.attendance.submit(int(match["id"]), at)
+
+
+ROUTES = [
+    ("GET", r"/version", "read", _read_version),
+    ("GET", r"/members", "read", _read_members),
+    ("GET", r"/members/(?P<id>\d+)", "read", _read_member),
+    ("GET", r"/members/(?P<id>\d+)/visits", "read", _read_visits),
+    ("GET", r"/attendance/heatmap", "read", _read_heatmap),
+    ("GET", r"/attendance/top", "read", _read_top_visitors),
+    ("GET", r"/changes", "read", _read_changes),
+    ("GET", r"/changes/deleted", "read", _read_deleted),
+    ("GET", r"/members/(?P<id>\d+)/changes", "read", _read_member_changes),
+    ("GET", r"/stats", "read", _read_stats),
+    ("GET", r"/dues", "read", _read_dues),
+    ("POST", r"/members", "write", _create),
+    ("PUT", r"/members/(?P<id>\d+)", "write", _update),
+    ("POST", r"/members/(?P<id>\d+)/plan", "write", _renew),
+    ("DELETE", r"/members/(?P<id>\d+)", "write", _delete),
+    ("POST", r"/members/(?P<id>\d+)/checkin", "queue", _check_in),
+    ("GET", r"/diagnostics", "live", _read_diagnostics),
+]
+
+
+ROUTES = [(method, re.compile(pattern + "$"), kind, handler) for method, pattern, kind, handler in ROUTES]
+
+
+class MemberServer:
+    """Serves ROUTES for one database (a ConnectionManager)."""
+
+    def __init__(self, manager, readers=READER_THREADS, token=None):
+        self.repo = MemberRepository(manager)
+        self.manager = manager
+        self.token = token
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="gym-writer")
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix="gym-reader")
+        self._local = threading.local()
+        self._reader_conns = []
+        self._watch = None
+        self._watch_lock = threading.Lock()
+        self._seen = None
+        self._version = 0
+        self._responses = OrderedDict()
+        self._pagers = OrderedDict()
+        self._pagers_lock = threading.Lock()
+
+    # ---- data version ----
+    @property
+    def version(self):
+        """Bumped whenever another connection (our writer included) has committed."""
+        with self._watch_lock:
+            if self._watch is None:
+                self._watch = self.manager.reader()
+            seen = self._watch.execute("PRAGMA data_version").fetchone()[0]
+            if seen != self._seen:
+                self._seen = seen
+                self._version += 1
+                self._responses.clear()
+            return self._version
+
+    def pager_slot(self, term, status):
+        """(lock, slot) for the list ``term``/``status`` at the current version.
+
+        The slot is a list holding the query's MemberPager once built, so
+        later pages reuse its keyset anchors and total; hold the lock while
+        using it. A new version starts an empty slot.
+        """
+        key = (term, status)
+        with self._pagers_lock:
+            entry = self._pagers.get(key)
+            if entry is None or entry[0] != self._version:
+                entry = self._pagers[key] = (self._version, threading.Lock(), [])
+                if len(self._pagers) > PAGER_CACHE_SIZE:
+                    self._pagers.popitem(last=False)
+            else:
+                self._pagers.move_to_end(key)
+            return entry[1], entry[2]
+
+    # ---- execution ----
+    def _reader_conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.manager.reader()
+            self._reader_conns.append(conn)
+        return conn
+
+    def _run_read(self, handler, match, query):
+        with profiler.span(handler.__name__.lstrip("_"), "http"):
+            return handler(self, self._reader_conn(), match, query)
+
+    def _run_write(self, handler, match, body):
+        with profiler.span(handler.__name__.lstrip("_"), "http"):
+            return handler(self, match, body)
+
+    async def dispatch(self, method, target, body=None, etag=None):
+        """Answer one request; returns (status, payload, etag)."""
+        parts = urlsplit(target)
+        path = parts.path.rstrip("/") or "/"
+        if method == "POST" and path == "/batch":
+            return await self._batch(body)
+        for route_method, pattern, kind, handler in ROUTES:
+            match = pattern.match(path)
+            if match is None or route_method != method:
+                continue
+            loop = asyncio.get_running_loop()
+            try:
+                if kind in ("write", "queue"):
+                    body = {} if body is None else body
+                    if not isinstance(body, dict):
+                        raise HttpError(HTTPStatus.BAD_REQUEST, "Expected a JSON object")
+                if kind == "live":
+                    return HTTPStatus.OK, handler(self, match, parse_qs(parts.query)), None
+                if kind == "queue":
+                    try:
+                        # Shielded: the writer still resolves the future after we stop waiting
+                        result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(handler(self, match, body))),
+                                                        CHECKIN_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "Check-ins are backed up; try again") from None
+                    return HTTPStatus.OK, result._asdict(), None
+                if kind == "write":
+                    payload = await loop.run_in_executor(self._writer, self._run_write, handler, match, body)
+                    status = HTTPStatus.CREATED if route_method == "POST" and handler is _create else HTTPStatus.OK
+                    return status, payload, None
+                version = self.version
+                tag = f'"{version}"'
+                if etag == tag:
+                    return HTTPStatus.NOT_MODIFIED, None, tag
+                cached = self._responses.get(target)
+                if cached is not None and cached[0] == version:
+                    self._responses.move_to_end(target)
+                    return HTTPStatus.OK, cached[1], tag
+                payload = await loop.run_in_executor(
+                    self._readers, self._run_read, handler, match, parse_qs(parts.query))
+                self._responses[target] = (version, payload)
+                if len(self._responses) > RESPONSE_CACHE_SIZE:
+                    self._responses.popitem(last=False)
+                return HTTPStatus.OK, payload, tag
+            except HttpError as e:
+                return e.status, {"error": str(e)}, None
+            except ValidationError as e:
+                return HTTPStatus.BAD_REQUEST, {"error": str(e)}, None
+            except (TypeError, ValueError) as e:
+                # Anything the checks above let through that still can't be parsed
+                return HTTPStatus.BAD_REQUEST, {"error": f"Bad request: {e}"}, None
+            except ChangeLogGap as e:
+                return HTTPStatus.GONE, {"error": str(e)}, None
+            except KeyError:
+                return HTTPStatus.NOT_FOUND, {"error": "This member no longer exists."}, None
+            except sqlite3.Error as e:
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Database error: {e}"}, None
+        if any(pattern.match(path) for _, pattern, _, _ in ROUTES):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} not allowed on {path}"}, None
+        return HTTPStatus.NOT_FOUND, {"error": f"No such endpoint: {path}"}, None
+
+    async def _batch(self, body):
+        requests = body.get("requests") if isinstance(body, dict) else None
+        if not isinstance(requests, list) or len(requests) > MAX_BATCH_REQUESTS:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Expected a list of up to {MAX_BATCH_REQUESTS} requests"}, None
+        results = []
+        for request in requests:
+            if not isinstance(request, dict) or request.get("path", "").startswith("/batch"):
+                results.append({"status": HTTPStatus.BAD_REQUEST, "body": {"error": "Bad batch entry"}})
+                continue
+            status, payload, tag = await self.dispatch(
+                str(request.get("method", "GET")).upper(), str(request.get("path", "")), request.get("body"))
+            results.append({"status": int(status), "body": payload, "etag": tag})
+        return HTTPStatus.OK, {"responses": results}, None
+
+    # ---- HTTP ----
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    break
+                except ValueError:  # longer than the stream's line limit
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Request line too long"},
+                                        None, False)
+                    break
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Bad request line"}, None, False)
+                    break
+                try:
+                    headers = await self._read_headers(reader)
+                except HttpError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, None, False)
+                    break
+                if self.token and not hmac.compare_digest(headers.get(TOKEN_HEADER.lower(), "").encode("utf-8"),
+                                                          self.token.encode("utf-8")):
+                    await self._respond(writer, HTTPStatus.UNAUTHORIZED, {"error": "Missing or wrong access token"},
+                                        None, False)
+                    break
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.upper() == "HTTP/1.1")
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Bad Content-Length"}, None, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {"error": "Request body too large"}, None, False)
+                    break
+                body = None
+                if length:
+                    try:
+                        body = json.loads(await reader.readexactly(length))
+                    except ValueError:
+                        await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Body is not valid JSON"},
+                                            None, keep_alive)
+                        continue
+                status, payload, tag = await self.dispatch(method.upper(), target, body,
+                                                           headers.get("if-none-match"))
+                await self._respond(writer, status, payload, tag, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_headers(self, reader):
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Header line too long") from None
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            if len(headers) >= MAX_HEADERS:
+                raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def _respond(self, writer, status, payload, tag, keep_alive):
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        head = [f"HTTP/1.1 {int(status)} {status.phrase}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if tag:
+            head.append(f"ETag: {tag}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT, ready=None):
+        """Run until cancelled. ``ready(port)`` is called once listening."""
+        self.repo.init()
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self._writer.shutdown()
+        self._readers.shutdown()
+        for conn in self._reader_conns:
+            conn.close()
+        if self._watch is not None:
+            self._watch.close()
+        self.repo.close()
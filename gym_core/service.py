@@ -0,0 +1,320 @@
+"""Member operations shared by the Tk app and command-line tools."""
+
+import threading
+from collections import namedtuple
+
+from gym_core.analytics import ReportCache
+from gym_core.attendance import (
+    ATTENDANCE_TABLES,
+    CHECKIN_TIMEOUT,
+    AttendanceWriter,
+    frequent_visitors,
+    member_visits,
+    visit_heatmap,
+)
+from gym_core.backup import SNAPSHOT_KEEP, backup_to, restore_from, take_snapshot
+from gym_core.cache import MemberCache
+from gym_core.changes import CHANGE_FEED_LIMIT, changes_since, deleted_members, latest_seq, member_changes
+from gym_core.db import db
+from gym_core.export import export_members
+from gym_core.importer import import_members
+from gym_core.ledger import member_history, revenue
+from gym_core.migrations import REVENUE_ROLLUPS, migrate, record_plans
+from gym_core.model import MemberTable, member_factory
+from gym_core.paging import MemberPager
+from gym_core.profiling import profiler
+from gym_core.search import list_customers, member_select
+from gym_core.stats import get_month_revenue, get_outstanding, get_statistics
+from gym_core.sync import branch_name, export_delta, merge_delta, set_branch_name, sync_peers
+from gym_core.validation import MEMBER_FIELDS, PLAN_FIELDS, clean_member, clean_plan
+
+# What a write did, for callers that patch their views instead of reloading.
+# ``row`` is the member's Member record after the write (None for deletes),
+# ``old_end_date`` its end date before it (None for inserts) and ``seq`` the
+# member's latest change_log sequence number after it.
+MemberChange = namedtuple("MemberChange", "op member_id old_end_date row seq", defaults=(None,))
+
+
+class MemberRepository:
+    """Create, change, find and report on members.
+
+    Every method validates its input (raising ``ValidationError``) and uses
+    the given connection manager, so it works the same with or without a UI.
+    Rows read by list queries and written by this repository are kept in
+    ``cache``; bulk operations (import, restore, clear) empty it.
+    """
+
+    def __init__(self, manager=db):
+        self.db = manager
+        self.cache = MemberCache()
+        self.report_cache = ReportCache()
+        self._attendance = None
+        self._attendance_lock = threading.Lock()
+
+    def init(self):
+        """Create or upgrade the schema; returns the schema version."""
+        return migrate(self.db.connection)
+
+    @property
+    def connection(self):
+        """Handle for list reads on the calling (UI) thread; see ``pager``."""
+        return self.db.connection
+
+    def reader(self):
+        """A private read handle for a worker thread; the caller closes it."""
+        return self.db.reader()
+
+    @property
+    def attendance(self):
+        """The check-in writer, started on first use."""
+        with self._attendance_lock:
+            if self._attendance is None:
+                self._attendance = AttendanceWriter(self.db)
+            return self._attendance
+
+    def close(self):
+        with self._attendance_lock:
+            if self._attendance is not None:
+                self._attendance.stop()
+        self.db.close()
+
+    def _read_member(self, conn, member_id):
+        cur = conn.cursor()
+        cur.row_factory = member_factory
+        member = cur.execute(f"SELECT {member_select()} FROM customers WHERE id=?", (member_id,)).fetchone()
+        if member is not None:
+            self.cache.put(member)
+        return member
+
+    def _seq(self, conn, member_id):
+        return conn.execute("SELECT max(seq) FROM change_log WHERE member_id = ?", (member_id,)).fetchone()[0]
+
+    def _end_date(self, conn, member_id):
+        row = conn.execute("SELECT end_date FROM customers WHERE id=?", (member_id,)).fetchone()
+        if row is None:
+            raise KeyError(member_id)
+        return row[0]
+
+    def create(self, fields) -> MemberChange:
+        member = clean_member(fields)
+        with self.db.transaction() as conn:
+            cur = conn.execute(f"""INSERT INTO customers ({", ".join(MEMBER_FIELDS)})
+                VALUES ({", ".join("?" * len(MEMBER_FIELDS))})""",
+                [member[name] for name in MEMBER_FIELDS])
+            member_id = cur.lastrowid
+            record_plans(conn, f"id = {int(member_id)}")
+            return MemberChange("insert", member_id, None, self._read_member(conn, member_id),
+                                self._seq(conn, member_id))
+
+    def update(self, member_id, fields) -> MemberChange:
+        member = clean_member(fields)
+        with self.db.transaction() as conn:
+            old_end_date = self._end_date(conn, member_id)
+            conn.execute(f"""UPDATE customers SET {", ".join(f"{name}=?" for name in MEMBER_FIELDS)}
+                WHERE id=?""", [member[name] for name in MEMBER_FIELDS] + [member_id])
+            record_plans(conn, f"id = {int(member_id)}")
+            return MemberChange("update", member_id, old_end_date, self._read_member(conn, member_id),
+                                self._seq(conn, member_id))
+
+    def renew_plan(self, member_id, fields) -> MemberChange:
+        plan = clean_plan(fields)
+        with self.db.transaction() as conn:
+            old_end_date = self._end_date(conn, member_id)
+            conn.execute(f"""UPDATE customers SET {", ".join(f"{name}=?" for name in PLAN_FIELDS)}
+                WHERE id=?""", [plan[name] for name in PLAN_FIELDS] + [member_id])
+            record_plans(conn, f"id = {int(member_id)}", renewal=True)
+            return MemberChange("update", member_id, old_end_date, self._read_member(conn, member_id),
+                                self._seq(conn, member_id))
+
+    def delete(self, member_id) -> MemberChange:
+        with self.db.transaction() as conn:
+            old_end_date = self._end_date(conn, member_id)
+            conn.execute("DELETE FROM customers WHERE id=?", (member_id,))
+            self.cache.discard(member_id)
+            return MemberChange("delete", member_id, old_end_date, None, self._seq(conn, member_id))
+
+    def clear(self):
+        with self.db.transaction() as conn:
+            # A local reset: no tombstones for other branches to copy
+            conn.execute("DELETE FROM sync_rows")
+            conn.execute("DELETE FROM customers")
+            conn.execute("DELETE FROM plan_history")
+            for table, _ in REVENUE_ROLLUPS:
+                conn.execute(f"DELETE FROM {table}")
+            for table in ATTENDANCE_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+            # Nothing before a clear can be replayed, so readers start over
+            conn.execute("DELETE FROM change_log")
+            conn.execute("UPDATE change_log_horizon SET seq = ?", (latest_seq(conn),))
+            conn.execute("DELETE FROM sync_peers")
+            self.cache.clear()
+
+    def get(self, member_id):
+        """One member's ``Member`` record, or None.
+
+        Members the list has shown or this repository has written are
+        answered from the cache without touching the database.
+        """
+        member = self.cache.get(member_id)
+        if member is None:
+            member = self._read_member(self.db.connection, member_id)
+        return member
+
+    def search(self, term="", status=None):
+        """Matching members as a ``MemberTable``."""
+        epoch = self.cache.epoch
+        table = MemberTable.from_cursor(list_customers(self.db.connection, term, status))
+        self.cache.put_many(table, epoch)
+        return table
+
+    def pager(self, term="", status=None, conn=None):
+        return MemberPager(conn or self.db.connection, term, status, cache=self.cache)
+
+    def stats(self, today=None):
+        return get_statistics(self.db.connection, today)
+
+    def dues(self, today=None):
+        """Outstanding dues and this month's revenue, both from summary tables."""
+        conn = self.db.connection
+        return {"outstanding": get_outstanding(conn), "month_revenue": get_month_revenue(conn, today)}
+
+    def diagnostics(self):
+        """This process's profiler snapshot (see ``profiling.Profiler``)."""
+        return profiler.snapshot()
+
+    def check_in(self, member_id, at=None, timeout=CHECKIN_TIMEOUT):
+        """Check a member in (see ``attendance.AttendanceWriter``); returns a CheckIn.
+
+        Raises KeyError for an unknown member and ValidationError if their
+        plan has lapsed, hasn't started or is unpaid. Returns once the
+        check-in is committed, together with any others queued with it.
+        """
+        return self.attendance.check_in(member_id, at, timeout)
+
+    def visits(self, member_id):
+        """(visits, first_visit, last_visit) for one member."""
+        return member_visits(self.db.connection, member_id)
+
+    def frequent_visitors(self, limit=10):
+        return frequent_visitors(self.db.connection, limit)
+
+    def heatmap(self, date_from=None, date_to=None):
+        """Check-ins by weekday and hour; see ``attendance.visit_heatmap``."""
+        return visit_heatmap(self.db.connection, date_from, date_to)
+
+    def latest_change(self, conn=None) -> int:
+        """The change log's newest sequence number; a cursor for ``changes_since``."""
+        return latest_seq(conn or self.db.connection)
+
+    def changes_since(self, seq, limit=CHANGE_FEED_LIMIT, conn=None):
+        """Change records after ``seq`` (see ``changes.changes_since``).
+
+        Members they name are dropped from the cache, so the next ``get``
+        reads them again. Raises ChangeLogGap if ``seq`` can't be replayed.
+        """
+        changes = changes_since(conn or self.db.connection, seq, limit)
+        for change in changes:
+            self.cache.discard(change.member_id)
+        return changes
+
+    def audit(self, member_id):
+        """Every change record kept for a member, newest first."""
+        return member_changes(self.db.connection, member_id)
+
+    def deleted_members(self, limit=100):
+        """Delete records (with the removed rows) of members still gone."""
+        return deleted_members(self.db.connection, limit)
+
+    def history(self, member_id):
+        """The member's plan and payment entries, newest first."""
+        return member_history(self.db.connection, member_id)
+
+    def revenue(self, period="month", date_from=None, date_to=None, by=()):
+        """Revenue per day or month from the rollups; see ``ledger.revenue``."""
+        return revenue(self.db.connection, period, date_from, date_to, by)
+
+    def reports(self, today=None, refresh=False):
+        """The pandas reports (see ``analytics.build_reports``) as DataFrames.
+
+        Reads through its own read-only connection, for use from a worker
+        thread; the result is reused until the data or the date changes,
+        or ``refresh`` is set.
+        """
+        if refresh:
+            self.report_cache.clear()
+        conn = self.db.reader()
+        try:
+            return self.report_cache.get(conn, today)
+        finally:
+            conn.close()
+
+    def export_csv(self, path, term="", status=None, date_from=None, date_to=None,
+                   progress=None, cancel=None) -> int:
+        """Stream the (optionally filtered) members to ``path``; returns the row count.
+
+        Reads through its own read-only connection, so it can run on a
+        worker thread while the UI keeps using the main one.
+        """
+        conn = self.db.reader()
+        try:
+            return export_members(conn, path, term, status, date_from, date_to, progress, cancel)
+        finally:
+            conn.close()
+
+    def import_csv(self, path, rejects=None, progress=None, cancel=None):
+        """Upsert members from the CSV at ``path``; returns an ``ImportResult``.
+
+        Writes through its own connection in batches, so it can run on a
+        worker thread without holding up the UI's reads and writes.
+        """
+        conn = self.db.writer()
+        try:
+            return import_members(conn, path, rejects, progress, cancel)
+        finally:
+            conn.close()
+            self.cache.clear()
+
+    def branch(self):
+        """This database's branch name, as other branches know it."""
+        return branch_name(self.db.connection)
+
+    def rename_branch(self, name):
+        set_branch_name(self.db.connection, name)
+
+    def sync_status(self):
+        """A SyncPeer per branch this one has exported to or merged from."""
+        return sync_peers(self.db.connection)
+
+    def export_delta(self, path, peer, full=False) -> int:
+        """Write the members changed since the last export to ``peer``; see
+        ``sync.export_delta``. Returns the row count."""
+        conn = self.db.writer()
+        try:
+            return export_delta(conn, path, peer, full)
+        finally:
+            conn.close()
+
+    def merge_delta(self, path):
+        """Apply another branch's delta file (raises ``SyncError``); returns a MergeResult."""
+        conn = self.db.writer()
+        try:
+            return merge_delta(conn, path)
+        finally:
+            conn.close()
+            self.cache.clear()
+
+    def backup(self, path, progress=None):
+        """Write a consistent copy of the live database to ``path``."""
+        backup_to(self.db, path, progress)
+
+    def snapshot(self, keep=SNAPSHOT_KEEP):
+        """Save a compressed, timestamped snapshot; returns its path."""
+        return take_snapshot(self.db, keep)
+
+    def restore(self, path, progress=None):
+        """Load a backup or snapshot over the live data (raises ``BackupError``)."""
+        try:
+            return restore_from(self.db, path, progress)
+        finally:
+            self.cache.clear()
+            self.report_cache.clear()
@@ -0,0 +1,86 @@
+"""Dashboard statistics."""
+
+import sqlite3
+from datetime import date, timedelta
+
+EXPIRING_WINDOW_DAYS = 7
+OUTSTANDING_STATUSES = ("Unpaid", "Partial")
+
+
+def _window(today=None):
+    today = today or date.today()
+    return today.isoformat(), (today + timedelta(days=EXPIRING_WINDOW_DAYS)).isoformat()
+
+
+def empty_statistics():
+    return {
+        "total": 0,
+        "active": 0,
+        "expiring": 0,
+        "outstanding": 0.0,
+        "month_revenue": 0.0,
+        "by_status": {},
+        "revenue_by_plan": {},
+    }
+
+
+def get_statistics(conn, today=None):
+    """Every dashboard metric, from one counting query plus the summary table.
+
+    Total members and the money figures come from ``member_summary``, which
+    triggers on ``customers`` keep current. Active and expiring counts
+    depend on today's date, so they are answered by range counts on the
+    ``end_date`` index, all in the same statement. This month's revenue is
+    one read of the ``revenue_monthly`` rollup.
+    """
+    today, week_later = _window(today)
+    stats = empty_statistics()
+    try:
+        total, active, expiring, month_revenue = conn.execute("""
+            SELECT
+                (SELECT coalesce(SUM(members), 0) FROM member_summary WHERE dimension = 'all'),
+                (SELECT COUNT(*) FROM customers WHERE end_date >= :today),
+                (SELECT COUNT(*) FROM customers WHERE end_date BETWEEN :today AND :week_later),
+                (SELECT coalesce(SUM(amount), 0) FROM revenue_monthly WHERE bucket = substr(:today, 1, 7))
+        """, {"today": today, "week_later": week_later}).fetchone()
+        stats.update(total=total, active=active, expiring=expiring, month_revenue=month_revenue)
+        for dimension, value, members, amount in conn.execute(
+                "SELECT dimension, value, members, amount FROM member_summary WHERE dimension != 'all' AND members != 0"):
+            if dimension == "payment_status":
+                stats["by_status"][value] = members
+                if value in OUTSTANDING_STATUSES:
+                    stats["outstanding"] += amount
+            elif dimension == "membership_type":
+                stats["revenue_by_plan"][value] = amount
+    except sqlite3.Error:
+        return empty_statistics()
+    return stats
+
+
+def get_outstanding(conn) -> float:
+    """Amount owed by Unpaid/Partial members, straight from the summary table."""
+    placeholders = ",".join("?" * len(OUTSTANDING_STATUSES))
+    row = conn.execute(f"""
+        SELECT coalesce(SUM(amount), 0) FROM member_summary
+        WHERE dimension = 'payment_status' AND value IN ({placeholders})
+    """, OUTSTANDING_STATUSES).fetchone()
+    return row[0]
+
+
+def get_month_revenue(conn, today=None) -> float:
+    """Revenue booked in the current month, from the monthly rollup."""
+    month = (today or date.today()).isoformat()[:7]
+    row = conn.execute("SELECT coalesce(SUM(amount), 0) FROM revenue_monthly WHERE bucket = ?", (month,)).fetchone()
+    return row[0]
+
+
+def stats_contribution(end_date, today=None):
+    """How much one member with this end date adds to each counter."""
+    if end_date is None:
+        return {"total": 0, "active": 0, "expiring": 0}
+    today, week_later = _window(today)
+    return {
+        "total": 1,
+        "active": int(end_date >= today),
+        "expiring": int(today <= end_date <= week_later),
+    }
@@ -0,0 +1,240 @@
+"""Branch-to-branch sync through delta files.
+
+Every member carries a uid that is the same in every branch, plus a
+version: the value of this database's Lamport clock (``sync_branch``)
+when the row last changed, and the branch that changed it (``origin``).
+Triggers keep ``sync_rows`` current on every local write; deleted members
+stay there as tombstones.
+
+``export_delta`` writes the members changed since the last export to a
+peer (found through the change log) as a gzip file of JSON lines.
+``merge_delta`` applies one in a single transaction. The higher
+(version, origin) wins, so every branch settles on the same row
+whatever order deltas arrive in and however often they are merged.
+"""
+
+import gzip
+import json
+import re
+from collections import namedtuple
+
+from gym_core.migrations import (
+    SYNC_FIELDS,
+    apply_summary_delta,
+    derived_triggers,
+    index_search_rows,
+    record_plans,
+)
+from gym_core.search import has_search_index
+from gym_core.validation import ValidationError
+
+DELTA_FORMAT = "muscletone-delta/1"
+DELTA_SUFFIX = ".delta.gz"
+BRANCH_NAME_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,32}$")
+
+# Counts from one merge; ``skipped`` rows lost to an equal or newer local version
+MergeResult = namedtuple("MergeResult", "branch inserted updated deleted skipped")
+SyncPeer = namedtuple("SyncPeer", "peer sent_seq received_at")
+
+
+class SyncError(Exception):
+    """A delta file can't be used; the message is user-facing."""
+
+
+def branch_name(conn) -> str:
+    return conn.execute("SELECT branch FROM sync_branch").fetchone()[0]
+
+
+def set_branch_name(conn, name):
+    """Rename this branch; versions written from now on carry the new name.
+
+    Name each branch once, before its first sync: peers know it by name.
+    """
+    name = (name or "").strip()
+    if not BRANCH_NAME_PATTERN.match(name):
+        raise ValidationError("Branch names are 1-32 letters, digits, '-' or '_'.")
+    with conn:
+        conn.execute("UPDATE sync_branch SET branch = ?", (name,))
+
+
+def sync_peers(conn):
+    return [SyncPeer(*row) for row in conn.execute(
+        "SELECT peer, sent_seq, received_at FROM sync_peers ORDER BY peer")]
+
+
+def export_delta(conn, path, peer, full=False) -> int:
+    """Write the members changed since the last export to ``peer``; returns
+    the row count.
+
+    The first export to a peer (or any, with ``full``) holds every member
+    and tombstone. Rows whose current version came from ``peer`` itself
+    are left out. The peer's cursor only moves once the file is written.
+    """
+    columns = ", ".join(f"c.{name}" for name in SYNC_FIELDS)
+    conn.execute("BEGIN")  # one read snapshot for the cursor and the rows
+    try:
+        branch = branch_name(conn)
+        if peer == branch:
+            raise ValidationError("Export to another branch, not this one.")
+        sent = conn.execute("SELECT sent_seq FROM sync_peers WHERE peer = ?", (peer,)).fetchone()
+        until = conn.execute("SELECT coalesce(max(seq), 0) FROM change_log").fetchone()[0]
+        if full or sent is None:
+            scope, since = "1", 0
+        else:
+            # A member's newest change_log record survives compaction, so
+            # this finds every member changed after the cursor.
+            scope, since = "s.member_id IN (SELECT member_id FROM change_log WHERE seq > :since)", sent[0]
+        cur = conn.execute(f"""
+            SELECT s.uid, s.version, s.origin, s.deleted, {columns}
+            FROM sync_rows s LEFT JOIN customers c ON c.id = s.member_id AND NOT s.deleted
+            WHERE s.origin != :peer AND {scope}
+        """, {"peer": peer, "since": since})
+        header = {"format": DELTA_FORMAT, "branch": branch, "peer": peer, "since": since, "until": until,
+                  "fields": list(SYNC_FIELDS)}
+        count = 0
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(json.dumps(header) + "\n")
+            for row in cur:
+                # Tombstones need only (uid, version, origin, deleted)
+                f.write(json.dumps(row[:4] if row[3] else row, separators=(",", ":")) + "\n")
+                count += 1
+    finally:
+        conn.rollback()
+    with conn:
+        conn.execute("""
+            INSERT INTO sync_peers (peer, sent_seq) VALUES (?, ?)
+            ON CONFLICT (peer) DO UPDATE SET sent_seq = excluded.sent_seq
+        """, (peer, until))
+    return count
+
+
+def _read_header(f, path):
+    try:
+        header = json.loads(f.readline())
+    except (ValueError, OSError, EOFError):
+        raise SyncError(f"{path} is not a branch delta file.") from None
+    if not isinstance(header, dict) or header.get("format") != DELTA_FORMAT:
+        raise SyncError(f"{path} is not a branch delta file.")
+    if header.get("fields") != list(SYNC_FIELDS):
+        raise SyncError(f"{path} was written by a different version of the app.")
+    return header
+
+
+def _rows(f, path):
+    width = 4 + len(SYNC_FIELDS)
+    for number, line in enumerate(f, start=2):
+        try:
+            row = json.loads(line)
+        except ValueError:
+            raise SyncError(f"{path} is damaged (line {number}).") from None
+        if not isinstance(row, list) or len(row) not in (4, width):
+            raise SyncError(f"{path} is damaged (line {number}).")
+        yield row + [None] * (width - len(row))
+
+
+def merge_delta(conn, path) -> MergeResult:
+    """Apply a delta file from another branch in one transaction.
+
+    Each incoming row replaces the local one only if its (version, origin)
+    is higher; merging the same file twice changes nothing. Members new
+    here are inserted with fresh local ids. The plan ledger and the change
+    log record what the merge changed, as for any other write.
+    """
+    fields = ", ".join(SYNC_FIELDS)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = _read_header(f, path)
+        source = header.get("branch")
+        if source == branch_name(conn):
+            raise SyncError(f"{path} was exported by this branch.")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"""
+                CREATE TEMP TABLE IF NOT EXISTS sync_incoming (
+                    uid TEXT PRIMARY KEY, version INTEGER, origin TEXT, deleted INTEGER,
+                    {fields}, member_id INTEGER, action TEXT
+                )
+            """)
+            conn.execute("DELETE FROM temp.sync_incoming")
+            # A later line for the same uid replaces an earlier one
+            conn.executemany(f"""
+                INSERT OR REPLACE INTO temp.sync_incoming (uid, version, origin, deleted, {fields})
+                VALUES ({", ".join("?" * (4 + len(SYNC_FIELDS)))})
+            """, _rows(f, path))
+            result = _apply_incoming(conn, source)
+        except BaseException:
+            conn.rollback()
+            raise
+    conn.commit()
+    return result
+
+
+def _apply_incoming(conn, source):
+    fields = ", ".join(SYNC_FIELDS)
+    conn.execute("UPDATE sync_branch SET applying = 1")
+    # As in importer.upsert_batch: swap the row-level search and summary
+    # triggers for one set-wise update of each, inside this transaction.
+    triggers = derived_triggers(conn)
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    search = has_search_index(conn) and any(name.startswith("customers_fts_") for name, _ in triggers)
+    summary = any(name.startswith("member_summary_") for name, _ in triggers)
+    conn.execute("""
+        UPDATE temp.sync_incoming SET member_id = s.member_id, action = CASE
+            WHEN (sync_incoming.version, sync_incoming.origin) <= (s.version, s.origin) THEN 'skip'
+            WHEN sync_incoming.deleted THEN CASE WHEN s.deleted THEN 'tombstone' ELSE 'delete' END
+            WHEN s.deleted THEN 'insert'
+            ELSE 'update' END
+        FROM sync_rows s WHERE s.uid = sync_incoming.uid
+    """)
+    conn.execute("""
+        UPDATE temp.sync_incoming SET action = CASE WHEN deleted THEN 'tombstone' ELSE 'insert' END
+        WHERE action IS NULL
+    """)
+    leaving = "id IN (SELECT member_id FROM temp.sync_incoming WHERE action IN ('update', 'delete'))"
+    if search:
+        index_search_rows(conn, leaving, remove=True)
+    if summary:
+        apply_summary_delta(conn, leaving, "-")
+    conn.execute(f"""
+        UPDATE customers SET ({fields}) = ({", ".join(f"i.{name}" for name in SYNC_FIELDS)})
+        FROM temp.sync_incoming i WHERE i.action = 'update' AND customers.id = i.member_id
+    """)
+    conn.execute("DELETE FROM customers WHERE id IN "
+                 "(SELECT member_id FROM temp.sync_incoming WHERE action = 'delete')")
+    # New members take ids above every one ever handed out here, as
+    # AUTOINCREMENT would: a deleted member's id still keys its plan
+    # history and change log records.
+    base = conn.execute("""
+        SELECT max((SELECT coalesce(max(id), 0) FROM customers),
+                   coalesce((SELECT seq FROM sqlite_sequence WHERE name = 'customers'), 0))
+    """).fetchone()[0]
+    conn.execute("UPDATE temp.sync_incoming SET member_id = ? + rowid WHERE action = 'insert'", (base,))
+    conn.execute(f"""
+        INSERT INTO customers (id, {fields})
+        SELECT member_id, {fields} FROM temp.sync_incoming WHERE action = 'insert' ORDER BY member_id
+    """)
+    written = "id IN (SELECT member_id FROM temp.sync_incoming WHERE action IN ('insert', 'update'))"
+    if search:
+        index_search_rows(conn, written)
+    if summary:
+        apply_summary_delta(conn, written)
+    for _, sql in triggers:
+        conn.execute(sql)
+    conn.execute("""
+        INSERT INTO sync_rows (uid, member_id, version, origin, deleted)
+        SELECT uid, member_id, version, origin, deleted FROM temp.sync_incoming WHERE action != 'skip'
+        ON CONFLICT (uid) DO UPDATE SET member_id = excluded.member_id, version = excluded.version,
+            origin = excluded.origin, deleted = excluded.deleted
+    """)
+    record_plans(conn, written)
+    conn.execute("""
+        UPDATE sync_branch SET applying = 0,
+            clock = max(clock, (SELECT coalesce(max(version), 0) FROM temp.sync_incoming))
+    """)
+    conn.execute("""
+        INSERT INTO sync_peers (peer, received_at) VALUES (?, CURRENT_TIMESTAMP)
+        ON CONFLICT (peer) DO UPDATE SET received_at = excluded.received_at
+    """, (source,))
+    counts = dict(conn.execute("SELECT action, COUNT(*) FROM temp.sync_incoming GROUP BY action"))
+    return MergeResult(source, counts.get("insert", 0), counts.get("update", 0),
+                       counts.get("delete", 0), counts.get("skip", 0))
@@ -0,0 +1,144 @@
+"""Seeded synthetic members for load tests, benchmarks and demo data.
+
+``generate_members`` streams rows with realistic plan, payment, trainer,
+amount and date distributions; ``load_members`` writes them in large
+``executemany`` batches with the customers indexes and derived-table
+triggers dropped for the load and rebuilt once at the end.
+"""
+
+import random
+from datetime import date, timedelta
+from itertools import islice
+
+from gym_core.migrations import DERIVED_TRIGGER_PREFIXES, rebuild_member_summary, record_plans
+from gym_core.search import has_search_index
+from gym_core.validation import MEMBER_FIELDS
+
+BATCH_SIZE = 50_000
+
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Sneha", "Vikram", "Ananya", "Rohan", "Kavya", "Arjun", "Isha",
+               "Aditya", "Pooja", "Karan", "Neha", "Siddharth", "Meera", "Nikhil", "Riya", "Varun", "Tanvi",
+               "John", "Sarah", "Mike", "Lisa", "David", "Emma", "Chris", "Anna", "Robert", "Amanda"]
+LAST_NAMES = ["Sharma", "Patil", "Kulkarni", "Deshpande", "Joshi", "Iyer", "Reddy", "Nair", "Gupta", "Mehta",
+              "Shah", "Verma", "Rao", "Pawar", "Jadhav", "Kapoor", "Menon", "Bhat", "Chopra", "Singh",
+              "Smith", "Johnson", "Wilson", "Brown", "Lee", "Davis", "Taylor", "Martinez", "Kim", "Clark"]
+EMAIL_DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "hotmail.com", "example.com"]
+
+# plan: (relative weight, length in days, list price)
+PLANS = {
+    "Basic Monthly": (30, 30, 1500),
+    "Premium Monthly": (20, 30, 2500),
+    "Gold (3-Month)": (20, 90, 6000),
+    "Silver (6-Month)": (15, 180, 8000),
+    "Bronze (Yearly)": (15, 365, 15000),
+}
+PAYMENT_WEIGHTS = {"Paid": 70, "Unpaid": 18, "Partial": 12}
+# An empty trainer means the member trains on their own
+TRAINER_WEIGHTS = {"": 35, "Trainer Mike": 18, "Trainer Lisa": 15, "Trainer David": 12,
+                   "Trainer Sarah": 12, "Trainer John": 8}
+NOTES = ["Regular member, very dedicated", "New member, needs guidance", "Student discount applied",
+         "Weight loss program", "Yoga enthusiast", "Cardio focused", "Bodybuilding competitor",
+         "Prenatal fitness", "Knee injury, avoid heavy squats", "Prefers morning slots"]
+
+MEAN_DAYS_SINCE_JOIN = 240      # start dates skew recent, like a growing gym
+MAX_DAYS_SINCE_JOIN = 4 * 365
+
+
+def generate_members(count, seed=0, today=None):
+    """Yield ``count`` member tuples in MEMBER_FIELDS order, reproducibly."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    plans, plan_weights = list(PLANS), [spec[0] for spec in PLANS.values()]
+    statuses, status_weights = list(PAYMENT_WEIGHTS), list(PAYMENT_WEIGHTS.values())
+    trainers, trainer_weights = list(TRAINER_WEIGHTS), list(TRAINER_WEIGHTS.values())
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        plan = rng.choices(plans, plan_weights)[0]
+        _, days, price = PLANS[plan]
+        status = rng.choices(statuses, status_weights)[0]
+        if status == "Partial":
+            amount = round(price * rng.uniform(0.3, 0.7), -2)
+        elif rng.random() < 0.15:
+            amount = price * 0.9         # promotional discount
+        else:
+            amount = price
+        start = today - timedelta(days=min(int(rng.expovariate(1 / MEAN_DAYS_SINCE_JOIN)), MAX_DAYS_SINCE_JOIN))
+        end = start + timedelta(days=days)
+        email = "" if rng.random() < 0.1 else f"{first.lower()}.{last.lower()}{i}@{rng.choice(EMAIL_DOMAINS)}"
+        yield (
+            f"{first} {last}",
+            f"{rng.randint(6, 9)}{rng.randint(0, 999999999):09d}",
+            email,
+            start.isoformat(),
+            end.isoformat(),
+            plan,
+            status,
+            rng.choices(trainers, trainer_weights)[0],
+            float(amount),
+            rng.choice(NOTES) if rng.random() < 0.2 else "",
+        )
+
+
+def insert_members(conn, rows):
+    """Insert member tuples (MEMBER_FIELDS order) with one executemany, and
+    record their plans in the ledger; no commit."""
+    last_id = conn.execute("SELECT coalesce(max(id), 0) FROM customers").fetchone()[0]
+    conn.executemany(
+        f"INSERT INTO customers ({', '.join(MEMBER_FIELDS)}) VALUES ({', '.join('?' * len(MEMBER_FIELDS))})",
+        rows)
+    record_plans(conn, f"id > {int(last_id)}")
+
+
+def _drop_deferred(conn):
+    """Drop customers indexes and derived-table triggers; return their DDL."""
+    objects = [(kind, name, sql) for kind, name, sql in conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE tbl_name='customers' AND sql IS NOT NULL "
+        "AND type IN ('index', 'trigger')")
+        if kind == "index" or name.startswith(DERIVED_TRIGGER_PREFIXES)]
+    for kind, name, _ in objects:
+        conn.execute(f"DROP {kind.upper()} {name}")
+    return objects
+
+
+def _restore_deferred(conn, objects):
+    for _, _, sql in objects:
+        conn.execute(sql)
+    names = {name for _, name, _ in objects}
+    if has_search_index(conn) and any(name.startswith("customers_fts_") for name in names):
+        conn.execute("INSERT INTO customers_fts(customers_fts) VALUES ('rebuild')")
+    if any(name.startswith("member_summary_") for name in names):
+        rebuild_member_summary(conn)
+
+
+def load_members(conn, count, seed=0, today=None, batch_size=BATCH_SIZE, defer_indexes=True, progress=None):
+    """Insert ``count`` synthetic members in batches; returns the number loaded.
+
+    Each batch is its own transaction. With ``defer_indexes`` the customers
+    indexes and the search/summary triggers are dropped first and rebuilt
+    in one pass at the end, which is far cheaper than maintaining them row
+    by row. ``progress(loaded, count)`` is called after every batch.
+    """
+    deferred = []
+    if defer_indexes:
+        with conn:
+            deferred = _drop_deferred(conn)
+    conn.execute("PRAGMA synchronous=OFF")
+    loaded = 0
+    try:
+        rows = generate_members(count, seed, today)
+        while loaded < count:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            with conn:
+                insert_members(conn, batch)
+            loaded += len(batch)
+            if progress:
+                progress(loaded, count)
+    finally:
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if deferred:
+            with conn:
+                _restore_deferred(conn, deferred)
+            conn.execute("PRAGMA optimize")
+    return loaded
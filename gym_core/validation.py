@@ -0,0 +1,84 @@
+"""Validation for member and plan fields."""
+
+from datetime import datetime
+
+MEMBERSHIP_TYPES = ["Premium Monthly", "Gold (3-Month)", "Silver (6-Month)", "Bronze (Yearly)", "Basic Monthly"]
+PAYMENT_STATUSES = ["Paid", "Unpaid", "Partial"]
+
+MEMBER_FIELDS = ("name", "phone", "email", "start_date", "end_date",
+                 "membership_type", "payment_status", "trainer", "amount", "notes")
+PLAN_FIELDS = ("start_date", "end_date", "membership_type", "payment_status", "trainer", "amount")
+
+
+class ValidationError(ValueError):
+    """A member or plan field failed validation; the message is user-facing."""
+
+
+def validate_date(s: str) -> bool:
+    try:
+        datetime.fromisoformat(s)
+        return True
+    except ValueError:
+        return False
+
+
+def validate_email(email: str) -> bool:
+    return "@" in email and "." in email.split("@")[-1] if email else True
+
+
+def validate_phone(phone: str) -> bool:
+    return phone.replace("-", "").replace(" ", "").replace("(", "").replace(")", "").isdigit() if phone else True
+
+
+def parse_dates(start_date: str, end_date: str):
+    try:
+        start_dt = datetime.fromisoformat(start_date)
+        end_dt = datetime.fromisoformat(end_date)
+        return start_dt, end_dt
+    except ValueError:
+        return None, None
+
+
+def _clean(fields, names):
+    cleaned = {}
+    for name in names:
+        value = fields.get(name)
+        cleaned[name] = value.strip() if isinstance(value, str) else value
+    return cleaned
+
+
+def clean_plan(fields) -> dict:
+    """Validate plan fields and return them stripped, with amount as a float."""
+    plan = _clean(fields, PLAN_FIELDS)
+    for name in ("start_date", "end_date", "membership_type", "payment_status", "trainer"):
+        plan[name] = plan[name] or ""
+
+    if not (validate_date(plan["start_date"]) and validate_date(plan["end_date"])):
+        raise ValidationError("Dates must be in YYYY-MM-DD format.")
+    start_dt, end_dt = parse_dates(plan["start_date"], plan["end_date"])
+    if start_dt is None or end_dt is None:
+        raise ValidationError("Invalid date format.")
+    if end_dt < start_dt:
+        raise ValidationError("End date cannot be before start date.")
+
+    try:
+        plan["amount"] = float(plan["amount"] or 0)
+    except (TypeError, ValueError):
+        raise ValidationError("Amount must be a valid number.") from None
+    return plan
+
+
+def clean_member(fields) -> dict:
+    """Validate member fields and return them stripped, with amount as a float."""
+    member = _clean(fields, MEMBER_FIELDS)
+    for name in ("name", "phone", "email", "notes"):
+        member[name] = member[name] or ""
+
+    if not member["name"]:
+        raise ValidationError("Name is required.")
+    if not validate_email(member["email"]):
+        raise ValidationError("Please enter a valid email address.")
+    if not validate_phone(member["phone"]):
+        raise ValidationError("Please enter a valid phone number.")
+    member.update(clean_plan(member))
+    return member
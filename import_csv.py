@@ -0,0 +1,54 @@
+"""
+Bulk member import for MuscleTone Fitness
+Loads a CSV (such as a branch's member spreadsheet or an export from this
+app), updating members that match on phone or email and adding the rest:
+
+    python import_csv.py members.csv
+    python import_csv.py members.csv --db /tmp/load.db --rejects bad_rows.csv
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+
+from gym_core import ConnectionManager, MemberRepository, ValidationError
+from gym_core.importer import rejects_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import members from a CSV file")
+    parser.add_argument("csv", help="CSV file with a header row (name, phone, email, start_date, ...)")
+    parser.add_argument("--db", help="database file (default: the app's database)")
+    parser.add_argument("--rejects", help="where to write rejected rows (default: <csv>.rejects.csv)")
+    args = parser.parse_args(argv)
+
+    repo = MemberRepository(ConnectionManager(args.db)) if args.db else MemberRepository()
+    rejects = args.rejects or rejects_path(args.csv)
+
+    def report(done, total):
+        print(f"\r   {done * 100 // max(total, 1)}% read", end="", flush=True)
+
+    start = time.perf_counter()
+    try:
+        repo.init()
+        result = repo.import_csv(args.csv, rejects, progress=report)
+    except ValidationError as e:
+        print(f"❌ {e}")
+        return 1
+    except (OSError, UnicodeDecodeError, sqlite3.Error) as e:
+        print(f"❌ Import failed: {e}")
+        return 1
+    finally:
+        repo.db.close()
+    elapsed = time.perf_counter() - start
+    rows = result.inserted + result.updated + result.rejected
+    print(f"\n✅ {result.inserted:,} added, {result.updated:,} updated in {elapsed:.1f}s "
+          f"({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    if result.rejected:
+        print(f"⚠️ {result.rejected:,} rows rejected, see {rejects}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,69 +1,89 @@
+import time
+STARTED_AT = time.time()  # before the other imports, so the startup report counts them
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import sqlite3
 from datetime import datetime, timedelta
-import csv
-import shutil
+import json
 import os
+import queue
+import sys
+import threading
+from concurrent import futures
 from tkinter import font
 
-# ---------------- Database ----------------
-DB_FOLDER = os.path.join(os.path.expanduser("~"), "MuscleToneFitness")
-DB_NAME = os.path.join(DB_FOLDER, "gym_data.db")
+from gym_core import (
+    MEMBERSHIP_TYPES,
+    PAYMENT_STATUSES,
+    AnalyticsUnavailable,
+    BackupError,
+    BackupScheduler,
+    ExportCancelled,
+    FileTransport,
+    MemberRepository,
+    ReminderEngine,
+    ChangeLogGap,
+    ValidationError,
+    db,
+)
+from gym_core.attendance import HEATMAP_DAYS, WEEKDAYS
+from gym_core.backup import snapshot_folder
+from gym_core.changes import CHANGE_FEED_LIMIT
+from gym_core.importer import rejects_path
+from gym_core.profiling import profiler
+from gym_core.stats import empty_statistics, stats_contribution
+
+# Set GYM_SERVER (e.g. http://192.168.1.10:8765) to work against a shared
+# server started with serve.py instead of the local database file, and
+# GYM_TOKEN to the server's token if it has one.
+SERVER_URL = os.environ.get("GYM_SERVER")
+if SERVER_URL:
+    from gym_core.remote import TOKEN_ENV, RemoteRepository
+    repo = RemoteRepository(SERVER_URL, os.environ.get(TOKEN_ENV))
+else:
+    repo = MemberRepository(db)
+
+# ---------------- Startup Timing ----------------
+# Set GYM_STARTUP_REPORT to a file path to time a launch: the app writes
+# how long each startup phase took there and closes once the member list
+# has loaded (``python benchmark.py --startup`` does this for you).
+STARTUP_REPORT = os.environ.get("GYM_STARTUP_REPORT")
+startup_marks = {}
+
+def write_startup_report():
+    """Save the startup marks to STARTUP_REPORT, then close the window"""
+    report = {
+        "started": STARTED_AT,
+        "marks": {phase: round((at - STARTED_AT) * 1000, 1) for phase, at in startup_marks.items()},
+        "wall": dict(startup_marks),
+        "frozen": bool(getattr(sys, "frozen", False)),
+        "server": bool(SERVER_URL),
+    }
+    try:
+        with open(STARTUP_REPORT, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    finally:
+        root.after(0, root.destroy)
+
+def mark_startup(phase):
+    """Note the first time startup reaches ``phase``; it shows up as a Diagnostics timing too"""
+    if phase in startup_marks:
+        return
+    startup_marks[phase] = time.time()
+    profiler.record("startup", phase, (startup_marks[phase] - STARTED_AT) * 1000)
+    if phase == "member_list" and STARTUP_REPORT:
+        write_startup_report()
 
-if not os.path.exists(DB_FOLDER):
-    os.makedirs(DB_FOLDER)
+mark_startup("imports")
 
+# ---------------- Database ----------------
 def init_db():
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            c = conn.cursor()
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS customers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    phone TEXT,
-                    email TEXT,
-                    start_date TEXT NOT NULL,
-                    end_date TEXT NOT NULL,
-                    membership_type TEXT,
-                    payment_status TEXT,
-                    trainer TEXT,
-                    amount REAL DEFAULT 0,
-                    notes TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            # Add amount column if it doesn't exist (for existing databases)
-            try:
-                c.execute("ALTER TABLE customers ADD COLUMN amount REAL DEFAULT 0")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
+        repo.init()
     except sqlite3.Error as e:
         messagebox.showerror("Database Error", f"Failed to initialize database: {e}")
 
-# ---------------- Validation ----------------
-def validate_date(s: str) -> bool:
-    try:
-        datetime.fromisoformat(s)
-        return True
-    except ValueError:
-        return False
-
-def validate_email(email: str) -> bool:
-    return "@" in email and "." in email.split("@")[-1] if email else True
-
-def validate_phone(phone: str) -> bool:
-    return phone.replace("-", "").replace(" ", "").replace("(", "").replace(")", "").isdigit() if phone else True
-
-def parse_dates(start_date: str, end_date: str):
-    try:
-        start_dt = datetime.fromisoformat(start_date)
-        end_dt = datetime.fromisoformat(end_date)
-        return start_dt, end_dt
-    except ValueError:
-        return None, None
-
 # ---------------- App State ----------------
 class GymApp:
     def __init__(self):
@@ -152,32 +172,14 @@ def show_notification(message, msg_type="info"):
     notification.after(3000, notification.destroy)
 
 # ---------------- Statistics Functions ----------------
+@profiler.timed()
 def get_statistics():
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            c = conn.cursor()
-            
-            # Total customers
-            c.execute("SELECT COUNT(*) FROM customers")
-            total = c.fetchone()[0]
-            
-            # Active memberships (not expired)
-            today = datetime.today().date().isoformat()
-            c.execute("SELECT COUNT(*) FROM customers WHERE end_date >= ?", (today,))
-            active = c.fetchone()[0]
-            
-            # Expiring soon (within 7 days)
-            week_later = (datetime.today().date() + timedelta(days=7)).isoformat()
-            c.execute("SELECT COUNT(*) FROM customers WHERE end_date BETWEEN ? AND ?", (today, week_later))
-            expiring = c.fetchone()[0]
-            
-            return {
-                "total": total,
-                "active": active,
-                "expiring": expiring
-            }
+        return repo.stats()
     except sqlite3.Error:
-        return {"total": 0, "active": 0, "expiring": 0}
+        return empty_statistics()
+
+dashboard_stats = empty_statistics()
 
 def create_stats_card(parent, title, value, color):
     frame = tk.Frame(parent, bg=color, relief="flat", bd=0)
@@ -194,85 +196,63 @@ def create_stats_card(parent, title, value, color):
     return frame, value_label
 
 # ---------------- CRUD Functions ----------------
+@profiler.timed()
 def add_or_update_customer():
     selected_id = app_state.get_selected_id()
-    name = name_var.get().strip()
-    phone = phone_var.get().strip()
-    email = email_var.get().strip()
-    start_date = start_var.get().strip()
-    end_date = end_var.get().strip()
-    mtype = membership_var.get().strip()
-    pstatus = payment_var.get().strip()
-    trainer = trainer_var.get().strip()
-    amount = amount_var.get().strip() or "0"
-    notes = notes_text.get("1.0", tk.END).strip()
-
-    # Enhanced validation
-    if not name:
-        messagebox.showerror("Validation Error", "Name is required.")
-        return
-    
-    if not validate_email(email):
-        messagebox.showerror("Validation Error", "Please enter a valid email address.")
-        return
-        
-    if not validate_phone(phone):
-        messagebox.showerror("Validation Error", "Please enter a valid phone number.")
-        return
-    
-    if not (validate_date(start_date) and validate_date(end_date)):
-        messagebox.showerror("Validation Error", "Dates must be in YYYY-MM-DD format.")
-        return
-    
-    start_dt, end_dt = parse_dates(start_date, end_date)
-    if start_dt is None or end_dt is None:
-        messagebox.showerror("Validation Error", "Invalid date format.")
-        return
-    if start_dt is not None and end_dt is not None and end_dt < start_dt:
-        messagebox.showerror("Validation Error", "End date cannot be before start date.")
-        return
-    
-    # Validate amount
-    try:
-        float(amount)
-    except ValueError:
-        messagebox.showerror("Validation Error", "Amount must be a valid number.")
-        return
+    fields = {
+        "name": name_var.get(),
+        "phone": phone_var.get(),
+        "email": email_var.get(),
+        "start_date": start_var.get(),
+        "end_date": end_var.get(),
+        "membership_type": membership_var.get(),
+        "payment_status": payment_var.get(),
+        "trainer": trainer_var.get(),
+        "amount": amount_var.get(),
+        "notes": notes_text.get("1.0", tk.END),
+    }
 
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            c = conn.cursor()
-            if selected_id is None:
-                c.execute("""INSERT INTO customers
-                    (name, phone, email, start_date, end_date, membership_type, payment_status, trainer, amount, notes)
-                    VALUES (?,?,?,?,?,?,?,?,?,?)""",
-                    (name, phone, email, start_date, end_date, mtype, pstatus, trainer, float(amount), notes))
-                show_notification("Customer added successfully!", "success")
-            else:
-                c.execute("""UPDATE customers SET
-                    name=?, phone=?, email=?, start_date=?, end_date=?, membership_type=?, payment_status=?, trainer=?, amount=?, notes=?
-                    WHERE id=?""",
-                    (name, phone, email, start_date, end_date, mtype, pstatus, trainer, float(amount), notes, selected_id))
-                show_notification("Customer updated successfully!", "success")
-                app_state.set_selected_id(None)
-                add_btn.config(text="Add Member")
+        if selected_id is None:
+            change = repo.create(fields)
+            show_notification("Customer added successfully!", "success")
+        else:
+            change = repo.update(int(selected_id), fields)
+            show_notification("Customer updated successfully!", "success")
+            app_state.set_selected_id(None)
+            add_btn.config(text="Add Member")
         
         clear_form()
-        load_customers(search_var.get())
-        update_dashboard()
+        propagate_change(change)
         
+    except ValidationError as e:
+        messagebox.showerror("Validation Error", str(e))
+    except KeyError:
+        messagebox.showerror("Database Error", "This member no longer exists.")
     except sqlite3.Error as e:
         messagebox.showerror("Database Error", f"Failed to save customer: {e}")
 
-def update_plan():
-    selected = tree.focus()
+def selected_member(action):
+    """The Member behind the focused list row, or None after telling the user why"""
+    selected = tree.focus() if tree is not None else ""
     if not selected:
-        messagebox.showwarning("Selection Required", "Please select a customer to update plan.")
+        messagebox.showwarning("Selection Required", f"Please select a customer to {action}.")
+        return None
+    try:
+        member = repo.get(int(selected))
+    except sqlite3.Error as e:
+        messagebox.showerror("Database Error", f"Failed to load member: {e}")
+        return None
+    if member is None:
+        messagebox.showwarning("Not Found", "This member no longer exists.")
+    return member
+
+def update_plan():
+    member = selected_member("update plan")
+    if member is None:
         return
-    
-    values = tree.item(selected, "values")
-    cid = values[0]
-    customer_name = values[1]
+    cid = member.id
+    customer_name = member.name
     
     # Create popup window
     popup = tk.Toplevel(root)
@@ -291,7 +271,7 @@ def update_plan():
     # Variables for popup
     p_start = tk.StringVar(value=datetime.today().date().strftime("%Y-%m-%d"))
     p_end = tk.StringVar(value=(datetime.today().date() + timedelta(days=30)).strftime("%Y-%m-%d"))
-    p_membership = tk.StringVar(value=membership_types[0])
+    p_membership = tk.StringVar(value=MEMBERSHIP_TYPES[0])
     p_payment = tk.StringVar(value="Unpaid")
     p_trainer = tk.StringVar()
     p_amount = tk.StringVar()
@@ -305,8 +285,8 @@ def update_plan():
     fields = [
         ("Start Date:", tk.Entry(form, textvariable=p_start, width=30)),
         ("End Date:", tk.Entry(form, textvariable=p_end, width=30)),
-        ("Membership Type:", ttk.Combobox(form, textvariable=p_membership, values=membership_types, state="readonly", width=28)),
-        ("Payment Status:", ttk.Combobox(form, textvariable=p_payment, values=payment_statuses, state="readonly", width=28)),
+        ("Membership Type:", ttk.Combobox(form, textvariable=p_membership, values=MEMBERSHIP_TYPES, state="readonly", width=28)),
+        ("Payment Status:", ttk.Combobox(form, textvariable=p_payment, values=PAYMENT_STATUSES, state="readonly", width=28)),
         ("Trainer:", tk.Entry(form, textvariable=p_trainer, width=30)),
         ("Amount:", tk.Entry(form, textvariable=p_amount, width=30))
     ]
@@ -318,44 +298,25 @@ def update_plan():
     form.grid_columnconfigure(1, weight=1)
     
     def save_plan():
-        start_date = p_start.get().strip()
-        end_date = p_end.get().strip()
-        mtype = p_membership.get().strip()
-        pstatus = p_payment.get().strip()
-        trainer = p_trainer.get().strip()
-        amount = p_amount.get().strip() or "0"
-        
-        # Validate
-        if not (validate_date(start_date) and validate_date(end_date)):
-            messagebox.showerror("Error", "Invalid date format.")
-            return
-        
-        start_dt, end_dt = parse_dates(start_date, end_date)
-        if start_dt is not None and end_dt is not None and end_dt < start_dt:
-            messagebox.showerror("Error", "End date cannot be before start date.")
-            return
-        if start_dt is None or end_dt is None:
-            messagebox.showerror("Error", "Invalid date format.")
-            return        
-        try:
-            float(amount)
-        except ValueError:
-            messagebox.showerror("Error", "Amount must be a valid number.")
-            return
-        
+        plan = {
+            "start_date": p_start.get(),
+            "end_date": p_end.get(),
+            "membership_type": p_membership.get(),
+            "payment_status": p_payment.get(),
+            "trainer": p_trainer.get(),
+            "amount": p_amount.get(),
+        }
         try:
-            with sqlite3.connect(DB_NAME) as conn:
-                c = conn.cursor()
-                c.execute("""UPDATE customers SET
-                    start_date=?, end_date=?, membership_type=?, payment_status=?, trainer=?, amount=?
-                    WHERE id=?""",
-                    (start_date, end_date, mtype, pstatus, trainer, float(amount), cid))
-            
-            show_notification("Plan updated successfully!", "success")
-            popup.destroy()
-            load_customers(search_var.get())
-            update_dashboard()
+            with profiler.span("update_plan"):
+                change = repo.renew_plan(cid, plan)
+                show_notification("Plan updated successfully!", "success")
+                popup.destroy()
+                propagate_change(change)
             
+        except ValidationError as e:
+            messagebox.showerror("Error", str(e))
+        except KeyError:
+            messagebox.showerror("Error", "This member no longer exists.")
         except sqlite3.Error as e:
             messagebox.showerror("Error", f"Failed to update: {e}")
     
@@ -367,28 +328,39 @@ def update_plan():
     create_modern_button(btn_frame, "Cancel", popup.destroy, COLORS["gray"]).pack(side="left", padx=10)
 
 def delete_customer():
-    selected = tree.focus()
-    if not selected:
-        messagebox.showwarning("Selection Required", "Please select a customer to delete.")
+    member = selected_member("delete")
+    if member is None:
         return
     
-    values = tree.item(selected, "values")
-    cid = values[0]
-    
-    if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{values[1]}'?\n\nThis action cannot be undone."):
+    if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{member.name}'?\n\nThis action cannot be undone."):
         try:
-            with sqlite3.connect(DB_NAME) as conn:
-                c = conn.cursor()
-                c.execute("DELETE FROM customers WHERE id=?", (cid,))
-            
-            show_notification("Customer deleted successfully!", "success")
-            clear_form()
-            load_customers(search_var.get())
-            update_dashboard()
+            with profiler.span("delete_customer"):
+                change = repo.delete(member.id)
+                show_notification("Customer deleted successfully!", "success")
+                clear_form()
+                propagate_change(change)
             
+        except KeyError:
+            messagebox.showerror("Database Error", "This member no longer exists.")
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Failed to delete customer: {e}")
 
+def apply_member_change(op, member_id, row=None):
+    """Patch the member list, or the results waiting for its tab, for one change"""
+    if member_list is not None:
+        member_list.apply_change(op, member_id, row)
+    elif waiting_pager is not None:
+        waiting_pager.apply_change(repo.connection, op, member_id, row)
+
+def propagate_change(change):
+    """Patch the member list and dashboard for one MemberChange."""
+    change_watcher.own(change.seq)
+    try:
+        apply_member_change(change.op, change.member_id, change.row)
+    except sqlite3.Error as e:
+        messagebox.showerror("Database Error", f"Failed to refresh member list: {e}")
+    adjust_dashboard(change.old_end_date, change.row.end_date if change.row else None)
+
 def configure_tree_tags():
     tree.tag_configure("even", background="#F8F9FA")
     tree.tag_configure("odd", background="#FFFFFF")
@@ -396,61 +368,254 @@ def configure_tree_tags():
     tree.tag_configure("expired", background="#F8D7DA", foreground="#721C24")
     tree.tag_configure("active", background="#D4EDDA", foreground="#155724")
 
-def load_customers(search=""):
-    for item in tree.get_children():
-        tree.delete(item)
-    
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            c = conn.cursor()
-            if search and search != "Search by name, phone, email, membership type...":
-                query = f"%{search}%"
-                c.execute("""SELECT id,name,phone,email,start_date,end_date,membership_type,payment_status,trainer,amount 
-                    FROM customers 
-                    WHERE name LIKE ? OR phone LIKE ? OR email LIKE ? OR membership_type LIKE ? OR payment_status LIKE ? OR trainer LIKE ?
-                    ORDER BY id DESC""",
-                    (query, query, query, query, query, query))
-            else:
-                c.execute("""SELECT id,name,phone,email,start_date,end_date,membership_type,payment_status,trainer,amount 
-                             FROM customers ORDER BY id DESC""")
-            rows = c.fetchall()
-    except sqlite3.Error as e:
-        messagebox.showerror("Database Error", f"Failed to load customers: {e}")
-        return
+# ---------------- Member List ----------------
+PLACEHOLDER_TEXT = "Search by name, phone, email, membership type..."
+SEARCH_DELAY_MS = 250
 
-    today = datetime.today().date()
-    for idx, row in enumerate(rows):
+VISIBLE_ROW_BUFFER = 2
+
+STATUS_CHOICES = {
+    "All Members": None,
+    "Active": "active",
+    "Expiring in 7 days": "expiring",
+    "Expired": "expired",
+}
+
+@profiler.timed("load_customers")
+def fetch_customers(conn, search="", status=None):
+    if search == PLACEHOLDER_TEXT:
+        search = ""
+    pager = repo.pager(search, status, conn)
+    pager.rows(conn, 0, pager.page_size)  # warm the first page off the UI thread
+    return pager
+
+def format_customer(member):
+    """Treeview values and tags for one Member (days_left comes from SQL)."""
+    amount = f"Rs{member.amount:.2f}" if member.amount is not None else "Rs 0.00"
+    values = [member.id, member.name, member.phone, member.email, member.start_date, member.end_date,
+              member.membership_type, member.payment_status, member.trainer, amount]
+    days_left = member.days_left
+    if days_left is None:
+        return values + ["Invalid date"], ()
+
+    if days_left > 0:
+        display_days = f"Active ({days_left}d left)"
+    elif days_left == 0:
+        display_days = "Expires today!"
+    else:
+        display_days = f"Expired ({abs(days_left)}d ago)"
+
+    # Tags based on status
+    return values + [display_days], (member.status,)
+
+class VirtualMemberList:
+    """Keeps only the rows in view in the Treeview and pages the rest in.
+
+    The Treeview never holds more than a screenful of items (keyed by
+    member id); the scrollbar is driven by the pager's total instead of
+    the Treeview's own contents, and rows are fetched from the pager as
+    the window moves.
+    """
+
+    def __init__(self, tree, scrollbar, status_label):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.status_label = status_label
+        self.pager = None
+        self.offset = 0
+        self._rendered = {}
+        scrollbar.configure(command=self.on_scroll)
+        tree.bind("<MouseWheel>", self.on_mousewheel)
+        tree.bind("<Configure>", lambda e: self.render())
+        tree.bind("<Up>", lambda e: self.step_focus(-1))
+        tree.bind("<Down>", lambda e: self.step_focus(1))
+        tree.bind("<Prior>", lambda e: self.scroll_by(-self.visible_rows()) or "break")
+        tree.bind("<Next>", lambda e: self.scroll_by(self.visible_rows()) or "break")
+
+    def show(self, pager):
+        self.pager = pager
+        self.offset = 0
+        self.render()
+
+    def visible_rows(self):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        return max(1, (self.tree.winfo_height() - row_height) // row_height)
+
+    def scroll_to(self, offset):
+        if self.pager is None:
+            return
+        offset = max(0, min(offset, self.pager.total - self.visible_rows()))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+
+    def on_scroll(self, action, amount, unit=None):
+        if self.pager is None:
+            return
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.pager.total))
+        elif action == "scroll":
+            step = self.visible_rows() if unit == "pages" else 1
+            self.scroll_by(int(amount) * step)
+
+    def on_mousewheel(self, event):
+        self.scroll_by(int(-3 * (event.delta / 120)))
+        return "break"
+
+    def step_focus(self, direction):
+        items = self.tree.get_children()
+        focus = self.tree.focus()
+        visible = self.visible_rows()
+        at_edge = not items or focus not in items or (
+            items.index(focus) == 0 if direction < 0 else items.index(focus) >= min(len(items), visible) - 1)
+        if not at_edge:
+            return None
+        before = self.offset
+        self.scroll_by(direction)
+        if self.offset != before:
+            items = self.tree.get_children()
+            target = items[0] if direction < 0 else items[min(len(items), visible) - 1]
+            self.tree.focus(target)
+            self.tree.selection_set(target)
+        return "break"
+
+    def apply_change(self, op, member_id, row=None):
+        """Reflect one inserted, updated or deleted member without a reload."""
+        if self.pager is None:
+            return
+        self.pager.apply_change(repo.connection, op, member_id, row)
+        self.render()
+
+    @profiler.timed("member_list.render")
+    def render(self):
+        if self.pager is None:
+            return
+        visible = self.visible_rows()
         try:
-            end_date = datetime.fromisoformat(row[5]).date()
-            start_date = datetime.fromisoformat(row[4]).date()
-            days_left = (end_date - today).days
-            duration = (end_date - start_date).days
-            
-            if days_left > 0:
-                display_days = f"Active ({days_left}d left)"
-            elif days_left == 0:
-                display_days = "Expires today!"
-            else:
-                display_days = f"Expired ({abs(days_left)}d ago)"
-            
-            payment_status = row[7]
-            amount = f"Rs{row[9]:.2f}" if row[9] is not None else "Rs 0.00"
-            
-            values = list(row[:7]) + [payment_status, row[8], amount, display_days]
-            item_id = tree.insert("", "end", values=values)
-            
-            # Apply tags based on status
-            if days_left < 0:
-                tree.item(item_id, tags=("expired",))
-            elif days_left <= 7:
-                tree.item(item_id, tags=("expiring",))
-            elif days_left > 7:
-                tree.item(item_id, tags=("active",))
-            else:
-                tree.item(item_id, tags=("even" if idx % 2 == 0 else "odd",))
-                
-        except ValueError:
-            continue
+            rows = self.pager.rows(repo.connection, self.offset, self.offset + visible + VISIBLE_ROW_BUFFER)
+        except sqlite3.Error as e:
+            messagebox.showerror("Database Error", f"Failed to load customers: {e}")
+            return
+
+        # Only touch items that appeared, disappeared, changed or moved
+        wanted = [str(member.id) for member in rows]
+        stale = set(self.tree.get_children()) - set(wanted)
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                self._rendered.pop(iid, None)
+        for index, row in enumerate(rows):
+            iid = wanted[index]
+            formatted = format_customer(row)
+            if iid not in self._rendered:
+                self.tree.insert("", index, iid=iid, values=formatted[0], tags=formatted[1])
+            elif self._rendered[iid] != formatted:
+                self.tree.item(iid, values=formatted[0], tags=formatted[1])
+            self._rendered[iid] = formatted
+        if self.tree.get_children() != tuple(wanted):
+            for index, iid in enumerate(wanted):
+                self.tree.move(iid, "", index)
+        self.tree.yview_moveto(0)
+
+        total = self.pager.total
+        if total:
+            self.scrollbar.set(self.offset / total, min(self.offset + visible, total) / total)
+            self.status_label.config(
+                text=f"Showing {self.offset + 1}-{min(self.offset + visible, total)} of {total} members")
+        else:
+            self.scrollbar.set(0, 1)
+            self.status_label.config(text="No members found")
+
+class SearchController:
+    """Debounces list queries and runs them on a background thread.
+
+    Only the newest request matters: older queued requests are skipped, a
+    query still running when a newer one arrives is interrupted, and any
+    result that is out of date by the time it finishes is dropped instead
+    of being rendered.
+    """
+
+    def __init__(self, widget, on_results, delay_ms=SEARCH_DELAY_MS):
+        self.widget = widget
+        self.on_results = on_results
+        self.delay_ms = delay_ms
+        self._requests = queue.Queue()
+        self._generation = 0
+        self._after_id = None
+        self._last_query = None
+        self._conn = None
+        self._busy = False
+        self._thread = None
+
+    def submit(self, term, status=None, immediate=False):
+        """Queue a query for ``term``/``status``; typing only fires after a pause."""
+        if term == PLACEHOLDER_TEXT:
+            term = ""
+        query = (term, status)
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        if immediate:
+            self._start(query)
+        elif query != self._last_query:
+            self._after_id = self.widget.after(self.delay_ms, self._start, query)
+
+    def _start(self, query):
+        self._after_id = None
+        self._last_query = query
+        self._generation += 1
+        self._requests.put((self._generation, query))
+        if self._thread is None:
+            # Started by the first query, which finish_startup runs after
+            # init_db, so nothing opens the database before the first paint
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        if self._busy and self._conn is not None:
+            self._conn.interrupt()
+
+    def _run(self):
+        self._conn = repo.reader()
+        while True:
+            generation, query = self._requests.get()
+            # Collapse a backlog down to its newest request
+            while not self._requests.empty():
+                generation, query = self._requests.get_nowait()
+            if generation != self._generation:
+                continue
+            self._busy = True
+            try:
+                pager = fetch_customers(self._conn, *query)
+            except sqlite3.OperationalError as e:
+                if generation != self._generation:
+                    continue
+                if str(e) == "interrupted":
+                    # Caught by an interrupt meant for the previous query
+                    self._requests.put((generation, query))
+                else:
+                    self.widget.after(0, self._report_error, e)
+                continue
+            except sqlite3.Error as e:
+                self.widget.after(0, self._report_error, e)
+                continue
+            finally:
+                self._busy = False
+            self.widget.after(0, self._deliver, generation, pager)
+
+    def _deliver(self, generation, pager):
+        if generation == self._generation:
+            self.on_results(pager)
+
+    def _report_error(self, error):
+        messagebox.showerror("Database Error", f"Failed to load customers: {error}")
+
+def selected_status():
+    return STATUS_CHOICES.get(status_var.get())
+
+def load_customers(search=""):
+    search_controller.submit(search, selected_status(), immediate=True)
 
 def clear_form():
     app_state.set_selected_id(None)
@@ -460,65 +625,215 @@ def clear_form():
     today = datetime.today().date()
     start_var.set(today.strftime("%Y-%m-%d"))
     end_var.set((today + timedelta(days=30)).strftime("%Y-%m-%d"))
-    membership_var.set(membership_types[0])
-    payment_var.set(payment_statuses[0])
+    membership_var.set(MEMBERSHIP_TYPES[0])
+    payment_var.set(PAYMENT_STATUSES[0])
     trainer_var.set("")
     amount_var.set("")
-    notes_text.delete("1.0", tk.END)
-    add_btn.config(text="Add Member")
+    if notes_text is not None:
+        notes_text.delete("1.0", tk.END)
+        add_btn.config(text="Add Member")
 
+@profiler.timed()
 def on_row_select(event):
-    selected = tree.focus()
-    if not selected:
-        return
-    values = tree.item(selected, "values")
-    if len(values) < 10:
+    member = selected_member("edit")
+    if member is None:
         return
+    tabs.build(form_tab)
     
-    app_state.set_selected_id(values[0])
-    selected_id = values[0]
-    name_var.set(values[1] if len(values) > 1 else "")
-    phone_var.set(values[2] if len(values) > 2 else "")
-    email_var.set(values[3] if len(values) > 3 else "")
-    start_var.set(values[4] if len(values) > 4 else "")
-    end_var.set(values[5] if len(values) > 5 else "")
-    membership_var.set(values[6] if len(values) > 6 else membership_types[0])
-    payment_clean = values[7] if len(values) > 7 else payment_statuses[0]
-    payment_var.set(payment_clean)
-    trainer_var.set(values[8] if len(values) > 8 else "")
-    amount_clean = values[9].replace("Rs", "") if len(values) > 9 and values[9] else "0"
-    amount_var.set(amount_clean)
-    
-    try:
-        with sqlite3.connect(DB_NAME) as conn:
-            c = conn.cursor()
-            c.execute("SELECT notes FROM customers WHERE id=?", (selected_id,))
-            result = c.fetchone()
-            notes_text.delete("1.0", tk.END)
-            if result and result[0]:
-                notes_text.insert("1.0", result[0])
-    except sqlite3.Error:
-        pass
+    app_state.set_selected_id(str(member.id))
+    name_var.set(member.name or "")
+    phone_var.set(member.phone or "")
+    email_var.set(member.email or "")
+    start_var.set(member.start_date or "")
+    end_var.set(member.end_date or "")
+    membership_var.set(member.membership_type or MEMBERSHIP_TYPES[0])
+    payment_var.set(member.payment_status or PAYMENT_STATUSES[0])
+    trainer_var.set(member.trainer or "")
+    amount_var.set(f"{member.amount:.2f}" if member.amount is not None else "0")
+    notes_text.delete("1.0", tk.END)
+    if member.notes:
+        notes_text.insert("1.0", member.notes)
     
     add_btn.config(text="Update Member")
 
 def export_to_csv():
-    path = filedialog.asksaveasfilename(
-        defaultextension=".csv", 
+    """Export members straight from the database on a worker thread"""
+    popup = tk.Toplevel(root)
+    popup.title("Export Members")
+    popup.geometry("460x380")
+    popup.resizable(False, False)
+    popup.configure(bg=COLORS["white"])
+    popup.grab_set()
+    popup.geometry("+{}+{}".format(
+        root.winfo_rootx() + 200,
+        root.winfo_rooty() + 100
+    ))
+
+    # Start from whatever the member list is currently showing
+    current_search = search_var.get()
+    e_search = tk.StringVar(value="" if current_search == PLACEHOLDER_TEXT else current_search)
+    e_status = tk.StringVar(value=status_var.get())
+    e_from = tk.StringVar()
+    e_to = tk.StringVar()
+    cancel_event = threading.Event()
+    running = [False]
+
+    tk.Label(popup, text="Export Members to CSV", font=("Segoe UI", 14, "bold"), bg=COLORS["white"]).pack(pady=15)
+
+    form = tk.Frame(popup, bg=COLORS["white"])
+    form.pack(padx=30, fill="x")
+
+    fields = [
+        ("Search:", tk.Entry(form, textvariable=e_search, width=30)),
+        ("Status:", ttk.Combobox(form, textvariable=e_status, values=list(STATUS_CHOICES), state="readonly", width=28)),
+        ("Active From:", tk.Entry(form, textvariable=e_from, width=30)),
+        ("Active To:", tk.Entry(form, textvariable=e_to, width=30)),
+    ]
+    for i, (label, widget) in enumerate(fields):
+        tk.Label(form, text=label, bg=COLORS["white"], font=("Segoe UI", 10, "bold")).grid(row=i, column=0, sticky="w", pady=6, padx=(0,10))
+        widget.grid(row=i, column=1, sticky="ew", pady=6)
+    form.grid_columnconfigure(1, weight=1)
+
+    progress = ttk.Progressbar(popup, mode="determinate", length=380)
+    progress.pack(pady=(15, 5))
+    progress_label = tk.Label(popup, text="Dates are optional (YYYY-MM-DD).", font=("Segoe UI", 9), bg=COLORS["white"], fg=COLORS["gray"])
+    progress_label.pack()
+
+    def on_progress(written, total):
+        if popup.winfo_exists():
+            progress.configure(maximum=max(total, 1), value=written)
+            progress_label.config(text=f"{written:,} of {total:,} members written")
+
+    def on_done(path, count):
+        running[0] = False
+        if popup.winfo_exists():
+            popup.destroy()
+        show_notification(f"Exported {count:,} members to {os.path.basename(path)}", "success")
+
+    def on_failed(error):
+        running[0] = False
+        if isinstance(error, ExportCancelled):
+            show_notification("Export cancelled", "info")
+            return
+        if not popup.winfo_exists():
+            return
+        export_btn.config(state="normal")
+        if isinstance(error, ValidationError):
+            messagebox.showerror("Error", str(error), parent=popup)
+        else:
+            messagebox.showerror("Export Error", f"Failed to export data: {error}", parent=popup)
+
+    def run_export(path, term, status, date_from, date_to):
+        try:
+            count = repo.export_csv(path, term, status, date_from, date_to,
+                                    progress=lambda w, t: root.after(0, on_progress, w, t),
+                                    cancel=cancel_event)
+        except (ValidationError, ExportCancelled, OSError, sqlite3.Error) as e:
+            root.after(0, on_failed, e)
+            return
+        root.after(0, on_done, path, count)
+
+    def start_export():
+        path = filedialog.asksaveasfilename(
+            parent=popup,
+            defaultextension=".csv",
+            filetypes=[("CSV Files","*.csv")],
+            title="Export Customer Data"
+        )
+        if not path:
+            return
+        running[0] = True
+        export_btn.config(state="disabled")
+        progress_label.config(text="Starting export...")
+        threading.Thread(target=run_export, daemon=True, args=(
+            path, e_search.get(), STATUS_CHOICES.get(e_status.get()), e_from.get(), e_to.get()
+        )).start()
+
+    def cancel_export():
+        if running[0]:
+            cancel_event.set()
+        popup.destroy()
+
+    btn_frame = tk.Frame(popup, bg=COLORS["white"])
+    btn_frame.pack(pady=15)
+    export_btn = create_modern_button(btn_frame, "Export", start_export, COLORS["success"])
+    export_btn.pack(side="left", padx=10)
+    create_modern_button(btn_frame, "Cancel", cancel_export, COLORS["gray"]).pack(side="left", padx=10)
+    popup.protocol("WM_DELETE_WINDOW", cancel_export)
+
+def progress_popup(title, heading, message):
+    """Modal window with a 0-100 progress bar for a background job"""
+    popup = tk.Toplevel(root)
+    popup.title(title)
+    popup.geometry("460x200")
+    popup.resizable(False, False)
+    popup.configure(bg=COLORS["white"])
+    popup.grab_set()
+    popup.geometry("+{}+{}".format(
+        root.winfo_rootx() + 200,
+        root.winfo_rooty() + 100
+    ))
+    tk.Label(popup, text=heading, font=("Segoe UI", 14, "bold"), bg=COLORS["white"]).pack(pady=15)
+    progress = ttk.Progressbar(popup, mode="determinate", length=380, maximum=100)
+    progress.pack(pady=5)
+    label = tk.Label(popup, text=message, font=("Segoe UI", 9), bg=COLORS["white"], fg=COLORS["gray"])
+    label.pack()
+    return popup, progress, label
+
+def import_from_csv():
+    """Bulk-import members from a CSV file on a worker thread"""
+    path = filedialog.askopenfilename(
         filetypes=[("CSV Files","*.csv")],
-        title="Export Customer Data"
+        title="Import Members"
     )
     if not path:
         return
-    try:
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["ID","Name","Phone","Email","Start Date","End Date","Membership Type","Payment","Trainer","Amount","Status"])
-            for row_id in tree.get_children():
-                writer.writerow(tree.item(row_id, "values"))
-        show_notification(f"Data exported successfully to {os.path.basename(path)}", "success")
-    except (IOError, PermissionError) as e:
-        messagebox.showerror("Export Error", f"Failed to export data: {e}")
+    rejects = rejects_path(path)
+
+    popup, progress, progress_label = progress_popup("Import Members", f"Importing {os.path.basename(path)}", "Starting import...")
+    cancel_event = threading.Event()
+
+    def on_progress(done, total):
+        if popup.winfo_exists():
+            progress.configure(value=done * 100 / max(total, 1))
+            progress_label.config(text=f"{done * 100 // max(total, 1)}% of the file imported")
+
+    def on_done(result):
+        if popup.winfo_exists():
+            popup.destroy()
+        reload_all()
+        summary = f"{result.inserted:,} members added, {result.updated:,} updated."
+        if result.cancelled:
+            summary = "Import cancelled. " + summary
+        if result.rejected:
+            summary += f"\n\n{result.rejected:,} rows were rejected; see {os.path.basename(rejects)} for the reasons."
+        messagebox.showinfo("Import Complete", summary)
+
+    def on_failed(error):
+        if popup.winfo_exists():
+            popup.destroy()
+        if isinstance(error, ValidationError):
+            messagebox.showerror("Import Error", str(error))
+        else:
+            messagebox.showerror("Import Error", f"Failed to import data: {error}")
+
+    def run_import():
+        try:
+            result = repo.import_csv(path, rejects,
+                                     progress=lambda d, t: root.after(0, on_progress, d, t),
+                                     cancel=cancel_event)
+        except (ValidationError, OSError, UnicodeDecodeError, sqlite3.Error) as e:
+            root.after(0, on_failed, e)
+            return
+        root.after(0, on_done, result)
+
+    def cancel_import():
+        cancel_event.set()
+        progress_label.config(text="Cancelling after the current batch...")
+
+    create_modern_button(popup, "Cancel", cancel_import, COLORS["gray"]).pack(pady=15)
+    popup.protocol("WM_DELETE_WINDOW", cancel_import)
+    threading.Thread(target=run_import, daemon=True).start()
 
 def backup_db():
     path = filedialog.asksaveasfilename(
@@ -528,33 +843,714 @@ def backup_db():
     )
     if not path:
         return
-    try:
-        shutil.copyfile(DB_NAME, path)
-        show_notification(f"Database backed up to {os.path.basename(path)}", "success")
-    except (IOError, PermissionError) as e:
-        messagebox.showerror("Backup Error", f"Failed to backup database: {e}")
+    run_with_progress("Backup Database", "Backing up database", lambda progress: repo.backup(path, progress),
+                      lambda _: show_notification(f"Database backed up to {os.path.basename(path)}", "success"),
+                      "Backup Error", "Failed to backup database")
 
 def restore_db():
     path = filedialog.askopenfilename(
-        filetypes=[("SQLite DB","*.db")],
+        filetypes=[("SQLite DB","*.db"), ("Automatic Snapshot","*.db.gz")],
+        initialdir=snapshot_folder(db),
         title="Restore Database"
     )
     if not path:
         return
     if messagebox.askyesno("Confirm Restore","Restoring will overwrite current data. Continue?"):
+        def restored(_):
+            reload_all()
+            show_notification("Database restored successfully!", "success")
+        run_with_progress("Restore Database", "Restoring database", lambda progress: repo.restore(path, progress),
+                          restored, "Restore Error", "Failed to restore database")
+
+def run_with_progress(title, heading, job, on_done, error_title, error_text):
+    """Run ``job(progress)`` on a worker thread behind a progress popup"""
+    popup, progress, progress_label = progress_popup(title, heading, "Starting...")
+    popup.protocol("WM_DELETE_WINDOW", lambda: None)
+
+    def on_progress(done, total):
+        if popup.winfo_exists():
+            progress.configure(value=done * 100 / max(total, 1))
+            progress_label.config(text=f"{done * 100 // max(total, 1)}% complete")
+
+    def finish(result, error):
+        if popup.winfo_exists():
+            popup.destroy()
+        if error is None:
+            on_done(result)
+        elif isinstance(error, BackupError):
+            messagebox.showerror(error_title, str(error))
+        else:
+            messagebox.showerror(error_title, f"{error_text}: {error}")
+
+    def work():
+        try:
+            result = job(lambda d, t: root.after(0, on_progress, d, t))
+        except (BackupError, OSError, sqlite3.Error) as e:
+            root.after(0, finish, None, e)
+            return
+        root.after(0, finish, result, None)
+
+    threading.Thread(target=work, daemon=True).start()
+
+# ---------------- Change Feed ----------------
+CHANGE_POLL_MS = 3000
+
+class ChangeWatcher:
+    """Follows the change log and patches the views for changes made elsewhere.
+
+    Another desk, the API server or an import may write while this window
+    is open. Every CHANGE_POLL_MS the records after ``cursor`` are read on a
+    worker thread and applied one by one, as ``propagate_change`` does for
+    our own writes (which are recognised by sequence number and skipped).
+    If the log can't be replayed, or has more than a feed's worth of
+    changes, everything is reloaded instead.
+    """
+
+    def __init__(self, widget, interval_ms=CHANGE_POLL_MS):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.cursor = 0
+        self._own = set()
+        self._conn = None
+        self._busy = False
+
+    def start(self):
+        self.catch_up()
+        self.widget.after(self.interval_ms, self.poll)
+
+    def own(self, seq):
+        if seq is not None:
+            self._own.add(seq)
+
+    def catch_up(self):
+        """Skip to the end of the log, after the views were reloaded in full."""
+        try:
+            self.cursor = repo.latest_change()
+        except sqlite3.Error:
+            pass
+        self._own.clear()
+
+    def poll(self):
+        if not self._busy:
+            self._busy = True
+            threading.Thread(target=self._fetch, args=(self.cursor,), daemon=True).start()
+        self.widget.after(self.interval_ms, self.poll)
+
+    def _fetch(self, cursor):
+        try:
+            if self._conn is None:
+                self._conn = repo.reader()
+            changes = repo.changes_since(cursor, conn=self._conn)
+        except ChangeLogGap:
+            self.widget.after(0, self._apply, cursor, None)
+            return
+        except sqlite3.Error:
+            self.widget.after(0, self._apply, cursor, [])  # try again next time
+            return
+        self.widget.after(0, self._apply, cursor, changes)
+
+    @profiler.timed("change_watcher.apply")
+    def _apply(self, cursor, changes):
+        self._busy = False
+        if cursor != self.cursor:
+            return  # the views were reloaded meanwhile
+        if changes is None or len(changes) >= CHANGE_FEED_LIMIT:
+            reload_all()
+            return
+        if not changes:
+            return
+        self.cursor = changes[-1].seq
+        external = [change for change in changes if change.seq not in self._own]
+        self._own.difference_update(change.seq for change in changes)
         try:
-            shutil.copyfile(path, DB_NAME)
-            load_customers()
+            for change in external:
+                row = repo.get(change.member_id) if change.op != "delete" else None
+                if change.op == "update" and row is None:
+                    continue  # deleted since; its delete record follows
+                apply_member_change(change.op, change.member_id, row)
+        except sqlite3.Error:
+            reload_all()
+            return
+        if external:
             update_dashboard()
-            show_notification("Database restored successfully!", "success")
-        except (IOError, PermissionError) as e:
-            messagebox.showerror("Restore Error", f"Failed to restore database: {e}")
 
+def reload_all():
+    """Reload the member list and dashboard in full."""
+    change_watcher.catch_up()
+    load_customers()
+    update_dashboard()
+
+@profiler.timed()
 def update_dashboard():
-    stats = get_statistics()
-    total_label.config(text=str(stats["total"]))
-    active_label.config(text=str(stats["active"]))
-    expiring_label.config(text=str(stats["expiring"]))
+    dashboard_stats.update(get_statistics())
+    render_dashboard()
+
+def render_dashboard():
+    total_label.config(text=str(dashboard_stats["total"]))
+    active_label.config(text=str(dashboard_stats["active"]))
+    expiring_label.config(text=str(dashboard_stats["expiring"]))
+    outstanding_label.config(text=f"Rs{dashboard_stats['outstanding']:.0f}")
+    revenue_label.config(text=f"Rs{dashboard_stats['month_revenue']:.0f}")
+
+@profiler.timed()
+def adjust_dashboard(old_end_date, new_end_date):
+    """Move the dashboard counters by one member's before/after contribution."""
+    old = stats_contribution(old_end_date)
+    new = stats_contribution(new_end_date)
+    for key in new:
+        dashboard_stats[key] += new[key] - old[key]
+    try:
+        dashboard_stats.update(repo.dues())
+    except sqlite3.Error:
+        pass
+    render_dashboard()
+
+# ---------------- Reports ----------------
+REPORT_TITLES = {
+    "cohorts": "Retention Cohorts",
+    "revenue": "Revenue by Plan & Trainer",
+    "trainers": "Trainer Load",
+    "unpaid": "Unpaid Balances",
+}
+report_results = {}
+
+def load_reports(force=False):
+    """Build (or fetch the cached) reports on a worker thread, then show the selected one"""
+    reports_status.config(text="Building reports...")
+
+    def work():
+        try:
+            result = repo.reports(refresh=force)
+        except (AnalyticsUnavailable, sqlite3.Error) as e:
+            root.after(0, lambda message=str(e): reports_status.config(text=message))
+            return
+        root.after(0, show_reports, result)
+
+    threading.Thread(target=work, daemon=True).start()
+
+def show_reports(result):
+    report_results.clear()
+    report_results.update(result)
+    reports_status.config(text=f"Updated {datetime.now().strftime('%H:%M:%S')}")
+    render_report()
+
+@profiler.timed()
+def render_report():
+    name = next((key for key, title in REPORT_TITLES.items() if title == report_var.get()), None)
+    frame = report_results.get(name)
+    reports_tree.delete(*reports_tree.get_children())
+    if frame is None:
+        return
+    columns = [str(c) for c in frame.columns]
+    reports_tree.configure(columns=columns)
+    for col in columns:
+        reports_tree.heading(col, text=col.replace("_", " ").title())
+        reports_tree.column(col, width=max(80, min(220, len(col) * 12)), anchor="w")
+    for i, values in enumerate(frame.itertuples(index=False)):
+        reports_tree.insert("", "end", values=["" if v != v else v for v in values],
+                            tags=("even" if i % 2 == 0 else "odd",))
+
+# ---------------- Attendance ----------------
+def check_in_member(member_id=None):
+    """Check a member in on a worker thread (scanner or typed ID); the commit is grouped with other desks'"""
+    member_id = (member_id if member_id is not None else checkin_var.get()).strip()
+    if not member_id:
+        return
+    checkin_var.set("")
+    checkin_result.config(text="Checking in...", fg=COLORS["gray"])
+
+    def work():
+        try:
+            result = repo.check_in(member_id)
+        except ValidationError as e:
+            root.after(0, show_check_in, str(e), COLORS["danger"])
+            return
+        except KeyError:
+            root.after(0, show_check_in, f"No member with ID {member_id}.", COLORS["danger"])
+            return
+        except futures.TimeoutError:
+            root.after(0, show_check_in, "Check-in is taking too long, please try again.", COLORS["danger"])
+            return
+        except Exception as e:  # database, server or writer-thread failure
+            root.after(0, show_check_in, f"Check-in failed: {e}", COLORS["danger"])
+            return
+        root.after(0, show_check_in, f"Welcome, {result.name}! Visit #{result.visits} at {result.checked_in_at[11:16]}",
+                   COLORS["success"])
+
+    threading.Thread(target=work, daemon=True).start()
+
+def check_in_selected():
+    member = selected_member("check in")
+    if member is not None:
+        tabs.show(attendance_tab)
+        check_in_member(str(member.id))
+
+def show_check_in(message, color):
+    checkin_result.config(text=message, fg=color)
+
+def load_attendance():
+    """Read the heatmap and top visitors from the attendance rollups on a worker thread"""
+    def work():
+        try:
+            result = repo.heatmap(), repo.frequent_visitors(10)
+        except sqlite3.Error as e:
+            root.after(0, lambda message=str(e): attendance_status.config(text=message))
+            return
+        root.after(0, show_attendance, *result)
+
+    threading.Thread(target=work, daemon=True).start()
+
+@profiler.timed()
+def show_attendance(grid, visitors):
+    peak = max(max(row) for row in grid) or 1
+    for weekday, row in enumerate(grid):
+        for hour, visits in enumerate(row):
+            shade = 255 - int(visits * 200 / peak)
+            heatmap_cells[weekday][hour].config(text=str(visits or ""), bg=f"#{shade:02x}{shade:02x}ff")
+    visitors_tree.delete(*visitors_tree.get_children())
+    for i, (member_id, name, visits, last_visit) in enumerate(visitors):
+        visitors_tree.insert("", "end", values=(member_id, name, visits, last_visit),
+                             tags=("even" if i % 2 == 0 else "odd",))
+    attendance_status.config(text=f"Last {HEATMAP_DAYS} days, updated {datetime.now().strftime('%H:%M:%S')}")
+
+# ---------------- Diagnostics ----------------
+slow_statements = []
+
+def diagnostics_snapshot():
+    """This window's profile, plus the server's when working against one"""
+    snapshot = profiler.snapshot()
+    if SERVER_URL:
+        try:
+            snapshot["server"] = repo.diagnostics()
+        except sqlite3.Error as e:
+            snapshot["server_error"] = str(e)
+    return snapshot
+
+def load_diagnostics():
+    """Take a profiler snapshot on a worker thread (the server's is an HTTP call), then show it"""
+    def work():
+        root.after(0, show_diagnostics, diagnostics_snapshot())
+
+    threading.Thread(target=work, daemon=True).start()
+
+def show_diagnostics(snapshot):
+    sources = [("", snapshot)]
+    if snapshot.get("server"):
+        sources.append(("server ", snapshot["server"]))
+    timings_tree.delete(*timings_tree.get_children())
+    timings = sorted(((prefix, t) for prefix, source in sources for t in source["timings"]),
+                     key=lambda item: item[1]["total_ms"], reverse=True)
+    for i, (prefix, t) in enumerate(timings):
+        timings_tree.insert("", "end", values=(prefix + t["kind"], t["count"], f"{t['total_ms']:.1f}",
+                                               f"{t['mean_ms']:.2f}", f"{t['p50_ms']:.1f}", f"{t['p95_ms']:.1f}",
+                                               f"{t['max_ms']:.1f}", t["rows"], t["name"]),
+                            tags=("even" if i % 2 == 0 else "odd",))
+    slow_tree.delete(*slow_tree.get_children())
+    slow = sorted(((prefix, q) for prefix, source in sources for q in source["slow_queries"]),
+                  key=lambda item: item[1]["at"], reverse=True)
+    for i, (prefix, q) in enumerate(slow):
+        slow_tree.insert("", "end", iid=str(i), values=(q["at"][11:], f"{q['ms']:.1f}", q["rows"],
+                                                        prefix + q["thread"], q["sql"]),
+                         tags=("even" if i % 2 == 0 else "odd",))
+    slow_statements[:] = [q for _, q in slow]
+    plan_text.delete("1.0", tk.END)
+    state = "on" if snapshot["enabled"] else "off"
+    message = f"Profiling {state}, {len(timings)} timings since {snapshot['since'] or '-'}, " \
+              f"statements over {snapshot['slow_ms']} ms are logged with their plan"
+    if snapshot.get("server_error"):
+        message += f" (server: {snapshot['server_error']})"
+    elif SERVER_URL and not snapshot.get("server", {}).get("enabled"):
+        message += " (start serve.py with --profile to time the server too)"
+    diagnostics_status.config(text=message)
+
+def show_slow_query(event):
+    selected = slow_tree.selection()
+    plan_text.delete("1.0", tk.END)
+    if not selected:
+        return
+    query = slow_statements[int(selected[0])]
+    plan_text.insert("1.0", query["sql"] + "\n\n" + ("\n".join(query["plan"]) or "(no plan recorded)"))
+
+def toggle_profiling():
+    if profiling_var.get():
+        profiler.enable()
+    else:
+        profiler.disable()
+    load_diagnostics()
+
+def reset_profiling():
+    profiler.reset()
+    load_diagnostics()
+
+def dump_diagnostics():
+    path = filedialog.asksaveasfilename(
+        title="Save Diagnostics", defaultextension=".json", filetypes=[("JSON files", "*.json")],
+        initialfile=f"diagnostics-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    if not path:
+        return
+    try:
+        profiler.dump(path, diagnostics_snapshot())
+    except OSError as e:
+        messagebox.showerror("Save Error", f"Failed to save diagnostics: {e}")
+        return
+    show_notification(f"Diagnostics saved to {os.path.basename(path)}", "success")
+
+# ---------------- Tabs ----------------
+class LazyTabs:
+    """Notebook tabs whose contents are built the first time they're shown.
+
+    ``add`` puts an empty frame in the notebook straight away, so the tab
+    strip is complete at first paint, and keeps its builder; ``build``
+    runs the builder once, on first selection or when another tab needs
+    the widgets (``show``).
+    """
+
+    def __init__(self, notebook):
+        self.notebook = notebook
+        self._builders = {}
+
+    def add(self, text, builder):
+        frame = tk.Frame(self.notebook, bg=COLORS["light"])
+        self.notebook.add(frame, text=text)
+        self._builders[str(frame)] = (frame, builder)
+        return frame
+
+    def build(self, frame):
+        entry = self._builders.pop(str(frame), None)
+        if entry is not None:
+            with profiler.span(f"build_tab[{self.notebook.tab(entry[0], 'text')}]"):
+                entry[1](entry[0])
+
+    def show(self, frame):
+        self.build(frame)
+        self.notebook.select(frame)
+
+def on_tab_changed(event):
+    tabs.build(notebook.select())
+    if notebook.select() == str(reports_tab):
+        load_reports()
+    elif notebook.select() == str(attendance_tab):
+        load_attendance()
+        checkin_entry.focus_set()
+    elif notebook.select() == str(diagnostics_tab):
+        load_diagnostics()
+
+def create_modern_entry(parent, textvariable, width=45):
+    entry = tk.Entry(parent, textvariable=textvariable, width=width, font=("Segoe UI", 11),
+                    relief="solid", bd=1, highlightthickness=1, highlightcolor=COLORS["primary"],
+                    insertbackground=COLORS["dark"], bg=COLORS["white"], fg=COLORS["dark"])
+    return entry
+
+def on_form_mousewheel(event):
+    # One application-wide binding instead of one per form widget; the
+    # member list and report tables handle their own wheel events first
+    if form_canvas is not None and notebook.select() == str(form_tab):
+        form_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+
+def build_member_form(tab):
+    global form_canvas, notes_text, add_btn
+    canvas = tk.Canvas(tab, bg=COLORS["light"])
+    scrollbar = ttk.Scrollbar(tab, orient="vertical", command=canvas.yview)
+    scrollable_frame = tk.Frame(canvas, bg=COLORS["light"])
+
+    scrollable_frame.bind(
+        "<Configure>",
+        lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+    )
+
+    canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+    canvas.configure(yscrollcommand=scrollbar.set)
+    form_canvas = canvas
+    root.bind_all("<MouseWheel>", on_form_mousewheel)
+
+    canvas.pack(side="left", fill="both", expand=True)
+    scrollbar.pack(side="right", fill="y")
+
+    form_frame = tk.LabelFrame(scrollable_frame, text="Member Information", padx=30, pady=30,
+                              bg=COLORS["white"], fg=COLORS["dark"], font=("Segoe UI", 14, "bold"))
+    form_frame.pack(fill="both", expand=True, padx=30, pady=30)
+
+    for i in range(10):
+        form_frame.grid_rowconfigure(i, weight=0, pad=5)
+    form_frame.grid_columnconfigure(0, weight=0, minsize=200)
+    form_frame.grid_columnconfigure(1, weight=1, minsize=400)
+
+    labels = ["Full Name *","Phone Number","Email Address","Start Date *","End Date *","Membership Type","Payment Status","Personal Trainer","Amount","Notes"]
+
+    widgets = [
+        create_modern_entry(form_frame, name_var),
+        create_modern_entry(form_frame, phone_var),
+        create_modern_entry(form_frame, email_var),
+        create_modern_entry(form_frame, start_var),
+        create_modern_entry(form_frame, end_var),
+        ttk.Combobox(form_frame, textvariable=membership_var, values=MEMBERSHIP_TYPES, state="readonly", width=43, font=("Segoe UI", 11)),
+        ttk.Combobox(form_frame, textvariable=payment_var, values=PAYMENT_STATUSES, state="readonly", width=43, font=("Segoe UI", 11)),
+        create_modern_entry(form_frame, trainer_var),
+        create_modern_entry(form_frame, amount_var),
+        None
+    ]
+
+    for i, label in enumerate(labels):
+        label_widget = tk.Label(form_frame, text=label, font=("Segoe UI", 12, "bold"),
+                               bg=COLORS["white"], fg=COLORS["dark"], anchor="w")
+        label_widget.grid(row=i, column=0, sticky="w", padx=(20, 15), pady=12)
+
+        if widgets[i]:
+            widgets[i].grid(row=i, column=1, sticky="ew", padx=(15, 20), pady=10, ipady=5)
+
+    notes_text = tk.Text(form_frame, height=4, width=50, font=("Segoe UI", 11),
+                        relief="solid", bd=2, highlightthickness=2, highlightcolor=COLORS["primary"],
+                        bg=COLORS["white"], fg=COLORS["dark"], insertbackground=COLORS["dark"])
+    notes_text.grid(row=9, column=1, sticky="ew", padx=(15, 20), pady=10, ipady=5)
+
+    btn_frame = tk.Frame(form_frame, bg=COLORS["white"])
+    btn_frame.grid(row=10, column=0, columnspan=2, pady=30, sticky="ew")
+    btn_frame.grid_columnconfigure(0, weight=1)
+
+    button_container = tk.Frame(btn_frame, bg=COLORS["white"])
+    button_container.pack(expand=True)
+
+    add_btn = create_modern_button(button_container, "Add Member", add_or_update_customer, COLORS["success"], width=18)
+    add_btn.pack(side="left", padx=15)
+
+    create_modern_button(button_container, "Update Plan", update_plan, COLORS["secondary"], width=15).pack(side="left", padx=15)
+    create_modern_button(button_container, "Clear Form", clear_form, COLORS["gray"], width=15).pack(side="left", padx=15)
+    create_modern_button(button_container, "Export CSV", export_to_csv, COLORS["primary"], width=15).pack(side="left", padx=15)
+    create_modern_button(button_container, "Import CSV", import_from_csv, COLORS["success"], width=15).pack(side="left", padx=15)
+    create_modern_button(button_container, "Backup", backup_db, COLORS["warning"], width=12).pack(side="left", padx=15)
+    create_modern_button(button_container, "Restore", restore_db, COLORS["danger"], width=12).pack(side="left", padx=15)
+
+def on_search_focus_in(event):
+    if search_entry.get() == PLACEHOLDER_TEXT:
+        search_entry.delete(0, tk.END)
+        search_entry.config(fg="black")
+
+def on_search_focus_out(event):
+    if not search_entry.get():
+        search_entry.insert(0, PLACEHOLDER_TEXT)
+        search_entry.config(fg="gray")
+
+def on_search(*args):
+    search_controller.submit(search_var.get(), selected_status())
+
+COLUMN_WIDTHS = {
+    "ID": 80, "Name": 200, "Phone": 130, "Email": 220,
+    "Start": 110, "End": 110, "Type": 160, "Payment": 120,
+    "Trainer": 140, "Amount": 100, "Status": 180
+}
+
+def build_member_list(tab):
+    global search_entry, tree, member_list
+    search_frame = tk.Frame(tab, bg=COLORS["white"], relief="flat", bd=0)
+    search_frame.pack(fill="x", pady=15, padx=20)
+
+    search_inner = tk.Frame(search_frame, bg=COLORS["white"])
+    search_inner.pack(fill="x", padx=10, pady=10)
+
+    tk.Label(search_inner, text="Search:", font=("Segoe UI", 12, "bold"), bg=COLORS["white"]).pack(side="left", padx=(0, 10))
+
+    search_entry = tk.Entry(search_inner, textvariable=search_var, width=80, font=("Segoe UI", 12),
+                           relief="solid", bd=1, highlightthickness=1, highlightcolor=COLORS["primary"],
+                           bg=COLORS["white"], fg=COLORS["dark"], insertbackground=COLORS["primary"])
+    search_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+
+    status_combo = ttk.Combobox(search_inner, textvariable=status_var, values=list(STATUS_CHOICES),
+                                state="readonly", width=18, font=("Segoe UI", 11))
+    status_combo.pack(side="left", padx=(0, 10))
+    status_combo.bind("<<ComboboxSelected>>", lambda e: load_customers(search_var.get()))
+
+    search_btn = create_modern_button(search_inner, "Search", lambda: load_customers(search_var.get()), COLORS["primary"], width=10)
+    search_btn.pack(side="left")
+
+    if not search_var.get():
+        search_entry.insert(0, PLACEHOLDER_TEXT)
+        search_entry.config(fg="gray")
+
+    search_entry.bind("<FocusIn>", on_search_focus_in)
+    search_entry.bind("<FocusOut>", on_search_focus_out)
+    search_var.trace("w", on_search)
+
+    table_frame = tk.Frame(tab, bg=COLORS["white"], relief="flat", bd=0)
+    table_frame.pack(fill="both", expand=True, padx=20, pady=10)
+
+    cols = ("ID","Name","Phone","Email","Start","End","Type","Payment","Trainer","Amount","Status")
+    tree = ttk.Treeview(table_frame, columns=cols, show="headings", selectmode="browse", height=15)
+
+    style.configure("Treeview", background=COLORS["white"], foreground=COLORS["dark"],
+                   fieldbackground=COLORS["white"], borderwidth=0)
+    style.configure("Treeview.Heading", background=COLORS["primary"], foreground="white",
+                   font=("Segoe UI", 10, "bold"), borderwidth=1, relief="flat")
+    style.map("Treeview", background=[('selected', COLORS["primary"])])
+
+    for col in cols:
+        tree.heading(col, text=col)
+        tree.column(col, width=COLUMN_WIDTHS.get(col, 120), anchor="w")
+
+    vsb = ttk.Scrollbar(table_frame, orient="vertical")
+    hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=tree.xview)
+    tree.configure(xscrollcommand=hsb.set)
+
+    tree.grid(row=0, column=0, sticky="nsew")
+    vsb.grid(row=0, column=1, sticky="ns")
+    hsb.grid(row=1, column=0, sticky="ew")
+
+    list_status_label = tk.Label(table_frame, text="Loading members...", font=("Segoe UI", 10), bg=COLORS["white"], fg=COLORS["gray"], anchor="w")
+    list_status_label.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(5, 0))
+
+    table_frame.grid_rowconfigure(0, weight=1)
+    table_frame.grid_columnconfigure(0, weight=1)
+
+    configure_tree_tags()
+    member_list = VirtualMemberList(tree, vsb, list_status_label)
+    if waiting_pager is not None:
+        member_list.show(waiting_pager)
+
+    tree.bind("<Double-1>", on_row_select)
+
+    action_frame = tk.Frame(tab, bg=COLORS["light"])
+    action_frame.pack(pady=15)
+
+    create_modern_button(action_frame, "Delete Selected", delete_customer, COLORS["danger"]).pack(side="left", padx=10)
+    create_modern_button(action_frame, "Edit Selected", lambda: on_row_select(None), COLORS["primary"]).pack(side="left", padx=10)
+    create_modern_button(action_frame, "Update Plan", update_plan, COLORS["secondary"]).pack(side="left", padx=10)
+    create_modern_button(action_frame, "Refresh List", lambda: load_customers(), COLORS["secondary"]).pack(side="left", padx=10)
+    create_modern_button(action_frame, "Check In", check_in_selected, COLORS["success"]).pack(side="left", padx=10)
+
+def build_reports(tab):
+    global report_var, reports_status, reports_tree
+    reports_bar = tk.Frame(tab, bg=COLORS["white"])
+    reports_bar.pack(fill="x", padx=20, pady=(20, 10))
+
+    tk.Label(reports_bar, text="Report:", font=("Segoe UI", 12, "bold"), bg=COLORS["white"]).pack(side="left", padx=10, pady=10)
+    report_var = tk.StringVar(value=REPORT_TITLES["cohorts"])
+    report_combo = ttk.Combobox(reports_bar, textvariable=report_var, values=list(REPORT_TITLES.values()),
+                                state="readonly", width=28, font=("Segoe UI", 11))
+    report_combo.pack(side="left", padx=(0, 10))
+    report_combo.bind("<<ComboboxSelected>>", lambda e: render_report())
+    create_modern_button(reports_bar, "Refresh", lambda: load_reports(force=True), COLORS["primary"], width=10).pack(side="left")
+    reports_status = tk.Label(reports_bar, text="", font=("Segoe UI", 10), bg=COLORS["white"], fg=COLORS["gray"])
+    reports_status.pack(side="left", padx=10)
+
+    reports_table = tk.Frame(tab, bg=COLORS["white"])
+    reports_table.pack(fill="both", expand=True, padx=20, pady=10)
+    reports_tree = ttk.Treeview(reports_table, show="headings", selectmode="browse")
+    reports_vsb = ttk.Scrollbar(reports_table, orient="vertical", command=reports_tree.yview)
+    reports_hsb = ttk.Scrollbar(reports_table, orient="horizontal", command=reports_tree.xview)
+    reports_tree.configure(yscrollcommand=reports_vsb.set, xscrollcommand=reports_hsb.set)
+    reports_tree.grid(row=0, column=0, sticky="nsew")
+    reports_vsb.grid(row=0, column=1, sticky="ns")
+    reports_hsb.grid(row=1, column=0, sticky="ew")
+    reports_table.grid_rowconfigure(0, weight=1)
+    reports_table.grid_columnconfigure(0, weight=1)
+    reports_tree.tag_configure("even", background="#F8F9FA")
+
+def build_attendance(tab):
+    global checkin_var, checkin_entry, checkin_result, heatmap_cells, attendance_status, visitors_tree
+    checkin_bar = tk.Frame(tab, bg=COLORS["white"])
+    checkin_bar.pack(fill="x", padx=20, pady=(20, 10))
+    tk.Label(checkin_bar, text="Member ID:", font=("Segoe UI", 12, "bold"), bg=COLORS["white"]).pack(side="left", padx=10, pady=10)
+    checkin_var = tk.StringVar()
+    checkin_entry = tk.Entry(checkin_bar, textvariable=checkin_var, width=14, font=("Segoe UI", 14),
+                             relief="solid", bd=1)
+    checkin_entry.pack(side="left", padx=(0, 10))
+    checkin_entry.bind("<Return>", lambda e: check_in_member())
+    create_modern_button(checkin_bar, "Check In", check_in_member, COLORS["success"], width=10).pack(side="left")
+    checkin_result = tk.Label(checkin_bar, text="", font=("Segoe UI", 12, "bold"), bg=COLORS["white"])
+    checkin_result.pack(side="left", padx=15)
+
+    attendance_body = tk.Frame(tab, bg=COLORS["light"])
+    attendance_body.pack(fill="both", expand=True, padx=20, pady=10)
+
+    heatmap_frame = tk.LabelFrame(attendance_body, text="Peak Hours", font=button_font, bg=COLORS["white"], fg=COLORS["dark"])
+    heatmap_frame.pack(side="left", fill="both", expand=True, padx=(0, 10))
+    for hour in range(24):
+        tk.Label(heatmap_frame, text=f"{hour:02d}", font=("Segoe UI", 8), bg=COLORS["white"], fg=COLORS["gray"]).grid(
+            row=0, column=hour + 1, sticky="nsew")
+    heatmap_cells = []
+    for weekday, day_name in enumerate(WEEKDAYS):
+        tk.Label(heatmap_frame, text=day_name, font=("Segoe UI", 9, "bold"), bg=COLORS["white"]).grid(
+            row=weekday + 1, column=0, padx=5, sticky="w")
+        heatmap_cells.append([tk.Label(heatmap_frame, text="", width=3, font=("Segoe UI", 8), bg=COLORS["white"],
+                                       relief="flat", bd=1) for _ in range(24)])
+        for hour, cell in enumerate(heatmap_cells[-1]):
+            cell.grid(row=weekday + 1, column=hour + 1, padx=1, pady=1, sticky="nsew")
+    attendance_status = tk.Label(heatmap_frame, text="", font=("Segoe UI", 10), bg=COLORS["white"], fg=COLORS["gray"])
+    attendance_status.grid(row=len(WEEKDAYS) + 1, column=0, columnspan=25, sticky="w", padx=5, pady=5)
+
+    visitors_frame = tk.LabelFrame(attendance_body, text="Most Frequent Visitors", font=button_font, bg=COLORS["white"], fg=COLORS["dark"])
+    visitors_frame.pack(side="left", fill="both")
+    visitors_tree = ttk.Treeview(visitors_frame, columns=("ID", "Name", "Visits", "Last Visit"), show="headings", height=10)
+    for col, width in (("ID", 60), ("Name", 160), ("Visits", 60), ("Last Visit", 140)):
+        visitors_tree.heading(col, text=col)
+        visitors_tree.column(col, width=width, anchor="w")
+    visitors_tree.tag_configure("even", background="#F8F9FA")
+    visitors_tree.pack(fill="both", expand=True, padx=10, pady=10)
+    create_modern_button(visitors_frame, "Refresh", load_attendance, COLORS["primary"], width=10).pack(pady=(0, 10))
+
+TIMING_COLUMNS = (("Kind", 90), ("Calls", 70), ("Total", 80), ("Mean", 70), ("p50", 60), ("p95", 60),
+                  ("Max", 70), ("Rows", 80), ("Operation", 600))
+SLOW_COLUMNS = (("At", 100), ("ms", 70), ("Rows", 70), ("Thread", 150), ("Statement", 500))
+
+def build_diagnostics(tab):
+    global profiling_var, diagnostics_status, timings_tree, slow_tree, plan_text
+    diagnostics_bar = tk.Frame(tab, bg=COLORS["white"])
+    diagnostics_bar.pack(fill="x", padx=20, pady=(20, 10))
+    profiling_var = tk.BooleanVar(value=profiler.enabled)
+    tk.Checkbutton(diagnostics_bar, text="Record timings", variable=profiling_var, command=toggle_profiling,
+                   font=("Segoe UI", 11, "bold"), bg=COLORS["white"]).pack(side="left", padx=10, pady=10)
+    create_modern_button(diagnostics_bar, "Refresh", load_diagnostics, COLORS["primary"], width=10).pack(side="left", padx=5)
+    create_modern_button(diagnostics_bar, "Reset", reset_profiling, COLORS["gray"], width=10).pack(side="left", padx=5)
+    create_modern_button(diagnostics_bar, "Save JSON", dump_diagnostics, COLORS["secondary"], width=10).pack(side="left", padx=5)
+    diagnostics_status = tk.Label(diagnostics_bar, text="", font=("Segoe UI", 10), bg=COLORS["white"], fg=COLORS["gray"])
+    diagnostics_status.pack(side="left", padx=10)
+
+    timings_frame = tk.LabelFrame(tab, text="Timings (ms)", font=button_font, bg=COLORS["white"], fg=COLORS["dark"])
+    timings_frame.pack(fill="both", expand=True, padx=20, pady=(0, 10))
+    timings_tree = ttk.Treeview(timings_frame, columns=[c for c, _ in TIMING_COLUMNS], show="headings", height=10)
+    for col, width in TIMING_COLUMNS:
+        timings_tree.heading(col, text=col)
+        timings_tree.column(col, width=width, anchor="w", stretch=col == "Operation")
+    timings_vsb = ttk.Scrollbar(timings_frame, orient="vertical", command=timings_tree.yview)
+    timings_tree.configure(yscrollcommand=timings_vsb.set)
+    timings_tree.pack(side="left", fill="both", expand=True, padx=(10, 0), pady=10)
+    timings_vsb.pack(side="left", fill="y", pady=10)
+    timings_tree.tag_configure("even", background="#F8F9FA")
+
+    slow_frame = tk.LabelFrame(tab, text="Slow Statements", font=button_font, bg=COLORS["white"], fg=COLORS["dark"])
+    slow_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+    slow_tree = ttk.Treeview(slow_frame, columns=[c for c, _ in SLOW_COLUMNS], show="headings", height=8)
+    for col, width in SLOW_COLUMNS:
+        slow_tree.heading(col, text=col)
+        slow_tree.column(col, width=width, anchor="w", stretch=col == "Statement")
+    slow_tree.tag_configure("even", background="#F8F9FA")
+    slow_tree.bind("<<TreeviewSelect>>", show_slow_query)
+    slow_tree.pack(side="left", fill="both", expand=True, padx=10, pady=10)
+    plan_text = tk.Text(slow_frame, width=60, height=8, font=("Consolas", 9), relief="solid", bd=1, wrap="word")
+    plan_text.pack(side="left", fill="both", expand=True, padx=(0, 10), pady=10)
+
+# ---------------- Startup ----------------
+def show_members(pager):
+    """Search results: shown now if the Members List tab exists, else kept until it does"""
+    global waiting_pager
+    mark_startup("member_list")
+    if member_list is None:
+        waiting_pager = pager
+    else:
+        member_list.show(pager)
+
+def finish_startup(event=None):
+    """Everything that can wait until the window is on screen"""
+    if "first_paint" in startup_marks:
+        return
+    mark_startup("first_paint")
+    init_db()
+    mark_startup("database")
+    for job in background_jobs:
+        job.start()
+    load_customers()  # on the search thread; the dashboard reads summary tables meanwhile
+    update_dashboard()
+    mark_startup("dashboard")
+    change_watcher.start()
 
 # UI Setup
 root = tk.Tk()
@@ -570,11 +1566,11 @@ header_frame = tk.Frame(root, bg=COLORS["primary"], height=100)
 header_frame.pack(fill="x")
 header_frame.pack_propagate(False)
 
-title_label = tk.Label(header_frame, text="MuscleTone Fitness", font=title_font, 
+title_label = tk.Label(header_frame, text="MuscleTone Fitness", font=title_font,
                       bg=COLORS["primary"], fg="white")
 title_label.place(relx=0.5, rely=0.3, anchor="center")
 
-subtitle_label = tk.Label(header_frame, text="Premium Gym Management System", font=subtitle_font, 
+subtitle_label = tk.Label(header_frame, text="Premium Gym Management System", font=subtitle_font,
                          bg=COLORS["primary"], fg="white")
 subtitle_label.place(relx=0.5, rely=0.7, anchor="center")
 
@@ -584,24 +1580,28 @@ main_frame.pack(fill="both", expand=True, padx=10, pady=10)
 style = ttk.Style()
 style.theme_use('clam')
 style.configure('Custom.TNotebook', background=COLORS["light"], borderwidth=0)
-style.configure('Custom.TNotebook.Tab', padding=[20, 12], font=button_font, 
+style.configure('Custom.TNotebook.Tab', padding=[20, 12], font=button_font,
                background=COLORS["white"], focuscolor='none')
 style.map('Custom.TNotebook.Tab', background=[('selected', COLORS["primary"]), ('active', COLORS["hover"])],
          foreground=[('selected', 'white'), ('active', COLORS["dark"])])
 
 notebook = ttk.Notebook(main_frame, style='Custom.TNotebook')
 notebook.pack(fill="both", expand=True)
+tabs = LazyTabs(notebook)
 
+# The dashboard is what shows first, so it is the one tab built up front;
+# its cards fill in once the first data load runs after first paint
 dashboard_tab = tk.Frame(notebook, bg=COLORS["light"])
 notebook.add(dashboard_tab, text="Dashboard")
 
 stats_frame = tk.Frame(dashboard_tab, bg=COLORS["light"])
 stats_frame.pack(fill="x", padx=30, pady=30)
 
-stats = get_statistics()
-_, total_label = create_stats_card(stats_frame, "Total Members", stats["total"], COLORS["primary"])
-_, active_label = create_stats_card(stats_frame, "Active Members", stats["active"], COLORS["success"])
-_, expiring_label = create_stats_card(stats_frame, "Expiring Soon", stats["expiring"], COLORS["warning"])
+_, total_label = create_stats_card(stats_frame, "Total Members", "-", COLORS["primary"])
+_, active_label = create_stats_card(stats_frame, "Active Members", "-", COLORS["success"])
+_, expiring_label = create_stats_card(stats_frame, "Expiring Soon", "-", COLORS["warning"])
+_, outstanding_label = create_stats_card(stats_frame, "Outstanding Dues", "-", COLORS["danger"])
+_, revenue_label = create_stats_card(stats_frame, "Revenue This Month", "-", COLORS["secondary"])
 
 actions_frame = tk.LabelFrame(dashboard_tab, text="Quick Actions", font=button_font, bg=COLORS["white"], fg=COLORS["dark"])
 actions_frame.pack(fill="x", padx=30, pady=(0, 30))
@@ -614,9 +1614,8 @@ create_modern_button(quick_actions, "View All Members", lambda: notebook.select(
 create_modern_button(quick_actions, "Export Data", export_to_csv, COLORS["secondary"]).pack(side="left", padx=10)
 create_modern_button(quick_actions, "Backup Database", backup_db, COLORS["warning"]).pack(side="left", padx=10)
 
-tab1 = tk.Frame(notebook, bg=COLORS["light"])
-notebook.add(tab1, text="Add/Edit Member")
-
+# Form and search state outlives the tabs' widgets: other tabs read and
+# fill it before those tabs have been built
 name_var = tk.StringVar()
 phone_var = tk.StringVar()
 email_var = tk.StringVar()
@@ -627,192 +1626,42 @@ payment_var = tk.StringVar()
 trainer_var = tk.StringVar()
 amount_var = tk.StringVar()
 
-membership_types = ["Premium Monthly","Gold (3-Month)","Silver (6-Month)","Bronze (Yearly)","Basic Monthly"]
-payment_statuses = ["Paid","Unpaid","Partial"]
-
 today = datetime.today().date()
 start_var.set(today.strftime("%Y-%m-%d"))
 end_var.set((today+timedelta(days=30)).strftime("%Y-%m-%d"))
-membership_var.set(membership_types[0])
-payment_var.set(payment_statuses[0])
-
-canvas = tk.Canvas(tab1, bg=COLORS["light"])
-scrollbar = ttk.Scrollbar(tab1, orient="vertical", command=canvas.yview)
-scrollable_frame = tk.Frame(canvas, bg=COLORS["light"])
-
-scrollable_frame.bind(
-    "<Configure>",
-    lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-)
-
-canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-canvas.configure(yscrollcommand=scrollbar.set)
-
-def on_mousewheel(event):
-    canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-
-def bind_mousewheel(widget):
-    widget.bind("<MouseWheel>", on_mousewheel)
-    for child in widget.winfo_children():
-        bind_mousewheel(child)
-
-canvas.bind("<MouseWheel>", on_mousewheel)
-scrollable_frame.bind("<MouseWheel>", on_mousewheel)
-
-canvas.pack(side="left", fill="both", expand=True)
-scrollbar.pack(side="right", fill="y")
-
-form_frame = tk.LabelFrame(scrollable_frame, text="Member Information", padx=30, pady=30, 
-                          bg=COLORS["white"], fg=COLORS["dark"], font=("Segoe UI", 14, "bold"))
-form_frame.pack(fill="both", expand=True, padx=30, pady=30)
-
-form_frame.bind("<MouseWheel>", on_mousewheel)
-
-for i in range(10):
-    form_frame.grid_rowconfigure(i, weight=0, pad=5)
-form_frame.grid_columnconfigure(0, weight=0, minsize=200)
-form_frame.grid_columnconfigure(1, weight=1, minsize=400)
-
-labels = ["Full Name *","Phone Number","Email Address","Start Date *","End Date *","Membership Type","Payment Status","Personal Trainer","Amount","Notes"]
-
-def create_modern_entry(parent, textvariable, width=45):
-    entry = tk.Entry(parent, textvariable=textvariable, width=width, font=("Segoe UI", 11),
-                    relief="solid", bd=1, highlightthickness=1, highlightcolor=COLORS["primary"],
-                    insertbackground=COLORS["dark"], bg=COLORS["white"], fg=COLORS["dark"])
-    return entry
-
-widgets = [
-    create_modern_entry(form_frame, name_var),
-    create_modern_entry(form_frame, phone_var),
-    create_modern_entry(form_frame, email_var),
-    create_modern_entry(form_frame, start_var),
-    create_modern_entry(form_frame, end_var),
-    ttk.Combobox(form_frame, textvariable=membership_var, values=membership_types, state="readonly", width=43, font=("Segoe UI", 11)),
-    ttk.Combobox(form_frame, textvariable=payment_var, values=payment_statuses, state="readonly", width=43, font=("Segoe UI", 11)),
-    create_modern_entry(form_frame, trainer_var),
-    create_modern_entry(form_frame, amount_var),
-    None
-]
-
-for i, label in enumerate(labels):
-    label_widget = tk.Label(form_frame, text=label, font=("Segoe UI", 12, "bold"), 
-                           bg=COLORS["white"], fg=COLORS["dark"], anchor="w")
-    label_widget.grid(row=i, column=0, sticky="w", padx=(20, 15), pady=12)
-    
-    if widgets[i]:
-        widgets[i].grid(row=i, column=1, sticky="ew", padx=(15, 20), pady=10, ipady=5)
-
-notes_text = tk.Text(form_frame, height=4, width=50, font=("Segoe UI", 11), 
-                    relief="solid", bd=2, highlightthickness=2, highlightcolor=COLORS["primary"],
-                    bg=COLORS["white"], fg=COLORS["dark"], insertbackground=COLORS["dark"])
-notes_text.grid(row=9, column=1, sticky="ew", padx=(15, 20), pady=10, ipady=5)
-
-bind_mousewheel(form_frame)
-
-btn_frame = tk.Frame(form_frame, bg=COLORS["white"])
-btn_frame.grid(row=10, column=0, columnspan=2, pady=30, sticky="ew")
-btn_frame.grid_columnconfigure(0, weight=1)
-
-button_container = tk.Frame(btn_frame, bg=COLORS["white"])
-button_container.pack(expand=True)
-
-add_btn = create_modern_button(button_container, "Add Member", add_or_update_customer, COLORS["success"], width=18)
-add_btn.pack(side="left", padx=15)
-
-create_modern_button(button_container, "Update Plan", update_plan, COLORS["secondary"], width=15).pack(side="left", padx=15)
-create_modern_button(button_container, "Clear Form", clear_form, COLORS["gray"], width=15).pack(side="left", padx=15)
-create_modern_button(button_container, "Export CSV", export_to_csv, COLORS["primary"], width=15).pack(side="left", padx=15)
-create_modern_button(button_container, "Backup", backup_db, COLORS["warning"], width=12).pack(side="left", padx=15)
-create_modern_button(button_container, "Restore", restore_db, COLORS["danger"], width=12).pack(side="left", padx=15)
-
-tab2 = tk.Frame(notebook, bg=COLORS["light"])
-notebook.add(tab2, text="Members List")
-
-search_frame = tk.Frame(tab2, bg=COLORS["white"], relief="flat", bd=0)
-search_frame.pack(fill="x", pady=15, padx=20)
-
-search_inner = tk.Frame(search_frame, bg=COLORS["white"])
-search_inner.pack(fill="x", padx=10, pady=10)
-
-tk.Label(search_inner, text="Search:", font=("Segoe UI", 12, "bold"), bg=COLORS["white"]).pack(side="left", padx=(0, 10))
+membership_var.set(MEMBERSHIP_TYPES[0])
+payment_var.set(PAYMENT_STATUSES[0])
 
 search_var = tk.StringVar()
-search_entry = tk.Entry(search_inner, textvariable=search_var, width=80, font=("Segoe UI", 12),
-                       relief="solid", bd=1, highlightthickness=1, highlightcolor=COLORS["primary"],
-                       bg=COLORS["white"], fg=COLORS["dark"], insertbackground=COLORS["primary"])
-search_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
-
-search_btn = create_modern_button(search_inner, "Search", lambda: load_customers(search_var.get()), COLORS["primary"], width=10)
-search_btn.pack(side="left")
-
-placeholder_text = "Search by name, phone, email, membership type..."
-search_entry.insert(0, placeholder_text)
-search_entry.config(fg="gray")
-
-def on_search_focus_in(event):
-    if search_entry.get() == placeholder_text:
-        search_entry.delete(0, tk.END)
-        search_entry.config(fg="black")
-
-def on_search_focus_out(event):
-    if not search_entry.get():
-        search_entry.insert(0, placeholder_text)
-        search_entry.config(fg="gray")
-
-search_entry.bind("<FocusIn>", on_search_focus_in)
-search_entry.bind("<FocusOut>", on_search_focus_out)
-
-def on_search(*args):
-    load_customers(search_var.get())
-
-search_var.trace("w", on_search)
-
-table_frame = tk.Frame(tab2, bg=COLORS["white"], relief="flat", bd=0)
-table_frame.pack(fill="both", expand=True, padx=20, pady=10)
-
-COLUMN_WIDTHS = {
-    "ID": 80, "Name": 200, "Phone": 130, "Email": 220, 
-    "Start": 110, "End": 110, "Type": 160, "Payment": 120, 
-    "Trainer": 140, "Amount": 100, "Status": 180
-}
-
-cols = ("ID","Name","Phone","Email","Start","End","Type","Payment","Trainer","Amount","Status")
-tree = ttk.Treeview(table_frame, columns=cols, show="headings", selectmode="browse", height=15)
-
-style.configure("Treeview", background=COLORS["white"], foreground=COLORS["dark"], 
-               fieldbackground=COLORS["white"], borderwidth=0)
-style.configure("Treeview.Heading", background=COLORS["primary"], foreground="white", 
-               font=("Segoe UI", 10, "bold"), borderwidth=1, relief="flat")
-style.map("Treeview", background=[('selected', COLORS["primary"])])
-
-for col in cols:
-    tree.heading(col, text=col)
-    tree.column(col, width=COLUMN_WIDTHS.get(col, 120), anchor="w")
-
-vsb = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
-hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=tree.xview)
-tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-
-tree.grid(row=0, column=0, sticky="nsew")
-vsb.grid(row=0, column=1, sticky="ns")
-hsb.grid(row=1, column=0, sticky="ew")
-
-table_frame.grid_rowconfigure(0, weight=1)
-table_frame.grid_columnconfigure(0, weight=1)
-
-tree.bind("<Double-1>", on_row_select)
-
-action_frame = tk.Frame(tab2, bg=COLORS["light"])
-action_frame.pack(pady=15)
-
-create_modern_button(action_frame, "Delete Selected", delete_customer, COLORS["danger"]).pack(side="left", padx=10)
-create_modern_button(action_frame, "Edit Selected", lambda: on_row_select(None), COLORS["primary"]).pack(side="left", padx=10)
-create_modern_button(action_frame, "Update Plan", update_plan, COLORS["secondary"]).pack(side="left", padx=10)
-create_modern_button(action_frame, "Refresh List", lambda: load_customers(), COLORS["secondary"]).pack(side="left", padx=10)
-
-init_db()
-configure_tree_tags()
-load_customers()
-update_dashboard()
-
-root.mainloop()
\ No newline at end of file
+status_var = tk.StringVar(value="All Members")
+
+form_canvas = notes_text = add_btn = None
+search_entry = tree = member_list = waiting_pager = None
+
+form_tab = tabs.add("Add/Edit Member", build_member_form)
+list_tab = tabs.add("Members List", build_member_list)
+reports_tab = tabs.add("Reports", build_reports)
+attendance_tab = tabs.add("Attendance", build_attendance)
+diagnostics_tab = tabs.add("Diagnostics", build_diagnostics)
+notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
+
+search_controller = SearchController(root, show_members)
+change_watcher = ChangeWatcher(root)
+background_jobs = []
+if not SERVER_URL:  # a shared server runs these itself
+    background_jobs.append(BackupScheduler(
+        db, on_error=lambda e: root.after(0, show_notification, f"Automatic backup failed: {e}")))
+    # Reminders go to a log file until an SMTP transport is configured
+    background_jobs.append(ReminderEngine(
+        db, FileTransport(os.path.join(os.path.dirname(db.path), "reminders.log")),
+        on_error=lambda e: root.after(0, show_notification, f"Reminder run failed: {e}")))
+
+# The rest of startup runs once the shell has been drawn (the fallback
+# timer covers a window manager that never reports an expose)
+mark_startup("shell")
+header_frame.bind("<Expose>", lambda e: root.after_idle(finish_startup))
+root.after(500, finish_startup)
+
+root.mainloop()
+for job in background_jobs:
+    job.stop()
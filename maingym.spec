@@ -1,4 +1,11 @@
 # -*- mode: python ; coding: utf-8 -*-
+# One-folder build: dist/maingym/maingym.exe starts straight from its
+# folder. A one-file exe unpacks itself (Python, Tk, pandas) to a temp
+# folder on every launch, which was most of the cold start on the desk
+# PCs. Binaries are left uncompressed (no UPX) for the same reason. Time a
+# build's startup with:
+#
+#     python benchmark.py --startup dist/maingym/maingym.exe --repeat 5
 
 
 a = Analysis(
@@ -19,16 +26,13 @@ pyz = PYZ(a.pure)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='maingym',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -37,3 +41,12 @@ exe = EXE(
     entitlements_file=None,
     icon=['assets\\gym_app.ico'],
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='maingym',
+)
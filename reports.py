@@ -0,0 +1,65 @@
+"""
+Member analytics for MuscleTone Fitness (needs pandas)
+Prints retention cohorts, revenue by plan and trainer, trainer load and
+unpaid balances, or writes them as CSV files:
+
+    python reports.py
+    python reports.py revenue unpaid --db /tmp/load.db
+    python reports.py --csv reports/
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+
+from gym_core import AnalyticsUnavailable, ConnectionManager, MemberRepository
+from gym_core.analytics import REPORT_NAMES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print member analytics reports")
+    parser.add_argument("reports", nargs="*", metavar="report",
+                        help=f"reports to show: {', '.join(REPORT_NAMES)} (default: all)")
+    parser.add_argument("--db", help="database file (default: the app's database)")
+    parser.add_argument("--today", type=date.fromisoformat, help="report as of this date (YYYY-MM-DD)")
+    parser.add_argument("--csv", metavar="FOLDER", help="write each report to FOLDER/<report>.csv instead")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.reports if name not in REPORT_NAMES]
+    if unknown:
+        parser.error(f"unknown report(s): {', '.join(unknown)} (choose from {', '.join(REPORT_NAMES)})")
+
+    repo = MemberRepository(ConnectionManager(args.db)) if args.db else MemberRepository()
+    start = time.perf_counter()
+    try:
+        repo.init()
+        reports = repo.reports(args.today)
+    except AnalyticsUnavailable as e:
+        print(f"❌ {e}")
+        return 1
+    except sqlite3.Error as e:
+        print(f"❌ Reports failed: {e}")
+        return 1
+    finally:
+        repo.db.close()
+    elapsed = time.perf_counter() - start
+
+    if args.csv:
+        os.makedirs(args.csv, exist_ok=True)
+    for name in args.reports or REPORT_NAMES:
+        frame = reports[name]
+        if args.csv:
+            path = os.path.join(args.csv, f"{name}.csv")
+            frame.to_csv(path, index=False)
+            print(f"✅ {name}: {len(frame):,} rows -> {path}")
+        else:
+            print(f"\n📊 {name.title()}")
+            print(frame.to_string(index=False) if len(frame) else "   (no data)")
+    print(f"\n⏱️ Built in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
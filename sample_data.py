@@ -1,15 +1,23 @@
 """
 Sample Data Generator for MuscleTone Fitness
-Run this script to quickly populate your app with sample data for screenshots
+Run this script to quickly populate your app with sample data for screenshots,
+or pass a member count to bulk-load synthetic members for load testing:
+
+    python sample_data.py                        # interactive menu
+    python sample_data.py 1000000 --seed 7       # append 1M generated members
+    python sample_data.py 50000 --replace --db /tmp/load.db
 """
 
+import argparse
 import sqlite3
-import os
+import sys
+import time
 from datetime import datetime, timedelta
 
-# Database setup
-DB_FOLDER = os.path.join(os.path.expanduser("~"), "MuscleToneFitness")
-DB_NAME = os.path.join(DB_FOLDER, "gym_data.db")
+from gym_core import ConnectionManager, MemberRepository
+from gym_core.synthetic import BATCH_SIZE, insert_members, load_members
+
+repo = MemberRepository()
 
 # Sample members data
 sample_members = [
@@ -30,45 +38,45 @@ sample_members = [
 def add_sample_data():
     """Add sample data to the database"""
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            c = conn.cursor()
-            
-            # Clear existing data
-            c.execute("DELETE FROM customers")
-            print("🗑️ Cleared existing data")
-            
-            # Add sample members with varied dates
-            today = datetime.today().date()
-            
-            for i, (name, phone, email, mtype, payment, trainer, amount, notes) in enumerate(sample_members):
-                # Create varied start and end dates
-                if i < 3:  # First 3 members - active, not expiring soon
-                    start_date = (today - timedelta(days=15)).isoformat()
-                    end_date = (today + timedelta(days=45)).isoformat()
-                elif i < 6:  # Next 3 members - expiring soon
-                    start_date = (today - timedelta(days=25)).isoformat()
-                    end_date = (today + timedelta(days=5)).isoformat()
-                elif i < 9:  # Next 3 members - expired
-                    start_date = (today - timedelta(days=60)).isoformat()
-                    end_date = (today - timedelta(days=10)).isoformat()
-                else:  # Last 3 members - long-term active
-                    start_date = (today - timedelta(days=10)).isoformat()
-                    end_date = (today + timedelta(days=80)).isoformat()
-                
-                c.execute("""INSERT INTO customers
-                    (name, phone, email, start_date, end_date, membership_type, payment_status, trainer, amount, notes)
-                    VALUES (?,?,?,?,?,?,?,?,?,?)""",
-                    (name, phone, email, start_date, end_date, mtype, payment, trainer, amount, notes))
+        repo.init()
+
+        # Clear existing data
+        repo.clear()
+        print("🗑️ Cleared existing data")
+        
+        # Add sample members with varied dates
+        today = datetime.today().date()
+        
+        rows = []
+        for i, (name, phone, email, mtype, payment, trainer, amount, notes) in enumerate(sample_members):
+            # Create varied start and end dates
+            if i < 3:  # First 3 members - active, not expiring soon
+                start_date = (today - timedelta(days=15)).isoformat()
+                end_date = (today + timedelta(days=45)).isoformat()
+            elif i < 6:  # Next 3 members - expiring soon
+                start_date = (today - timedelta(days=25)).isoformat()
+                end_date = (today + timedelta(days=5)).isoformat()
+            elif i < 9:  # Next 3 members - expired
+                start_date = (today - timedelta(days=60)).isoformat()
+                end_date = (today - timedelta(days=10)).isoformat()
+            else:  # Last 3 members - long-term active
+                start_date = (today - timedelta(days=10)).isoformat()
+                end_date = (today + timedelta(days=80)).isoformat()
             
-            print(f"✅ Added {len(sample_members)} sample members")
-            print("📊 Sample data includes:")
-            print("   - 3 Active members (not expiring soon)")
-            print("   - 3 Members expiring soon")
-            print("   - 3 Expired members")
-            print("   - 3 Long-term active members")
-            print("   - Various membership types and payment statuses")
-            print("\n🏋️ Now run your app to see the populated data!")
-            print("   Command: python maingym.py")
+            rows.append((name, phone, email, start_date, end_date, mtype, payment, trainer, amount, notes))
+
+        with repo.db.transaction() as conn:
+            insert_members(conn, rows)
+        
+        print(f"✅ Added {len(sample_members)} sample members")
+        print("📊 Sample data includes:")
+        print("   - 3 Active members (not expiring soon)")
+        print("   - 3 Members expiring soon")
+        print("   - 3 Expired members")
+        print("   - 3 Long-term active members")
+        print("   - Various membership types and payment statuses")
+        print("\n🏋️ Now run your app to see the populated data!")
+        print("   Command: python maingym.py")
             
     except sqlite3.Error as e:
         print(f"❌ Error adding sample data: {e}")
@@ -76,14 +84,46 @@ def add_sample_data():
 def clear_sample_data():
     """Clear all data from the database"""
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            c = conn.cursor()
-            c.execute("DELETE FROM customers")
-            print("🗑️ All data cleared from database")
+        repo.init()
+        repo.clear()
+        print("🗑️ All data cleared from database")
     except sqlite3.Error as e:
         print(f"❌ Error clearing data: {e}")
 
+def generate_data(argv):
+    """Bulk-load generated members from the command line"""
+    parser = argparse.ArgumentParser(description="Load synthetic MuscleTone Fitness members")
+    parser.add_argument("count", type=int, help="number of members to generate")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (same seed, same members)")
+    parser.add_argument("--db", help="database file (default: the app's database)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--replace", action="store_true", help="delete existing members first")
+    args = parser.parse_args(argv)
+
+    generator_repo = MemberRepository(ConnectionManager(args.db)) if args.db else repo
+    generator_repo.init()
+    if args.replace:
+        generator_repo.clear()
+        print("🗑️ Cleared existing data")
+
+    def report(loaded, total):
+        print(f"\r   {loaded:,} / {total:,} members", end="", flush=True)
+
+    start = time.perf_counter()
+    loaded = load_members(generator_repo.db.connection, args.count, args.seed,
+                          batch_size=args.batch_size, progress=report)
+    print(f"\n✅ Added {loaded:,} members in {time.perf_counter() - start:.1f}s")
+    generator_repo.db.close()
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        try:
+            generate_data(sys.argv[1:])
+        except sqlite3.Error as e:
+            print(f"❌ Error generating data: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
     print("🏋️ MuscleTone Fitness - Sample Data Generator")
     print("=" * 50)
     
@@ -0,0 +1,82 @@
+"""
+Member API server for MuscleTone Fitness
+Shares one database between several front desks. Start it on the machine
+that holds the database, then point each desk's app at it:
+
+    GYM_TOKEN=<secret> python serve.py --host 0.0.0.0
+    GYM_SERVER=http://<server-ip>:8765 GYM_TOKEN=<secret> python maingym.py
+
+Without a token, anyone on the network can change members.
+
+The server also takes the automatic backups and sends expiry reminders,
+so the desks don't.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import os
+import sqlite3
+import sys
+
+from gym_core import BackupScheduler, ConnectionManager, FileTransport, ReminderEngine, db
+from gym_core.profiling import profiler
+from gym_core.remote import TOKEN_ENV
+from gym_core.server import READER_THREADS, SERVER_HOST, SERVER_PORT, MemberServer
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:  # a host name
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the member database over HTTP/JSON")
+    parser.add_argument("--host", default=SERVER_HOST, help=f"address to listen on (default: {SERVER_HOST}; "
+                                                             "use 0.0.0.0 to accept other machines)")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help=f"port (default: {SERVER_PORT})")
+    parser.add_argument("--db", help="database file (default: the app's database)")
+    parser.add_argument("--readers", type=int, default=READER_THREADS, help="reader threads")
+    parser.add_argument("--no-jobs", action="store_true", help="don't run automatic backups and reminders")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                        help=f"shared secret the desks must send (default: ${TOKEN_ENV})")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every request and statement (shown in the desks' Diagnostics tab)")
+    args = parser.parse_args(argv)
+
+    if not args.token and not is_loopback(args.host):
+        print(f"⚠️ Listening on {args.host} without a token: anyone on the network can change members. "
+              f"Set {TOKEN_ENV} or pass --token.", file=sys.stderr)
+    manager = ConnectionManager(args.db) if args.db else db
+    if args.profile:
+        profiler.enable()
+    server = MemberServer(manager, args.readers, args.token)
+    jobs = []
+    if not args.no_jobs:
+        report = lambda e: print(f"⚠️ {e}", file=sys.stderr)
+        jobs = [BackupScheduler(manager, on_error=report),
+                ReminderEngine(manager, FileTransport(os.path.join(os.path.dirname(os.path.abspath(manager.path)),
+                                                                   "reminders.log")), on_error=report)]
+    try:
+        for job in jobs:
+            job.start()
+        asyncio.run(server.serve(args.host, args.port,
+                                 ready=lambda port: print(f"✅ Serving {manager.path} on http://{args.host}:{port}")))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    except (OSError, sqlite3.Error) as e:
+        print(f"❌ Server failed: {e}")
+        return 1
+    finally:
+        for job in jobs:
+            job.stop()
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from gym_core import ConnectionManager, MemberRepository, analytics
+
+
+@unittest.skipUnless(analytics.analytics_available(), "pandas is not installed")
+class DirectReportTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        manager = ConnectionManager(os.path.join(folder.name, "gym.db"))
+        self.addCleanup(manager.close)
+        repo = MemberRepository(manager)
+        repo.init()
+        repo.create({"name": "Asha", "start_date": "2025-01-01", "end_date": "2025-03-01", "amount": 3000})
+        self.conn = manager.connection
+
+    def test_report_functions_import_pandas_themselves(self):
+        # As in a fresh process, where build_reports hasn't run yet
+        with mock.patch.object(analytics, "pd", None), mock.patch.object(analytics, "np", None):
+            members = analytics.load_members(self.conn)
+            self.assertEqual(len(members), 1)
+        with mock.patch.object(analytics, "pd", None), mock.patch.object(analytics, "np", None):
+            cohorts = analytics.cohort_report(members)
+            self.assertEqual(list(cohorts["cohort"]), ["2025-01"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from gym_core import ConnectionManager, MemberRepository
+from gym_core.attendance import AttendanceWriter
+
+
+class BrokenManager:
+    def __init__(self, manager, failures):
+        self.manager = manager
+        self.failures = failures
+
+    def writer(self):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("unable to open database file")
+        return self.manager.writer()
+
+
+class WriterStartupTest(unittest.TestCase):
+    def test_queued_check_ins_fail_when_the_writer_cannot_connect(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        manager = ConnectionManager(os.path.join(folder.name, "gym.db"))
+        self.addCleanup(manager.close)
+        MemberRepository(manager).init()
+        writer = AttendanceWriter(BrokenManager(manager, failures=1))
+        self.addCleanup(writer.stop, 5)
+
+        with self.assertRaises(sqlite3.OperationalError):
+            writer.submit(1).result(5)
+        # The next check-in starts a new writer thread, which connects
+        with self.assertRaises(KeyError):
+            writer.check_in(1, timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
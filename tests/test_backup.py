@@ -0,0 +1,83 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from gym_core import ConnectionManager, MemberRepository
+from gym_core.backup import (
+    SNAPSHOT_PREFIX,
+    SNAPSHOT_SUFFIX,
+    BackupError,
+    list_snapshots,
+    snapshot_folder,
+    take_snapshot,
+)
+
+
+def member(name, amount=2000):
+    return {"name": name, "start_date": "2025-01-01", "end_date": "2025-02-01", "amount": amount}
+
+
+class BackupTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.manager = ConnectionManager(os.path.join(folder.name, "gym.db"))
+        self.addCleanup(self.manager.close)
+        self.repo = MemberRepository(self.manager)
+        self.repo.init()
+        self.member_id = self.repo.create(member("Asha")).member_id
+
+    def rows(self):
+        return self.manager.connection.execute("SELECT id, name, amount FROM customers ORDER BY id").fetchall()
+
+    def test_restore_brings_back_the_snapshot(self):
+        path = self.repo.snapshot()
+        before = self.rows()
+        self.repo.update(self.member_id, member("Asha Changed", 5000))
+        self.repo.create(member("Later"))
+
+        self.repo.restore(path)
+
+        self.assertEqual(self.rows(), before)
+
+    def test_truncated_snapshot_is_rejected(self):
+        path = self.repo.snapshot()
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) // 2)
+        before = self.rows()
+
+        with self.assertRaises(BackupError):
+            self.repo.restore(path)
+        self.assertEqual(self.rows(), before)
+
+    def test_corrupt_database_is_rejected(self):
+        path = self.repo.snapshot()
+        with gzip.open(path, "rb") as f:
+            data = bytearray(f.read())
+        data[len(data) // 2:] = b"\xff" * (len(data) - len(data) // 2)
+        with gzip.open(path, "wb") as f:
+            f.write(data)
+        before = self.rows()
+
+        with self.assertRaises(BackupError):
+            self.repo.restore(path)
+        self.assertEqual(self.rows(), before)
+
+    def test_rotation_keeps_the_newest_snapshots(self):
+        folder = snapshot_folder(self.manager)
+        os.makedirs(folder, exist_ok=True)
+        for day in range(1, 6):
+            open(os.path.join(folder, f"{SNAPSHOT_PREFIX}2020010{day}-000000{SNAPSHOT_SUFFIX}"), "wb").close()
+
+        newest = take_snapshot(self.manager, keep=3)
+
+        snapshots = list_snapshots(self.manager)
+        self.assertEqual(len(snapshots), 3)
+        self.assertEqual(snapshots[0], newest)
+        self.assertEqual([os.path.basename(p) for p in snapshots[1:]],
+                         [f"{SNAPSHOT_PREFIX}2020010{day}-000000{SNAPSHOT_SUFFIX}" for day in (5, 4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from gym_core import ConnectionManager, MemberRepository
+from gym_core.changes import ChangeLogGap, changes_since, compact_change_log
+
+
+def plan(start, end, amount, status="Paid"):
+    return {"start_date": start, "end_date": end, "membership_type": "Monthly", "payment_status": status,
+            "trainer": "Ravi", "amount": amount}
+
+
+class RepoTestCase(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        manager = ConnectionManager(os.path.join(folder.name, "gym.db"))
+        self.addCleanup(manager.close)
+        self.repo = MemberRepository(manager)
+        self.repo.init()
+        self.conn = manager.connection
+
+
+class ChangeLogHorizonTest(RepoTestCase):
+    def test_cursor_below_the_horizon_is_a_gap(self):
+        member_id = self.repo.create(dict(plan("2025-01-01", "2025-02-01", 2000), name="Asha")).member_id
+        self.repo.update(member_id, dict(plan("2025-01-01", "2025-02-01", 2000), name="Asha K"))
+        self.repo.update(member_id, dict(plan("2025-01-01", "2025-02-01", 2000), name="Asha Kumar"))
+        with self.conn:
+            self.conn.execute("UPDATE change_log SET at = datetime('now', '-400 days')")
+
+        removed = compact_change_log(self.conn)
+
+        self.assertEqual(removed, 2)
+        horizon = self.conn.execute("SELECT seq FROM change_log_horizon").fetchone()[0]
+        with self.assertRaises(ChangeLogGap):
+            changes_since(self.conn, horizon - 1)
+        self.assertEqual([(c.op, c.member_id) for c in changes_since(self.conn, horizon)],
+                         [("update", member_id)])
+
+
+if __name__ == "__main__":
+    unittest.main()
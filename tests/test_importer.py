@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+
+from gym_core import ConnectionManager, MemberRepository
+
+OLD_EXPORT = """ID,Name,Phone,Email,Start,End,Type,Payment,Trainer,Amount,Status
+1,Old One,9876543210,one@example.com,2025-01-01,2025-02-01,Monthly,Paid,,Rs2500.00,Expired
+2,Old Two,,,2025-01-01,2026-12-01,Monthly,Pending,,Rs 0.00,Active (12d left)
+"""
+
+
+class OldExportImportTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "old.csv")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(OLD_EXPORT)
+        manager = ConnectionManager(os.path.join(folder.name, "gym.db"))
+        self.addCleanup(manager.close)
+        self.repo = MemberRepository(manager)
+        self.repo.init()
+
+    def test_old_export_keeps_payment_status_and_amounts(self):
+        result = self.repo.import_csv(self.path)
+
+        self.assertEqual((result.inserted, result.rejected), (2, 0))
+        rows = self.repo.connection.execute(
+            "SELECT name, payment_status, amount FROM customers ORDER BY id").fetchall()
+        self.assertEqual(rows, [("Old One", "Paid", 2500.0), ("Old Two", "Pending", 0.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from gym_core import ConnectionManager, MemberRepository
+from gym_core.ledger import revenue
+
+
+def plan(start, end, amount, status="Paid"):
+    return {"start_date": start, "end_date": end, "membership_type": "Monthly", "payment_status": status,
+            "trainer": "Ravi", "amount": amount}
+
+
+class RepoTestCase(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        manager = ConnectionManager(os.path.join(folder.name, "gym.db"))
+        self.addCleanup(manager.close)
+        self.repo = MemberRepository(manager)
+        self.repo.init()
+        self.conn = manager.connection
+
+
+class RevenueRollupTest(RepoTestCase):
+    def ledger(self, width):
+        """What the rollup for bucket keys of ``width`` should hold, straight from plan_history."""
+        return self.conn.execute(f"""
+            SELECT substr(paid_on, 1, {width}) AS bucket,
+                   SUM(CASE WHEN reverses IS NULL THEN 1 ELSE -1 END), SUM(amount),
+                   coalesce(SUM(CASE WHEN payment_status = 'Paid' THEN amount END), 0)
+            FROM plan_history GROUP BY bucket ORDER BY bucket
+        """).fetchall()
+
+    def test_rollups_match_the_ledger(self):
+        asha = self.repo.create(dict(plan("2025-01-05", "2025-02-05", 2000), name="Asha")).member_id
+        ravi = self.repo.create(dict(plan("2025-01-20", "2025-02-20", 1500, "Pending"), name="Ravi")).member_id
+        self.repo.renew_plan(asha, plan("2025-02-05", "2025-03-05", 2500))
+        # A changed plan is a reversal of the old entry plus the new one
+        self.repo.update(ravi, dict(plan("2025-01-20", "2025-04-20", 4000), name="Ravi"))
+        self.repo.delete(asha)
+
+        for period, width in (("month", 7), ("day", 10)):
+            with self.subTest(period=period):
+                self.assertEqual(revenue(self.conn, period), self.ledger(width))
+        self.assertEqual(revenue(self.conn, "month"),
+                         [("2025-01", 2, 6000.0, 6000.0), ("2025-02", 1, 2500.0, 2500.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
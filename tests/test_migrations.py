@@ -0,0 +1,28 @@
+import sqlite3
+import unittest
+from unittest import mock
+
+from gym_core import migrations
+
+
+class FailedStepTest(unittest.TestCase):
+    def test_python_error_in_a_step_rolls_back(self):
+        conn = sqlite3.connect(":memory:", isolation_level=None)
+        self.addCleanup(conn.close)
+        migrations.migrate(conn, target=1)
+
+        def broken(conn):
+            conn.execute("CREATE TABLE half_done (x)")
+            raise RuntimeError("bug in a step")
+
+        with mock.patch.object(migrations, "MIGRATIONS", migrations.MIGRATIONS[:1] + [(2, broken)]):
+            with self.assertRaises(RuntimeError):
+                migrations.migrate(conn)
+
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(migrations.get_version(conn), 1)
+        self.assertIsNone(conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import sqlite3
+import unittest
+
+from gym_core.profiling import ProfiledConnection, profiler
+
+
+class SlowStatementTest(unittest.TestCase):
+    def setUp(self):
+        enabled, slow_ms = profiler.enabled, profiler.slow_ms
+        self.addCleanup(setattr, profiler, "enabled", enabled)
+        self.addCleanup(setattr, profiler, "slow_ms", slow_ms)
+        self.addCleanup(profiler.reset)
+        profiler.enable()
+        profiler.reset()
+        profiler.slow_ms = 0  # every statement counts as slow
+        self.conn = sqlite3.connect(":memory:", factory=ProfiledConnection)
+        self.addCleanup(self.conn.close)
+        self.conn.execute("CREATE TABLE t (x INTEGER)")
+        self.conn.executemany("INSERT INTO t VALUES (?)", [(n,) for n in range(10)])
+
+    def plan_for(self, sql):
+        return [q.plan for q in profiler.slow_queries() if q.sql == sql]
+
+    def test_fetched_statement_is_explained(self):
+        self.conn.execute("SELECT x FROM t WHERE x > ?", (3,)).fetchall()
+        [plan] = self.plan_for("SELECT x FROM t WHERE x > ?")
+        self.assertTrue(plan)
+
+    def test_collected_cursor_is_timed_but_not_explained(self):
+        cur = self.conn.execute("SELECT x FROM t WHERE x < ?", (3,))
+        cur.fetchone()
+        del cur  # finished by __del__, as the garbage collector would
+        [plan] = self.plan_for("SELECT x FROM t WHERE x < ?")
+        self.assertEqual(plan, [])
+        self.assertIn(("sql", "SELECT x FROM t WHERE x < ?"),
+                      {(t.kind, t.name) for t in profiler.timings()})
+
+
+if __name__ == "__main__":
+    unittest.main()
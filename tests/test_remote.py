@@ -0,0 +1,47 @@
+import socketserver
+import threading
+import unittest
+
+from gym_core.remote import RemoteError, RemoteSession
+
+
+class DroppingHandler(socketserver.StreamRequestHandler):
+    """Reads a request, then closes without answering (as if it crashed after applying it)."""
+
+    def handle(self):
+        length = 0
+        while True:
+            line = self.rfile.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        self.rfile.read(length)
+        self.server.received += 1
+
+
+class RetryTest(unittest.TestCase):
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), DroppingHandler)
+        self.server.daemon_threads = True
+        self.server.received = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.session = RemoteSession(f"http://127.0.0.1:{self.server.server_address[1]}", timeout=5)
+        self.addCleanup(self.session.close)
+
+    def test_write_is_not_repeated_after_a_dropped_response(self):
+        with self.assertRaises(RemoteError):
+            self.session.request("POST", "/members", {"name": "Once"})
+        self.assertEqual(self.server.received, 1)
+
+    def test_read_is_retried_once(self):
+        with self.assertRaises(RemoteError):
+            self.session.request("GET", "/stats")
+        self.assertEqual(self.server.received, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
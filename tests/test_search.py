@@ -0,0 +1,26 @@
+import os
+import tempfile
+import unittest
+
+from gym_core import ConnectionManager, MemberRepository
+from gym_core.search import search_ids
+
+
+class SearchColumnsTest(unittest.TestCase):
+    def test_short_and_long_terms_search_the_same_fields(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        manager = ConnectionManager(os.path.join(folder.name, "gym.db"))
+        self.addCleanup(manager.close)
+        repo = MemberRepository(manager)
+        repo.init()
+        member_id = repo.create({"name": "Asha", "start_date": "2025-01-01", "end_date": "2025-02-01",
+                                 "notes": "Knee injury, no squats"}).member_id
+
+        for term in ("kne", "kn"):
+            with self.subTest(term=term):
+                self.assertEqual(list(search_ids(manager.connection, term)), [member_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
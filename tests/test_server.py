@@ -0,0 +1,62 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from gym_core import ConnectionManager, MemberServer
+from gym_core.server import MAX_HEADERS
+
+
+class BadRequestTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        manager = ConnectionManager(os.path.join(folder.name, "gym.db"))
+        self.addCleanup(manager.close)
+        self.server = MemberServer(manager)
+        self.addCleanup(self.server.close)
+        self.server.repo.init()
+
+    def test_non_string_field_is_a_bad_request(self):
+        body = {"name": "Typed", "start_date": 20240101, "end_date": "2024-02-01"}
+        status, payload, _ = asyncio.run(self.server.dispatch("POST", "/members", body))
+        self.assertEqual(status, 400)
+        self.assertIn("start_date", payload["error"])
+
+    def exchange(self, raw):
+        """Send ``raw`` bytes to a listening server; returns its status line."""
+        async def run():
+            server = await asyncio.start_server(self.server.handle, "127.0.0.1", 0)
+            async with server:
+                reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+                writer.write(raw)
+                await writer.drain()
+                status_line = await reader.readline()
+                writer.close()
+                return status_line
+
+        return asyncio.run(run())
+
+    def test_bad_content_length_is_a_bad_request(self):
+        status_line = self.exchange(b"POST /members HTTP/1.1\r\nContent-Length: ten\r\n\r\n")
+        self.assertTrue(status_line.startswith(b"HTTP/1.1 400"))
+
+    def test_overlong_line_is_a_bad_request(self):
+        status_line = self.exchange(b"GET /stats HTTP/1.1\r\nX-Long: " + b"x" * 100_000 + b"\r\n\r\n")
+        self.assertTrue(status_line.startswith(b"HTTP/1.1 400"))
+
+    def test_too_many_headers_are_refused(self):
+        headers = b"".join(b"X-Header-%d: 1\r\n" % n for n in range(MAX_HEADERS + 1))
+        status_line = self.exchange(b"GET /stats HTTP/1.1\r\n" + headers + b"\r\n")
+        self.assertTrue(status_line.startswith(b"HTTP/1.1 431"))
+
+    def test_token_is_required_once_set(self):
+        self.server.token = "s3cret"
+        request = b"GET /version HTTP/1.1\r\nConnection: close\r\n%s\r\n"
+        self.assertTrue(self.exchange(request % b"").startswith(b"HTTP/1.1 401"))
+        self.assertTrue(self.exchange(request % b"X-Gym-Token: wrong\r\n").startswith(b"HTTP/1.1 401"))
+        self.assertTrue(self.exchange(request % b"X-Gym-Token: s3cret\r\n").startswith(b"HTTP/1.1 200"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from gym_core import ConnectionManager, MemberRepository
+
+
+def member(name, amount=2000):
+    return {"name": name, "phone": "", "email": "", "start_date": "2025-01-01", "end_date": "2025-02-01",
+            "membership_type": "Monthly", "payment_status": "Paid", "trainer": "", "amount": amount,
+            "notes": ""}
+
+
+class MergeAfterDeleteTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.a = self.branch("a")
+        self.b = self.branch("b")
+
+    def branch(self, name):
+        manager = ConnectionManager(os.path.join(self.folder.name, f"{name}.db"))
+        self.addCleanup(manager.close)
+        repo = MemberRepository(manager)
+        repo.init()
+        repo.rename_branch(name)
+        return repo
+
+    def test_merged_member_never_reuses_a_deleted_id(self):
+        ids = [self.a.create(member(f"A{n}", 6000)).member_id for n in range(3)]
+        self.a.delete(ids[-1])
+        self.b.create(member("B new"))
+        path = os.path.join(self.folder.name, "b-to-a.delta.gz")
+        self.b.export_delta(path, "a")
+
+        result = self.a.merge_delta(path)
+
+        self.assertEqual(result.inserted, 1)
+        conn = self.a.connection
+        new_id = conn.execute("SELECT id FROM customers WHERE name = 'B new'").fetchone()[0]
+        self.assertGreater(new_id, ids[-1])
+        events = conn.execute("SELECT event, amount FROM plan_history WHERE member_id = ?",
+                              (new_id,)).fetchall()
+        self.assertEqual(events, [("join", 2000)])
+        deleted = conn.execute("SELECT event FROM plan_history WHERE member_id = ?", (ids[-1],)).fetchall()
+        self.assertEqual(deleted, [("join",)])
+
+
+if __name__ == "__main__":
+    unittest.main()